@@ -0,0 +1,265 @@
+"""
+Админка Gradar для больших таблиц.
+
+- Списки загружают связанные объекты через list_select_related: __str__ занятий,
+  оценок и посещаемости обращаются к курсу, занятию и студенту.
+- Внешние ключи — автодополнение или raw id вместо выпадающих списков со всеми
+  строками таблицы.
+- Поиск идет только по индексированным выражениям: префиксы полей пользователя
+  (индексы UPPER(...) из миграции 0009) и полнотекстовый индекс курсов и занятий.
+- Нефильтрованные списки на PostgreSQL берут число строк из статистики
+  планировщика вместо COUNT(*); общее число строк рядом с результатом фильтра
+  не считается (show_full_result_count = False).
+- Удаление из админки оставляет записи для синхронизации и события потока
+  изменений, как удаление через API.
+"""
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.forms import UserChangeForm, UserCreationForm
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import aggregates, events, search, sync
+from .models import (
+    User, Group, Course, Lesson, Attendance, Grade, ArchivedLesson, ArchivedAttendance, ArchivedGrade,
+    IdempotencyKey, Job, ChangeEvent, Tombstone,
+)
+
+# Ниже этого значения оценке не доверяем и считаем строки точно
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+ADMIN_LIST_PER_PAGE = 100
+
+# Префиксный поиск по пользователю, обслуживаемый индексами UPPER(field) text_pattern_ops
+USER_SEARCH_FIELDS = tuple(f'^{field}' for field in search.AUTOCOMPLETE_FIELDS)
+
+
+def student_search_fields(prefix='student'):
+    return tuple(f'^{prefix}__{field}' for field in search.AUTOCOMPLETE_FIELDS)
+
+
+def estimated_count(queryset):
+    """Оценка числа строк таблицы из pg_class.reltuples или None"""
+    conn = connections[queryset.db]
+    if conn.vendor != 'postgresql':
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1: таблицу еще ни разу не анализировали
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class GradarModelAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = ADMIN_LIST_PER_PAGE
+
+
+class TombstoneAdminMixin:
+    """
+    Удаление из админки записывается для синхронизации (и в поток изменений для
+    оценок и посещаемости). Массовое удаление не обходит строки по одной:
+    получатели выбираются запросом по всему queryset, записи — bulk_create
+    """
+
+    def _record_deleted(self, queryset):
+        sync.record_deleted_queryset(queryset)
+        if queryset.model in (Grade, Attendance):
+            events.record_deleted_queryset(queryset)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            self._record_deleted(type(obj).objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            self._record_deleted(queryset)
+            super().delete_queryset(request, queryset)
+
+
+class GradarUserCreationForm(UserCreationForm):
+    class Meta(UserCreationForm.Meta):
+        model = User
+        fields = ('username', 'email', 'role')
+
+
+class GradarUserChangeForm(UserChangeForm):
+    class Meta(UserChangeForm.Meta):
+        model = User
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    form = GradarUserChangeForm
+    add_form = GradarUserCreationForm
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = ADMIN_LIST_PER_PAGE
+    list_display = ('username', 'email', 'first_name', 'last_name', 'role', 'is_staff', 'is_active')
+    list_filter = ('role', 'is_staff', 'is_active')
+    search_fields = USER_SEARCH_FIELDS
+    ordering = ('id',)
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ('Gradar', {'fields': ('role', 'bio')}),
+    )
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('username', 'email', 'role', 'password1', 'password2'),
+        }),
+    )
+
+
+@admin.register(Group)
+class GroupAdmin(TombstoneAdminMixin, GradarModelAdmin):
+    list_display = ('name', 'year', 'student_count', 'updated_at')
+    list_filter = ('year',)
+    search_fields = ('^name',)
+    autocomplete_fields = ('students',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            student_count=aggregates.count_per_row(Group.students.through.objects.all(), 'group')
+        )
+
+    @admin.display(description='Студентов', ordering='student_count')
+    def student_count(self, obj):
+        return obj.student_count
+
+
+class FullTextSearchMixin:
+    """Поиск по полнотекстовому индексу (api/search.py) вместо icontains по search_fields"""
+
+    def get_search_results(self, request, queryset, search_term):
+        return search.filter_full_text(queryset, search_term), False
+
+
+@admin.register(Course)
+class CourseAdmin(TombstoneAdminMixin, FullTextSearchMixin, GradarModelAdmin):
+    list_display = ('name', 'teacher', 'semester', 'year', 'updated_at')
+    list_filter = ('semester', 'year')
+    list_select_related = ('teacher',)
+    search_fields = ('name', 'description')
+    autocomplete_fields = ('teacher', 'groups')
+
+
+@admin.register(Lesson)
+class LessonAdmin(TombstoneAdminMixin, FullTextSearchMixin, GradarModelAdmin):
+    list_display = ('topic', 'course', 'date')
+    list_select_related = ('course',)
+    search_fields = ('topic',)
+    autocomplete_fields = ('course',)
+
+
+@admin.register(Grade)
+class GradeAdmin(TombstoneAdminMixin, GradarModelAdmin):
+    list_display = ('student', 'lesson', 'value', 'updated_at')
+    list_select_related = ('student', 'lesson__course')
+    search_fields = student_search_fields()
+    raw_id_fields = ('lesson', 'student')
+
+
+@admin.register(Attendance)
+class AttendanceAdmin(TombstoneAdminMixin, GradarModelAdmin):
+    list_display = ('student', 'lesson', 'is_present', 'updated_at')
+    list_filter = ('is_present',)
+    list_select_related = ('student', 'lesson__course')
+    search_fields = student_search_fields()
+    raw_id_fields = ('lesson', 'student')
+    actions = ('mark_present', 'mark_absent')
+
+    def _mark(self, request, queryset, is_present):
+        # Через save(): сигнал записывает событие, auto_now обновляет updated_at для синхронизации
+        changed = 0
+        with transaction.atomic():
+            for attendance in queryset.exclude(is_present=is_present):
+                attendance.is_present = is_present
+                attendance.save(update_fields=['is_present', 'updated_at'])
+                changed += 1
+        self.message_user(request, f"Изменено отметок: {changed}", messages.SUCCESS)
+
+    @admin.action(description='Отметить присутствие')
+    def mark_present(self, request, queryset):
+        self._mark(request, queryset, True)
+
+    @admin.action(description='Отметить отсутствие')
+    def mark_absent(self, request, queryset):
+        self._mark(request, queryset, False)
+
+
+@admin.register(ArchivedLesson)
+class ArchivedLessonAdmin(GradarModelAdmin):
+    list_display = ('topic', 'course', 'date')
+    list_select_related = ('course',)
+    raw_id_fields = ('course',)
+
+
+@admin.register(ArchivedGrade)
+class ArchivedGradeAdmin(GradarModelAdmin):
+    list_display = ('student', 'lesson', 'value')
+    list_select_related = ('student', 'lesson__course')
+    search_fields = student_search_fields()
+    raw_id_fields = ('lesson', 'student')
+
+
+@admin.register(ArchivedAttendance)
+class ArchivedAttendanceAdmin(GradarModelAdmin):
+    list_display = ('student', 'lesson', 'is_present')
+    list_filter = ('is_present',)
+    list_select_related = ('student', 'lesson__course')
+    search_fields = student_search_fields()
+    raw_id_fields = ('lesson', 'student')
+
+
+@admin.register(Job)
+class JobAdmin(GradarModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    raw_id_fields = ('created_by',)
+    actions = ('retry',)
+
+    @admin.action(description='Перезапустить упавшие задачи')
+    def retry(self, request, queryset):
+        count = queryset.filter(status=Job.STATUS_FAILED).update(
+            status=Job.STATUS_QUEUED, attempts=0, error='', run_after=timezone.now(),
+            locked_by='', locked_at=None, finished_at=None,
+        )
+        self.message_user(request, f"Поставлено в очередь: {count}", messages.SUCCESS)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(GradarModelAdmin):
+    list_display = ('key', 'user', 'method', 'path', 'status_code', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(ChangeEvent)
+class ChangeEventAdmin(GradarModelAdmin):
+    list_display = ('id', 'user_id', 'kind', 'action', 'object_id', 'created_at')
+    raw_id_fields = ('user',)
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(GradarModelAdmin):
+    list_display = ('id', 'user_id', 'kind', 'object_id', 'deleted_at')
+    list_filter = ('kind',)
+    raw_id_fields = ('user',)
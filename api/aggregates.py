@@ -0,0 +1,87 @@
+"""
+Показатели курсов и групп, которые считаются в SQL.
+
+Каждый показатель — коррелированный подзапрос в SELECT по курсам или группам,
+поэтому список с показателями загружается тем же числом запросов, что и без
+них, независимо от количества строк, занятий и оценок.
+"""
+from django.db.models import Avg, Case, Count, DateTimeField, FloatField, IntegerField, Min, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Group, Lesson, Grade, Attendance
+
+# Действия ViewSet'ов курсов и групп, в ответах которых есть показатели
+STATS_ACTIONS = ('list', 'retrieve')
+
+
+def per_row(queryset, field, aggregate, output_field=FloatField()):
+    """Агрегат по строкам queryset, у которых field указывает на строку внешнего запроса"""
+    return Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(result=aggregate)
+        .values('result'),
+        output_field=output_field,
+    )
+
+
+def count_per_row(queryset, field, expression='pk', distinct=False):
+    return Coalesce(
+        per_row(queryset, field, Count(expression, distinct=distinct), output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def attendance_rate_expression():
+    """Доля отметок «присутствовал» от 0 до 1"""
+    return Avg(Case(When(is_present=True, then=Value(1.0)), default=Value(0.0), output_field=FloatField()))
+
+
+def annotate_courses(queryset, now=None):
+    """
+    student_count — студенты групп курса, lesson_count — занятия,
+    next_lesson_at — ближайшее будущее занятие, avg_grade — средняя оценка,
+    attendance_rate — доля присутствий по всем отметкам курса
+    """
+    now = now or timezone.now()
+    lessons = Lesson.objects.all()
+    return queryset.annotate(
+        student_count=count_per_row(Group.students.through.objects.all(), 'group__courses', 'user', distinct=True),
+        lesson_count=count_per_row(lessons, 'course'),
+        next_lesson_at=per_row(lessons.filter(date__gte=now), 'course', Min('date'), output_field=DateTimeField()),
+        avg_grade=per_row(Grade.objects.all(), 'lesson__course', Avg('value')),
+        attendance_rate=per_row(Attendance.objects.all(), 'lesson__course', attendance_rate_expression()),
+    )
+
+
+def annotate_groups(queryset, now=None):
+    """
+    Те же показатели для группы: занятия курсов, на которые записана группа,
+    а оценки и посещаемость — только студентов этой группы
+    """
+    now = now or timezone.now()
+    lessons = Lesson.objects.all()
+    members = {'student__student_groups': OuterRef('pk')}
+    return queryset.annotate(
+        student_count=count_per_row(Group.students.through.objects.all(), 'group'),
+        lesson_count=count_per_row(lessons, 'course__groups'),
+        next_lesson_at=per_row(
+            lessons.filter(date__gte=now), 'course__groups', Min('date'), output_field=DateTimeField()
+        ),
+        avg_grade=per_row(Grade.objects.filter(**members), 'lesson__course__groups', Avg('value')),
+        attendance_rate=per_row(
+            Attendance.objects.filter(**members), 'lesson__course__groups', attendance_rate_expression()
+        ),
+    )
+
+
+def annotate_for_action(view, queryset, annotate):
+    """
+    Показатели только для чтения списка и карточки: в ответах на запись они
+    устарели бы, а выгрузке, my-grades и списку студентов группы не нужны
+    """
+    if view.action in STATS_ACTIONS:
+        return annotate(queryset)
+    return queryset
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import events, shedding, sync  # noqa: F401 — подключают сигналы
+        from . import compiled, serializers
+        from .search import install_sqlite_fts
+
+        compiled.compile_module(serializers)
+
+        post_migrate.connect(install_sqlite_fts, sender=self)
@@ -0,0 +1,102 @@
+"""
+Архивация закрытых семестров.
+
+Занятия, оценки и посещаемость курсов закрытого семестра переносятся в таблицы
+ArchivedLesson/ArchivedGrade/ArchivedAttendance с сохранением идентификаторов.
+Рабочие таблицы и их индексы остаются размером с текущий семестр, а история
+студента (my-grades, список посещаемости) читает обе части.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Course, Lesson, Grade, Attendance,
+    ArchivedLesson, ArchivedGrade, ArchivedAttendance,
+)
+
+# Сколько строк копируется за один INSERT
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def _copy(queryset, archive_model, fields, batch_size):
+    """Копирует строки в архивную таблицу порциями, не создавая исходных моделей"""
+    copied = 0
+    batch = []
+    for row in queryset.values(*fields).iterator(chunk_size=batch_size):
+        batch.append(archive_model(**row))
+        if len(batch) >= batch_size:
+            archive_model.objects.bulk_create(batch)
+            copied += len(batch)
+            batch = []
+    if batch:
+        archive_model.objects.bulk_create(batch)
+        copied += len(batch)
+    return copied
+
+
+def has_upcoming_lessons(year, semester):
+    return Lesson.objects.filter(
+        course__year=year, course__semester=semester, date__gte=timezone.now()
+    ).exists()
+
+
+def archive_semester(year, semester, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит данные курсов семестра в архив; возвращает число перенесенных строк"""
+    courses = Course.objects.filter(year=year, semester=semester)
+    lessons = Lesson.objects.filter(course__in=courses)
+    grades = Grade.objects.filter(lesson__in=lessons)
+    attendances = Attendance.objects.filter(lesson__in=lessons)
+
+    with transaction.atomic():
+        counts = {
+            'lessons': _copy(lessons, ArchivedLesson, ('id', 'course_id', 'topic', 'date'), batch_size),
+            'grades': _copy(
+                grades, ArchivedGrade, ('id', 'lesson_id', 'student_id', 'value', 'comment'), batch_size
+            ),
+            'attendance': _copy(
+                attendances, ArchivedAttendance, ('id', 'lesson_id', 'student_id', 'is_present'), batch_size
+            ),
+        }
+        # Сначала зависимые строки, чтобы удаление занятий не собирало каскад в памяти
+        grades.delete()
+        attendances.delete()
+        lessons.delete()
+    return counts
+
+
+def with_related(queryset):
+    """Подгружает все, что нужно GradeSerializer/AttendanceSerializer"""
+    return (
+        queryset
+        .select_related('lesson__course__teacher', 'student')
+        .prefetch_related('lesson__course__groups__students')
+    )
+
+
+def grade_history(student, course=None):
+    """Оценки студента из рабочей и архивной таблиц"""
+    live = with_related(Grade.objects.filter(student=student))
+    archived = with_related(ArchivedGrade.objects.filter(student=student))
+    if course is not None:
+        live = live.filter(lesson__course=course)
+        archived = archived.filter(lesson__course=course)
+    return list(live) + list(archived)
+
+
+def attendance_querysets(student, filter_queryset=None):
+    """
+    Посещаемость студента: queryset'ы рабочей и архивной таблиц; filter_queryset
+    применяется к обеим частям (например, FilterSet из api.filters)
+    """
+    live = Attendance.objects.filter(student=student)
+    archived = ArchivedAttendance.objects.filter(student=student)
+    if filter_queryset is not None:
+        live = filter_queryset(live)
+        archived = filter_queryset(archived)
+    return live, archived
+
+
+def attendance_history(student, filter_queryset=None):
+    """Посещаемость студента из рабочей и архивной таблиц"""
+    live, archived = attendance_querysets(student, filter_queryset)
+    return list(with_related(live)) + list(with_related(archived))
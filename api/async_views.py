@@ -0,0 +1,223 @@
+"""
+Асинхронные реализации самых нагруженных эндпоинтов чтения.
+
+Используются при развертывании через ASGI (``gradar/asgi.py``): медленный запрос
+к Postgres не занимает рабочий поток, пока ответ ждет базу. Права доступа и
+формат ответа повторяют соответствующие действия ViewSet'ов из ``api/views.py``.
+Небезопасные методы передаются в исходные синхронные ViewSet'ы.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework import exceptions, status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import aggregates, events, projections, throttling
+from .archive import with_related
+from .filters import CourseFilter, LessonFilter, filter_queryset
+from .models import Course, Lesson, Grade, Group, ArchivedGrade
+from .renderers import FastJSONRenderer
+from .serializers import UserSerializer, CourseStatsSerializer, LessonSerializer, GradeSerializer
+from .views import UserViewSet, CourseViewSet, LessonViewSet, GradeViewSet
+
+authenticator = JWTAuthentication()
+renderer = FastJSONRenderer()
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    """Рендерит ответ тем же рендерером, что и DRF, чтобы тела совпадали байт в байт"""
+    response = HttpResponse(
+        renderer.render(data),
+        status=status_code,
+        content_type='application/json',
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def exception_response(exc):
+    """Аналог rest_framework.views.exception_handler для асинхронных представлений"""
+    if isinstance(exc, Http404):
+        exc = exceptions.NotFound(*(exc.args))
+    elif isinstance(exc, DjangoPermissionDenied):
+        exc = exceptions.PermissionDenied(*(exc.args))
+
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = authenticator.authenticate_header(None)
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {'detail': exc.detail}
+    return render(data, exc.status_code, headers)
+
+
+async def authenticate(request):
+    """JWT-аутентификация с той же семантикой, что и у DRF (IsAuthenticated)"""
+    # Пользователь загружается через simplejwt, чтобы проверки is_active и
+    # отзыва токена оставались в одном месте
+    result = await sync_to_async(authenticator.authenticate)(request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+    return result[0]
+
+
+async def authenticate_stream(request):
+    """
+    Как authenticate, но принимает токен и из параметра ?token=: браузерный
+    EventSource не умеет передавать заголовок Authorization
+    """
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        validated = await sync_to_async(authenticator.get_validated_token)(token.encode())
+        return await sync_to_async(authenticator.get_user)(validated)
+    return await authenticate(request)
+
+
+def async_read_view(handler, sync_view):
+    """
+    Собирает представление: GET/HEAD обслуживает асинхронный handler,
+    остальные методы уходят в синхронный ViewSet без изменений. Лимит запросов
+    списывается по стоимости действия из throttle_costs ViewSet'а
+    """
+    cost = throttling.throttle_cost(sync_view.cls, sync_view.actions['get'])
+
+    async def view(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        try:
+            user = await authenticate(request)
+            wait = await sync_to_async(throttling.charge)(user, cost)
+            if wait:
+                raise exceptions.Throttled(wait)
+            return await handler(request, user, *args, **kwargs)
+        except (exceptions.APIException, Http404, DjangoPermissionDenied) as e:
+            return exception_response(e)
+
+    view.csrf_exempt = True
+    # Для api/shedding.py: действие определяется так же, как у синхронного ViewSet'а
+    view.cls = sync_view.cls
+    view.actions = sync_view.actions
+    return view
+
+
+async def course_list(request, user):
+    """Асинхронный CourseViewSet.list"""
+    if user.role == 'teacher':
+        queryset = Course.objects.filter(teacher=user)
+    else:
+        queryset = Course.objects.filter(groups__students=user)
+    queryset = filter_queryset(CourseFilter, request.GET, aggregates.annotate_courses(queryset))
+    if request.GET.get('format') == projections.NORMALIZED_FORMAT:
+        return render(await sync_to_async(projections.COURSE_STATS.normalize)(queryset))
+    queryset = queryset.select_related('teacher').prefetch_related('groups__students')
+    courses = [course async for course in queryset]
+    return render(CourseStatsSerializer(courses, many=True).data)
+
+
+async def course_my_grades(request, user, pk):
+    """Асинхронный CourseViewSet.my_grades"""
+    if user.role == 'teacher':
+        courses = Course.objects.filter(teacher=user)
+    else:
+        courses = Course.objects.filter(groups__students=user)
+    try:
+        course = await courses.aget(pk=pk)
+    except Course.DoesNotExist:
+        raise Http404(f"No {Course._meta.object_name} matches the given query.")
+
+    if user.role != 'student':
+        raise DjangoPermissionDenied("Только студенты могут просматривать свои оценки")
+
+    if not await Group.objects.filter(students=user, courses=course).aexists():
+        raise exceptions.ValidationError("Вы не записаны на этот курс")
+
+    live = with_related(Grade.objects.filter(lesson__course=course, student=user))
+    archived = with_related(ArchivedGrade.objects.filter(lesson__course=course, student=user))
+    grades = [grade async for grade in live] + [grade async for grade in archived]
+    return render(GradeSerializer(grades, many=True).data)
+
+
+async def lesson_list(request, user):
+    """Асинхронный LessonViewSet.list"""
+    if user.role == 'teacher':
+        queryset = Lesson.objects.filter(course__teacher=user)
+    else:
+        queryset = Lesson.objects.filter(course__groups__students=user)
+    queryset = filter_queryset(LessonFilter, request.GET, queryset)
+    if request.GET.get('format') == projections.NORMALIZED_FORMAT:
+        return render(await sync_to_async(projections.LESSON.normalize)(queryset))
+    queryset = queryset.select_related('course__teacher').prefetch_related('course__groups__students')
+    lessons = [lesson async for lesson in queryset]
+    return render(LessonSerializer(lessons, many=True).data)
+
+
+async def grade_my_grades(request, user):
+    """Асинхронный GradeViewSet.my_grades"""
+    if user.role != 'student':
+        raise DjangoPermissionDenied("Только студенты могут просматривать свои оценки")
+    live = with_related(Grade.objects.filter(student=user))
+    archived = with_related(ArchivedGrade.objects.filter(student=user))
+    grades = [grade async for grade in live] + [grade async for grade in archived]
+    return render(GradeSerializer(grades, many=True).data)
+
+
+async def user_me(request, user):
+    """Асинхронный UserViewSet.me"""
+    return render(UserSerializer(user).data)
+
+
+async def events_view(request):
+    """Поток Server-Sent Events с изменениями оценок и посещаемости пользователя"""
+    if request.method not in SAFE_METHODS:
+        return render({'error': "Метод не поддерживается"}, status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI бесконечный ответ занял бы рабочий поток навсегда
+        return render(
+            {'error': "Поток событий доступен только при развертывании через ASGI"},
+            status.HTTP_501_NOT_IMPLEMENTED
+        )
+    try:
+        user = await authenticate_stream(request)
+    except exceptions.APIException as e:
+        return exception_response(e)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return render({'error': "Last-Event-ID должен быть целым числом"}, status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(events.stream(user.pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Отключает буферизацию ответа в nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+events_view.csrf_exempt = True
+
+
+course_list_view = async_read_view(
+    course_list, CourseViewSet.as_view({'get': 'list', 'post': 'create'})
+)
+course_my_grades_view = async_read_view(
+    course_my_grades, CourseViewSet.as_view({'get': 'my_grades'})
+)
+lesson_list_view = async_read_view(
+    lesson_list, LessonViewSet.as_view({'get': 'list', 'post': 'create'})
+)
+grade_my_grades_view = async_read_view(
+    grade_my_grades, GradeViewSet.as_view({'get': 'my_grades'})
+)
+user_me_view = async_read_view(
+    user_me, UserViewSet.as_view({'get': 'me'})
+)
@@ -0,0 +1,159 @@
+"""
+Пакетное выполнение запросов к API за один HTTP-запрос.
+
+Подзапросы выполняются в том же процессе через URL resolver: для каждого
+строится WSGIRequest, а пользователь, аутентифицированный при разборе пакета,
+передается во ViewSet'ы DRF напрямую (_force_auth_user), без повторной
+проверки токена. Ответы DRF забираются из response.data без промежуточного
+рендеринга — весь пакет сериализуется один раз.
+"""
+import io
+import json
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+
+from . import shedding
+
+BATCH_MAX_REQUESTS = 20
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+BATCH_PATH_PREFIX = '/api/'
+
+# Заголовки, которые подзапрос не может переопределить
+PROTECTED_HEADERS = ('authorization', 'content-type', 'content-length', 'host')
+
+# Копируются из исходного запроса в каждый подзапрос
+INHERITED_META = (
+    'SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'SCRIPT_NAME', 'wsgi.url_scheme',
+    'HTTP_HOST', 'HTTP_AUTHORIZATION', 'HTTP_ACCEPT_LANGUAGE', 'HTTP_USER_AGENT',
+)
+
+
+class BatchError(Exception):
+    pass
+
+
+def parse_batch(data):
+    """Проверяет тело пакета; возвращает (подзапросы, atomic)"""
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        raise BatchError("Тело запроса должно содержать список requests")
+
+    items = data['requests']
+    if not items:
+        raise BatchError("Список requests пуст")
+    if len(items) > BATCH_MAX_REQUESTS:
+        raise BatchError(f"В пакете не может быть больше {BATCH_MAX_REQUESTS} запросов")
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise BatchError(f"Запрос #{index} должен быть объектом")
+        method = str(item.get('method', 'GET')).upper()
+        if method not in BATCH_METHODS:
+            raise BatchError(f"Запрос #{index}: метод должен быть одним из: {', '.join(BATCH_METHODS)}")
+        path = item.get('path')
+        if not isinstance(path, str) or not path.startswith(BATCH_PATH_PREFIX):
+            raise BatchError(f"Запрос #{index}: path должен начинаться с {BATCH_PATH_PREFIX}")
+        headers = item.get('headers', {})
+        if not isinstance(headers, dict):
+            raise BatchError(f"Запрос #{index}: headers должен быть объектом")
+        item['method'] = method
+
+    return items, bool(data.get('atomic', False))
+
+
+def build_request(parent, item):
+    url = urlsplit(item['path'])
+    body = b''
+    if item.get('body') is not None and item['method'] != 'GET':
+        body = json.dumps(item['body']).encode()
+
+    environ = {key: parent.META[key] for key in INHERITED_META if key in parent.META}
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    })
+    environ.setdefault('SCRIPT_NAME', '')
+    environ.setdefault('SERVER_NAME', 'localhost')
+    environ.setdefault('SERVER_PORT', '80')
+    environ.setdefault('wsgi.url_scheme', 'http')
+    for name, value in item.get('headers', {}).items():
+        if name.lower() not in PROTECTED_HEADERS:
+            environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+
+    request = WSGIRequest(environ)
+    # Аутентификация уже выполнена для пакета целиком
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def response_body(response):
+    if isinstance(response, Response):
+        return response.data
+    if isinstance(response, StreamingHttpResponse):
+        return {'error': "Потоковые ответы не поддерживаются в пакетном запросе"}
+    content = response.content
+    if not content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content)
+    return content.decode(response.charset or 'utf-8', errors='replace')
+
+
+def execute(parent, item):
+    """Выполняет один подзапрос и возвращает (status, body)"""
+    request = build_request(parent, item)
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return 404, {'error': f"Путь {request.path_info} не найден"}
+    if getattr(getattr(match.func, 'view_class', None), 'batch_exempt', False):
+        return 400, {'error': "Вложенные пакетные запросы не поддерживаются"}
+
+    view = match.func
+    # Подзапросы не проходят через middleware, поэтому перегрузку проверяем здесь
+    if shedding.shed_reason(request, view) is not None:
+        return 503, {'error': shedding.SHED_MESSAGE}
+    if iscoroutinefunction(view):
+        view = async_to_sync(view)
+    try:
+        response = view(request, *match.args, **match.kwargs)
+    except Exception as e:
+        return 500, {'error': str(e)}
+    return response.status_code, response_body(response)
+
+
+def run_batch(parent, items, atomic=False):
+    """
+    Выполняет подзапросы по порядку. В режиме atomic все выполняется в одной
+    транзакции: первый ответ с ошибкой откатывает пакет, а остальные
+    подзапросы не выполняются и получают статус 424
+    """
+    results = []
+    if not atomic:
+        for item in items:
+            status_code, body = execute(parent, item)
+            results.append({'status': status_code, 'body': body})
+        return results, True
+
+    committed = True
+    with transaction.atomic():
+        for item in items:
+            if not committed:
+                results.append({'status': 424, 'body': {'error': "Не выполнен: пакет отменен"}})
+                continue
+            status_code, body = execute(parent, item)
+            results.append({'status': status_code, 'body': body})
+            if status_code >= 400:
+                committed = False
+                transaction.set_rollback(True)
+    return results, committed
@@ -0,0 +1,165 @@
+"""
+Скомпилированное чтение сериализаторов для ответов со списками (many=True).
+
+При старте (ApiConfig.ready) для каждого ModelSerializer из api/serializers.py
+по объявлениям его полей генерируется плоская функция instance -> dict без
+общего механизма DRF (get_attribute, SkipField, обход _readable_fields на
+каждом объекте). Вложенные сериализаторы компилируются рекурсивно. Значения
+преобразуются так же, как в to_representation соответствующих полей, поэтому
+результат совпадает с выводом сериализатора.
+
+Сериализаторы с Meta.list_serializer_class = CompiledListSerializer используют
+скомпилированную функцию при many=True. Поля, которые нельзя скомпилировать
+(методы, source с точками, связанные поля вроде PrimaryKeyRelatedField),
+оставляют сериализатор на стандартном пути DRF. Компиляция опирается на
+объявления полей класса: сериализатор, меняющий поля в __init__, не должен
+подключать CompiledListSerializer.
+"""
+import inspect
+import logging
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+_compiled = {}
+_in_progress = set()
+
+
+class CompileError(Exception):
+    pass
+
+
+def compiled_for(serializer_class):
+    return _compiled.get(serializer_class)
+
+
+def _model_attribute(model, field, relation):
+    """Имя атрибута модели для поля сериализатора или CompileError"""
+    if len(field.source_attrs) != 1:
+        raise CompileError(f"{field.field_name}: составной source '{field.source}'")
+    name = field.source_attrs[0]
+    if name == 'pk':
+        return name
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise CompileError(f"{field.field_name}: '{name}' не является полем модели {model.__name__}")
+    if bool(model_field.is_relation) != relation:
+        raise CompileError(f"{field.field_name}: поле '{name}' не поддерживается")
+    if model_field.auto_created and not model_field.concrete and model_field.get_accessor_name() != name:
+        raise CompileError(f"{field.field_name}: обратная связь '{name}' доступна под другим именем")
+    return name
+
+
+def _value_expression(field, namespace, index):
+    """Выражение для преобразования value, как в field.to_representation"""
+    if type(field) is serializers.CharField or type(field) is serializers.EmailField:
+        return 'str(value)'
+    if type(field) is serializers.IntegerField:
+        return 'int(value)'
+    if type(field) is serializers.BigIntegerField:
+        # COERCE_BIGINT_TO_STRING читается при компиляции, а не на каждом значении
+        return 'str(value)' if getattr(field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING) else 'int(value)'
+    if type(field) is serializers.ReadOnlyField:
+        return 'value'
+    if (
+        isinstance(field, (serializers.RelatedField, serializers.SerializerMethodField))
+        or type(field).get_attribute is not serializers.Field.get_attribute
+    ):
+        raise CompileError(f"{field.field_name}: {type(field).__name__} не поддерживается")
+    namespace[f'convert_{index}'] = field.to_representation
+    if type(field) is serializers.ChoiceField:
+        # Непустые строки из базы — без проверок на Enum и пустое значение
+        namespace[f'choices_{index}'] = field.choice_strings_to_values
+        return f"choices_{index}.get(value, value) if type(value) is str and value else convert_{index}(value)"
+    return f'convert_{index}(value)'
+
+
+def compile_serializer(serializer_class):
+    """Возвращает функцию instance -> dict для serializer_class или выбрасывает CompileError"""
+    if serializer_class in _compiled:
+        return _compiled[serializer_class]
+    if serializer_class in _in_progress:
+        raise CompileError(f"{serializer_class.__name__}: циклическая вложенность")
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        raise CompileError(f"{serializer_class.__name__}: не ModelSerializer")
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        raise CompileError(f"{serializer_class.__name__}: переопределен to_representation")
+
+    _in_progress.add(serializer_class)
+    try:
+        model = serializer_class.Meta.model
+        namespace = {'ObjectDoesNotExist': ObjectDoesNotExist}
+        lines = ['def represent(instance):', '    ret = {}']
+        for index, (name, field) in enumerate(serializer_class().fields.items()):
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                attribute = _model_attribute(model, field, relation=True)
+                namespace[f'child_{index}'] = compile_serializer(type(field.child))
+                if isinstance(model._meta.get_field(attribute), models.ManyToManyField):
+                    # Результат prefetch_related('<поле>') берется без создания менеджера
+                    lines += [
+                        "    prefetched = instance.__dict__.get('_prefetched_objects_cache')",
+                        f'    if prefetched is not None and {attribute!r} in prefetched:',
+                        f'        items = prefetched[{attribute!r}]',
+                        '    else:',
+                        f'        items = instance.{attribute}.all()',
+                    ]
+                else:
+                    lines.append(f'    items = instance.{attribute}.all()')
+                lines.append(f'    ret[{name!r}] = [child_{index}(item) for item in items]')
+            elif isinstance(field, serializers.BaseSerializer):
+                attribute = _model_attribute(model, field, relation=True)
+                namespace[f'child_{index}'] = compile_serializer(type(field))
+                lines += [
+                    '    try:',
+                    f'        value = instance.{attribute}',
+                    '    except ObjectDoesNotExist:',
+                    '        value = None',
+                    f'    ret[{name!r}] = None if value is None else child_{index}(value)',
+                ]
+            else:
+                attribute = _model_attribute(model, field, relation=False)
+                expression = _value_expression(field, namespace, index)
+                lines += [
+                    f'    value = instance.{attribute}',
+                    f'    ret[{name!r}] = None if value is None else {expression}',
+                ]
+        lines.append('    return ret')
+        exec(compile('\n'.join(lines), f'<compiled {serializer_class.__name__}>', 'exec'), namespace)
+    finally:
+        _in_progress.discard(serializer_class)
+
+    _compiled[serializer_class] = namespace['represent']
+    return namespace['represent']
+
+
+def compile_module(module):
+    """Компилирует все ModelSerializer модуля; возвращает имена скомпилированных"""
+    compiled = []
+    for name, candidate in inspect.getmembers(module, inspect.isclass):
+        if (
+            candidate.__module__ != module.__name__
+            or not issubclass(candidate, serializers.ModelSerializer)
+        ):
+            continue
+        try:
+            compile_serializer(candidate)
+            compiled.append(name)
+        except CompileError as e:
+            logger.debug("Сериализатор %s остается на стандартном пути: %s", name, e)
+    return compiled
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        represent = _compiled.get(type(self.child))
+        if represent is None:
+            return super().to_representation(data)
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return [represent(item) for item in iterable]
@@ -0,0 +1,128 @@
+"""
+Сводки для главных экранов студента и преподавателя.
+
+Каждая сводка собирается фиксированным числом запросов: показатели по курсам
+считаются коррелированными подзапросами в одном SELECT по курсам, поэтому
+число запросов не зависит от количества курсов, занятий и оценок. Считаются
+рабочие таблицы, то есть неархивированные семестры.
+"""
+from django.db.models import Avg, DateTimeField, Exists, F, Min, OuterRef
+from django.utils import timezone
+
+from .aggregates import attendance_rate_expression, count_per_row, per_row
+from .models import Course, Group, Lesson, Grade, Attendance
+
+DASHBOARD_UPCOMING_LIMIT = 10
+DASHBOARD_RECENT_GRADES_LIMIT = 10
+
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email', 'role')
+
+
+def _round(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+def _profile(user):
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+
+def _upcoming_lessons(lessons, now):
+    return list(
+        lessons.filter(date__gte=now)
+        .order_by('date', 'id')
+        .annotate(course_name=F('course__name'))
+        .values('id', 'topic', 'date', 'course_id', 'course_name')[:DASHBOARD_UPCOMING_LIMIT]
+    )
+
+
+def student_dashboard(student):
+    """Курсы со средним баллом и посещаемостью, ближайшие занятия и последние оценки"""
+    now = timezone.now()
+    grades = Grade.objects.filter(student=student)
+    attendance = Attendance.objects.filter(student=student)
+
+    courses = (
+        Course.objects.filter(groups__students=student)
+        .annotate(
+            teacher_first_name=F('teacher__first_name'),
+            teacher_last_name=F('teacher__last_name'),
+            average_grade=per_row(grades, 'lesson__course', Avg('value')),
+            grade_count=count_per_row(grades, 'lesson__course'),
+            attendance_rate=per_row(attendance, 'lesson__course', attendance_rate_expression()),
+        )
+        .order_by('-year', 'name', 'id')
+        .values(
+            'id', 'name', 'semester', 'year', 'teacher_id', 'teacher_first_name', 'teacher_last_name',
+            'average_grade', 'grade_count', 'attendance_rate',
+        )
+    )
+
+    recent_grades = (
+        grades.order_by('-lesson__date', '-id')
+        .annotate(
+            lesson_topic=F('lesson__topic'),
+            lesson_date=F('lesson__date'),
+            course_id=F('lesson__course_id'),
+            course_name=F('lesson__course__name'),
+        )
+        .values('id', 'value', 'comment', 'lesson_id', 'lesson_topic', 'lesson_date', 'course_id', 'course_name')
+    )[:DASHBOARD_RECENT_GRADES_LIMIT]
+
+    course_list = list(courses)
+    for course in course_list:
+        course['average_grade'] = _round(course['average_grade'])
+        course['attendance_rate'] = _round(course['attendance_rate'], 4)
+
+    return {
+        'user': _profile(student),
+        'courses': course_list,
+        'upcoming_lessons': _upcoming_lessons(Lesson.objects.filter(course__groups__students=student), now),
+        'recent_grades': list(recent_grades),
+    }
+
+
+def teacher_dashboard(teacher, courses=None):
+    """
+    Показатели по каждому курсу преподавателя и ближайшие занятия.
+    courses — уже отфильтрованный queryset курсов (по умолчанию все курсы преподавателя)
+    """
+    now = timezone.now()
+    if courses is None:
+        courses = teacher.taught_courses.all()
+
+    lessons = Lesson.objects.all()
+    upcoming = lessons.filter(date__gte=now)
+    # Прошедшие занятия, по которым не выставлено ни одной оценки
+    ungraded = lessons.filter(date__lt=now).filter(
+        ~Exists(Grade.objects.filter(lesson=OuterRef('pk')))
+    )
+    enrolled = Group.students.through.objects.all()
+
+    courses = (
+        courses
+        .annotate(
+            student_count=count_per_row(enrolled, 'group__courses', 'user', distinct=True),
+            lesson_count=count_per_row(lessons, 'course'),
+            upcoming_lesson_count=count_per_row(upcoming, 'course'),
+            next_lesson_date=per_row(upcoming, 'course', Min('date'), output_field=DateTimeField()),
+            ungraded_lesson_count=count_per_row(ungraded, 'course'),
+            average_grade=per_row(Grade.objects.all(), 'lesson__course', Avg('value')),
+            attendance_rate=per_row(Attendance.objects.all(), 'lesson__course', attendance_rate_expression()),
+        )
+        .order_by('-year', 'name', 'id')
+        .values(
+            'id', 'name', 'semester', 'year', 'student_count', 'lesson_count', 'upcoming_lesson_count',
+            'next_lesson_date', 'ungraded_lesson_count', 'average_grade', 'attendance_rate',
+        )
+    )
+
+    course_list = list(courses)
+    for course in course_list:
+        course['average_grade'] = _round(course['average_grade'])
+        course['attendance_rate'] = _round(course['attendance_rate'], 4)
+
+    return {
+        'user': _profile(teacher),
+        'courses': course_list,
+        'upcoming_lessons': _upcoming_lessons(Lesson.objects.filter(course__teacher=teacher), now),
+    }
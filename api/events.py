@@ -0,0 +1,256 @@
+"""
+События изменения оценок и посещаемости для потока Server-Sent Events.
+
+Сохранение Grade/Attendance записывает ChangeEvent сигналом post_save; API
+выполняет запись в транзакции (ChangeEventMixin), поэтому оценка и событие
+коммитятся вместе. После коммита событие рассылается подписчикам своего процесса через
+in-process pub/sub (Broker). События из других воркеров приходят через
+опрос таблицы ChangeEvent: один запрос на процесс раз в EVENT_POLL_SECONDS,
+сколько бы соединений ни было открыто. Клиент, переподключившийся с
+Last-Event-ID, получает пропущенные события из той же таблицы.
+
+Удаление обрабатывается во ViewSet'ах (record_deleted), а не сигналом
+post_delete: подписка на удаление отключила бы быстрое каскадное удаление
+при архивации семестров.
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+from collections import deque
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Attendance, ChangeEvent, Grade
+
+logger = logging.getLogger(__name__)
+
+EVENT_POLL_SECONDS = 2
+EVENT_KEEPALIVE_SECONDS = 15
+EVENT_TTL_HOURS = 24
+# Сколько событий досылается по Last-Event-ID и забирается за один опрос
+EVENT_BATCH_LIMIT = 500
+# Опрос перечитывает последние id: события с меньшим id могут закоммититься позже
+POLL_OVERLAP = 100
+PURGE_PROBABILITY = 0.01
+
+
+def grade_payload(grade):
+    return {'id': grade.pk, 'lesson_id': grade.lesson_id, 'value': grade.value, 'comment': grade.comment}
+
+
+def attendance_payload(attendance):
+    return {'id': attendance.pk, 'lesson_id': attendance.lesson_id, 'is_present': attendance.is_present}
+
+
+def as_message(event):
+    return {
+        'id': event.pk,
+        'user_id': event.user_id,
+        'event': f'{event.kind}.{event.action}',
+        'data': event.payload,
+    }
+
+
+def format_sse(message):
+    data = json.dumps(message['data'], cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {data}\n\n"
+
+
+class Broker:
+    """Подписчики текущего процесса: user_id -> {(event loop, очередь)}"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._poller = None
+        self.last_id = None
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        self._ensure_poller()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, message):
+        """Потокобезопасно: вызывается из on_commit в рабочих потоках"""
+        with self._lock:
+            targets = list(self._subscribers.get(message['user_id'], ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # Цикл событий уже закрыт, подписчик отключился
+                pass
+
+    def _ensure_poller(self):
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = loop.create_task(self._poll())
+
+    async def _poll(self):
+        while self.has_subscribers():
+            # Ошибка базы не должна останавливать опрос: без него потоки не
+            # получат событий из других воркеров до перезапуска процесса
+            try:
+                if self.last_id is None:
+                    self.last_id = await sync_to_async(latest_event_id)()
+                else:
+                    for message in await sync_to_async(events_after)(self.last_id - POLL_OVERLAP):
+                        self.publish(message)
+                        self.last_id = max(self.last_id, message['id'])
+            except Exception:
+                logger.exception("Ошибка опроса таблицы событий")
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+
+broker = Broker()
+
+
+def latest_event_id():
+    return ChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def events_after(event_id, user_id=None):
+    events = ChangeEvent.objects.filter(id__gt=event_id)
+    if user_id is not None:
+        events = events.filter(user_id=user_id)
+    return [as_message(event) for event in events.order_by('id')[:EVENT_BATCH_LIMIT]]
+
+
+def purge_expired():
+    ChangeEvent.objects.filter(created_at__lt=timezone.now() - timedelta(hours=EVENT_TTL_HOURS)).delete()
+
+
+def record(kind, action, student_id, object_id, payload):
+    event = ChangeEvent.objects.create(
+        user_id=student_id, kind=kind, action=action, object_id=object_id, payload=payload
+    )
+    transaction.on_commit(lambda: broker.publish(as_message(event)))
+    # Очистка после коммита, чтобы не удерживать блокировки транзакции записи
+    if random.random() < PURGE_PROBABILITY:
+        transaction.on_commit(purge_expired)
+    return event
+
+
+def record_deleted(instance):
+    """Вызывается ViewSet'ами перед удалением оценки или отметки посещаемости"""
+    kind = 'grade' if isinstance(instance, Grade) else 'attendance'
+    record(kind, 'deleted', instance.student_id, instance.pk, {'id': instance.pk, 'lesson_id': instance.lesson_id})
+
+
+def record_deleted_queryset(queryset):
+    """События удаления для всех оценок или отметок queryset: один SELECT и один bulk_create"""
+    kind = 'grade' if queryset.model is Grade else 'attendance'
+    created = ChangeEvent.objects.bulk_create([
+        ChangeEvent(
+            user_id=student_id, kind=kind, action='deleted', object_id=pk,
+            payload={'id': pk, 'lesson_id': lesson_id},
+        )
+        for pk, student_id, lesson_id in queryset.values_list('pk', 'student_id', 'lesson_id')
+    ])
+    # Без RETURNING у bulk_create событие без id дойдет до подписчиков через опрос таблицы
+    messages = [as_message(event) for event in created if event.pk is not None]
+    transaction.on_commit(lambda: [broker.publish(message) for message in messages])
+    return created
+
+
+class ChangeEventMixin:
+    """
+    Примесь для ViewSet'ов оценок и посещаемости: запись строки и ее событие
+    выполняются в одной транзакции, без нее в autocommit событие для уже
+    закоммиченной оценки могло бы потеряться
+    """
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_deleted(instance)
+            super().perform_destroy(instance)
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record('grade', 'saved', instance.student_id, instance.pk, grade_payload(instance))
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record('attendance', 'saved', instance.student_id, instance.pk, attendance_payload(instance))
+
+
+class SentIds:
+    """Последние отправленные id: событие может прийти и из pub/sub, и из опроса"""
+
+    def __init__(self, size=1000):
+        self._order = deque()
+        self._ids = set()
+        self._size = size
+
+    def add(self, event_id):
+        if event_id in self._ids:
+            return False
+        self._ids.add(event_id)
+        self._order.append(event_id)
+        if len(self._order) > self._size:
+            self._ids.discard(self._order.popleft())
+        return True
+
+
+async def stream(user_id, last_event_id=None):
+    """
+    Асинхронный генератор SSE-сообщений для пользователя.
+
+    Опрос таблицы повторно рассылает последние POLL_OVERLAP событий, поэтому
+    поток отбрасывает события не новее отметки подписки: последнего события на
+    момент подключения или досланного по Last-Event-ID
+    """
+    queue = broker.subscribe(user_id)
+    sent = SentIds()
+    try:
+        yield 'retry: 3000\n\n'
+        if last_event_id is None:
+            high_water = await sync_to_async(latest_event_id)()
+        else:
+            high_water = last_event_id
+            for message in await sync_to_async(events_after)(last_event_id, user_id):
+                high_water = max(high_water, message['id'])
+                sent.add(message['id'])
+                yield format_sse(message)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message['id'] > high_water and sent.add(message['id']):
+                yield format_sse(message)
+    finally:
+        broker.unsubscribe(user_id, queue)
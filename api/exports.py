@@ -0,0 +1,181 @@
+import csv
+import io
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
+
+from .models import Attendance, Grade
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_INCLUDES = ('grades', 'attendance')
+
+# Размер порции, которую курсор отдает за один запрос к БД
+EXPORT_CHUNK_SIZE = 2000
+
+# Каталог в хранилище файлов (MEDIA_ROOT), куда фоновая задача сохраняет выгрузки
+EXPORT_STORAGE_DIR = 'exports'
+
+EXPORT_HEADER = [
+    'record', 'lesson_id', 'lesson_date', 'lesson_topic',
+    'student_id', 'username', 'last_name', 'first_name',
+    'value', 'comment', 'is_present',
+]
+
+GRADE_COLUMNS = (
+    'lesson_id', 'lesson__date', 'lesson__topic',
+    'student_id', 'student__username', 'student__last_name', 'student__first_name',
+    'value', 'comment',
+)
+
+ATTENDANCE_COLUMNS = (
+    'lesson_id', 'lesson__date', 'lesson__topic',
+    'student_id', 'student__username', 'student__last_name', 'student__first_name',
+    'is_present',
+)
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def grade_rows(course):
+    """Строки оценок курса без создания моделей и вложенных сериализаторов"""
+    queryset = (
+        Grade.objects
+        .filter(lesson__course=course)
+        .order_by('lesson__date', 'lesson_id', 'student_id')
+        .values_list(*GRADE_COLUMNS)
+    )
+    for lesson_id, date, topic, student_id, username, last_name, first_name, value, comment in \
+            queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            'grade', lesson_id, date.isoformat(), topic,
+            student_id, username, last_name, first_name,
+            value, comment or '', '',
+        ]
+
+
+def attendance_rows(course):
+    """Строки посещаемости курса без создания моделей и вложенных сериализаторов"""
+    queryset = (
+        Attendance.objects
+        .filter(lesson__course=course)
+        .order_by('lesson__date', 'lesson_id', 'student_id')
+        .values_list(*ATTENDANCE_COLUMNS)
+    )
+    for lesson_id, date, topic, student_id, username, last_name, first_name, is_present in \
+            queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            'attendance', lesson_id, date.isoformat(), topic,
+            student_id, username, last_name, first_name,
+            '', '', int(is_present),
+        ]
+
+
+ROW_SOURCES = {
+    'grades': grade_rows,
+    'attendance': attendance_rows,
+}
+
+
+def parse_include(value):
+    """Разбирает параметр include; возвращает None, если он некорректен"""
+    if not value:
+        return list(EXPORT_INCLUDES)
+    include = [part.strip() for part in value.split(',') if part.strip()]
+    if not include or any(part not in EXPORT_INCLUDES for part in include):
+        return None
+    # Убираем дубликаты, сохраняя порядок
+    return list(dict.fromkeys(include))
+
+
+def stream_csv(course, include):
+    """Потоковая выгрузка CSV: строки пишутся по одной прямо из курсора"""
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(EXPORT_HEADER)
+        for part in include:
+            for row in ROW_SOURCES[part](course):
+                yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(course, "csv")}"'
+    return response
+
+
+def export_filename(course, export_format):
+    return f'course-{course.id}-export.{export_format}'
+
+
+def write_csv(course, include, output, progress=None):
+    """Пишет CSV в бинарный файл output; progress(part) вызывается после каждой части"""
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_HEADER)
+    for part in include:
+        writer.writerows(ROW_SOURCES[part](course))
+        if progress is not None:
+            progress(part)
+    text.flush()
+    text.detach()
+
+
+def write_xlsx(course, include, output, progress=None):
+    """XLSX в режиме write_only: openpyxl сбрасывает строки на диск, а не держит их в памяти"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for part in include:
+        sheet = workbook.create_sheet(title=part)
+        sheet.append(EXPORT_HEADER)
+        for row in ROW_SOURCES[part](course):
+            sheet.append(row)
+        if progress is not None:
+            progress(part)
+    workbook.save(output)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+}
+
+
+def build_xlsx(course, include):
+    """Готовый файл XLSX отдается порциями через FileResponse"""
+    output = tempfile.TemporaryFile()
+    write_xlsx(course, include, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=export_filename(course, 'xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def save_export(course, include, export_format, name, progress=None):
+    """
+    Строит выгрузку во временном файле и сохраняет ее в default_storage.
+    Возвращает (имя файла в хранилище, размер в байтах)
+    """
+    with tempfile.TemporaryFile() as output:
+        WRITERS[export_format](course, include, output, progress)
+        size = output.seek(0, io.SEEK_END)
+        output.seek(0)
+        stored = default_storage.save(f'{EXPORT_STORAGE_DIR}/{name}', File(output))
+    return stored, size
+
+
+def xlsx_available():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
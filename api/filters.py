@@ -0,0 +1,70 @@
+"""
+FilterSet'ы списочных эндпоинтов.
+
+Связи фильтруются по идентификатору (NumberFilter по *_id), а не через
+ModelChoiceFilter: так фильтр не делает лишний запрос на проверку объекта и
+применим к архивным таблицам с теми же именами полей. Под каждое сочетание
+фильтров есть индекс (см. Meta.indexes моделей).
+"""
+import django_filters
+from django_filters.utils import translate_validation
+
+from .models import User, Course, Lesson, Grade, Attendance
+
+
+class UserFilter(django_filters.FilterSet):
+    role = django_filters.ChoiceFilter(choices=User.ROLE_CHOICES)
+    group = django_filters.NumberFilter(field_name='student_groups__id')
+
+    class Meta:
+        model = User
+        fields = ['role', 'group']
+
+
+class CourseFilter(django_filters.FilterSet):
+    class Meta:
+        model = Course
+        fields = ['year', 'semester']
+
+
+class LessonFilter(django_filters.FilterSet):
+    course = django_filters.NumberFilter(field_name='course_id')
+    # ?date_after=...&date_before=... (ISO 8601)
+    date = django_filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = Lesson
+        fields = ['course', 'date']
+
+
+class GradeFilter(django_filters.FilterSet):
+    course = django_filters.NumberFilter(field_name='lesson__course_id')
+    lesson = django_filters.NumberFilter(field_name='lesson_id')
+    student = django_filters.NumberFilter(field_name='student_id')
+    # ?value_min=...&value_max=...
+    value = django_filters.RangeFilter()
+    # Дата занятия: ?date_after=...&date_before=...
+    date = django_filters.IsoDateTimeFromToRangeFilter(field_name='lesson__date')
+
+    class Meta:
+        model = Grade
+        fields = ['course', 'lesson', 'student', 'value', 'date']
+
+
+class AttendanceFilter(django_filters.FilterSet):
+    course = django_filters.NumberFilter(field_name='lesson__course_id')
+    lesson = django_filters.NumberFilter(field_name='lesson_id')
+    student = django_filters.NumberFilter(field_name='student_id')
+    is_present = django_filters.BooleanFilter()
+
+    class Meta:
+        model = Attendance
+        fields = ['course', 'lesson', 'student', 'is_present']
+
+
+def filter_queryset(filterset_class, params, queryset):
+    """Применяет FilterSet вне DjangoFilterBackend с той же ошибкой 400 на неверные значения"""
+    filterset = filterset_class(params, queryset=queryset)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return filterset.qs
@@ -0,0 +1,162 @@
+"""
+Поддержка заголовка Idempotency-Key для запросов записи.
+
+Первый запрос с ключом резервирует запись IdempotencyKey и выполняется как
+обычно, ответ сохраняется. Повтор с тем же ключом получает сохраненный ответ
+без повторной валидации и вставок (с заголовком Idempotent-Replayed), повтор
+во время выполнения — 409, а тот же ключ с другим запросом — 422. Ответы 5xx
+не сохраняются, чтобы клиент мог повторить запрос. Ключи живут
+IDEMPOTENCY_KEY_TTL_HOURS часов; устаревшие строки удаляются при записи новых.
+"""
+import hashlib
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Доля сохранений, после которых удаляются устаревшие ключи
+PURGE_PROBABILITY = 0.01
+
+
+class IdempotencyError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Replay(Exception):
+    """Для запроса уже есть сохраненный ответ"""
+
+    def __init__(self, record):
+        super().__init__(record.key)
+        self.record = record
+
+
+def _expires_before():
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def request_hash(request):
+    """Хэш метода, пути и тела; тело читается до разбора запроса DRF"""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(request._request.body)
+    return digest.hexdigest()
+
+
+def begin(request, key, fingerprint):
+    """
+    Резервирует ключ для запроса. Возвращает новую запись либо выбрасывает
+    Replay (ответ уже сохранен) или IdempotencyError
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(
+            f"{IDEMPOTENCY_HEADER} не может быть длиннее {MAX_KEY_LENGTH} символов",
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    lookup = {'user': request.user, 'key': key}
+    record = IdempotencyKey.objects.filter(**lookup).first()
+    if record is not None and record.created_at < _expires_before():
+        # Устаревший ключ: выполняем запрос заново
+        record.delete()
+        record = None
+
+    if record is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    **lookup, method=request.method, path=request.path, request_hash=fingerprint
+                )
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел зарезервировать его первым
+            record = IdempotencyKey.objects.filter(**lookup).first()
+            if record is None:
+                raise IdempotencyError(
+                    f"Запрос с этим {IDEMPOTENCY_HEADER} еще выполняется",
+                    status.HTTP_409_CONFLICT
+                )
+
+    if record.request_hash != fingerprint:
+        raise IdempotencyError(
+            f"{IDEMPOTENCY_HEADER} уже использован с другим запросом",
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record.status_code is None:
+        raise IdempotencyError(
+            f"Запрос с этим {IDEMPOTENCY_HEADER} еще выполняется",
+            status.HTTP_409_CONFLICT
+        )
+    raise Replay(record)
+
+
+def complete(record, response):
+    if response.status_code >= 500 or not isinstance(response, Response):
+        release(record)
+        return
+    record.status_code = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=['status_code', 'response_body'])
+
+    if random.random() < PURGE_PROBABILITY:
+        IdempotencyKey.objects.filter(created_at__lt=_expires_before()).delete()
+
+
+def release(record):
+    """Освобождает ключ, чтобы запрос можно было выполнить повторно"""
+    record.delete()
+
+
+class IdempotencyMixin:
+    """
+    Примесь для ViewSet'ов: действия из idempotent_actions принимают
+    заголовок Idempotency-Key
+    """
+    idempotent_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        self._idempotency_record = None
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        fingerprint = None
+        if key and self.action in self.idempotent_actions:
+            fingerprint = request_hash(request)
+        super().initial(request, *args, **kwargs)
+        if fingerprint is not None:
+            self._idempotency_record = begin(request, key, fingerprint)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Replay):
+            return Response(
+                exc.record.response_body,
+                status=exc.record.status_code,
+                headers={REPLAYED_HEADER: 'true'}
+            )
+        if isinstance(exc, IdempotencyError):
+            return Response({'error': str(exc)}, status=exc.status_code)
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            record = getattr(self, '_idempotency_record', None)
+            if record is not None:
+                release(record)
+                self._idempotency_record = None
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        record = getattr(self, '_idempotency_record', None)
+        if record is not None:
+            complete(record, response)
+            self._idempotency_record = None
+        return response
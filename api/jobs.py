@@ -0,0 +1,193 @@
+"""
+Фоновые задачи на таблице Job без внешнего брокера.
+
+Запрос кладет задачу в очередь (enqueue) и сразу отвечает 202 со ссылкой на
+/api/jobs/{id}/; задачи выполняет отдельный процесс ``manage.py
+run_gradar_worker`` с пулом потоков. Воркер забирает задачу условным UPDATE
+(status=queued -> running), поэтому несколько воркеров не возьмут одну задачу.
+Упавшая задача повторяется с экспоненциальной задержкой до max_attempts раз,
+а задача зависшего воркера возвращается в очередь через JOB_LOCK_TIMEOUT.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import events, exports, sync
+from .archive import ARCHIVE_BATCH_SIZE, archive_semester
+from .models import Course, Lesson, Grade, Attendance, Job
+
+logger = logging.getLogger(__name__)
+
+# Через сколько секунд задача в статусе running считается брошенной
+JOB_LOCK_TIMEOUT = 30 * 60
+# Задержка перед повтором: JOB_RETRY_DELAY * 2 ** (попытка - 1) секунд
+JOB_RETRY_DELAY = 10
+# Сколько кандидатов рассматривает воркер за одну попытку захвата
+CLAIM_CANDIDATES = 10
+
+_handlers = {}
+
+
+class JobError(Exception):
+    pass
+
+
+def register(kind):
+    """Декоратор обработчика задачи: handler(job, **payload) -> result"""
+    def decorator(handler):
+        _handlers[kind] = handler
+        return handler
+    return decorator
+
+
+def registered_kinds():
+    return sorted(_handlers)
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=3, delay=0):
+    if kind not in _handlers:
+        raise JobError(f"Неизвестный тип задачи: {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user,
+        max_attempts=max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def report_progress(job, done, total, message=''):
+    """Обновляет прогресс задачи одним UPDATE, не трогая остальные поля"""
+    progress = 100 if not total else min(100, int(done * 100 / total))
+    job.progress = progress
+    job.progress_message = message[:200]
+    Job.objects.filter(pk=job.pk).update(progress=progress, progress_message=job.progress_message)
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, которые перестали отвечать"""
+    stale_before = timezone.now() - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=stale_before).update(
+        status=Job.STATUS_QUEUED, locked_by='', locked_at=None
+    )
+
+
+def claim(worker_id, kinds=None):
+    """Захватывает следующую готовую задачу; возвращает Job или None"""
+    now = timezone.now()
+    candidates = Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=now)
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+    for job_id in candidates.order_by('run_after', 'id').values_list('id', flat=True)[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING, locked_by=worker_id, locked_at=now
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run(job):
+    """Выполняет захваченную задачу и записывает результат или ошибку"""
+    handler = _handlers.get(job.kind)
+    job.attempts += 1
+    try:
+        if handler is None:
+            raise JobError(f"Неизвестный тип задачи: {job.kind}")
+        result = handler(job, **job.payload)
+    except Exception:
+        logger.exception("Задача %s #%s завершилась ошибкой", job.kind, job.pk)
+        fields = {'attempts': job.attempts, 'locked_by': '', 'locked_at': None, 'error': traceback.format_exc()}
+        if handler is not None and job.attempts < job.max_attempts:
+            delay = JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            fields.update(status=Job.STATUS_QUEUED, run_after=timezone.now() + timedelta(seconds=delay))
+        else:
+            fields.update(status=Job.STATUS_FAILED, finished_at=timezone.now())
+        Job.objects.filter(pk=job.pk).update(**fields)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_SUCCEEDED,
+        attempts=job.attempts,
+        progress=100,
+        result=result,
+        error='',
+        locked_by='',
+        locked_at=None,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def work_once(worker_id, kinds=None):
+    """Берет и выполняет одну задачу; возвращает False, если очередь пуста"""
+    close_old_connections()
+    try:
+        job = claim(worker_id, kinds)
+        if job is None:
+            return False
+        run(job)
+        return True
+    finally:
+        close_old_connections()
+
+
+# Обработчики задач Gradar
+
+@register('archive_semester')
+def archive_semester_job(job, year, semester, batch_size=None):
+    # Архивация идет одной транзакцией, поэтому промежуточный прогресс не виден
+    return archive_semester(year, semester, batch_size=batch_size or ARCHIVE_BATCH_SIZE)
+
+
+@register('delete_course')
+def delete_course_job(job, course_id):
+    """
+    Каскадное удаление курса: оценки и посещаемость удаляются по занятиям.
+    Каждое занятие удаляется в своей транзакции вместе с событиями удаления для
+    SSE и записью для синхронизации, поэтому клиенты узнают и о частичном удалении
+    """
+    lesson_ids = list(Lesson.objects.filter(course_id=course_id).values_list('id', flat=True))
+    for done, lesson_id in enumerate(lesson_ids, start=1):
+        with transaction.atomic():
+            grades = Grade.objects.filter(lesson_id=lesson_id)
+            attendance = Attendance.objects.filter(lesson_id=lesson_id)
+            lesson = Lesson.objects.filter(id=lesson_id)
+            events.record_deleted_queryset(grades)
+            events.record_deleted_queryset(attendance)
+            sync.record_deleted_queryset(lesson)
+            grades.delete()
+            attendance.delete()
+            lesson.delete()
+        report_progress(job, done, len(lesson_ids) + 1, f"Удалено занятий: {done}")
+    with transaction.atomic():
+        course = Course.objects.filter(id=course_id)
+        sync.record_deleted_queryset(course)
+        deleted, _ = course.delete()
+    return {'course_id': course_id, 'lessons': len(lesson_ids), 'deleted': bool(deleted)}
+
+
+@register('export_course')
+def export_course_job(job, course_id, export_format='csv', include=None):
+    """Выгрузка ведомости в файл хранилища; скачать его можно через /api/jobs/{id}/download/"""
+    course = Course.objects.get(id=course_id)
+    include = include or list(exports.EXPORT_INCLUDES)
+    done = []
+
+    def progress(part):
+        done.append(part)
+        report_progress(job, len(done), len(include) + 1, f"Выгружено: {', '.join(done)}")
+
+    filename = exports.export_filename(course, export_format)
+    stored, size = exports.save_export(course, include, export_format, f'job-{job.pk}-{filename}', progress)
+    return {
+        'course_id': course_id,
+        'format': export_format,
+        'include': include,
+        'file': stored,
+        'filename': filename,
+        'size': size,
+    }
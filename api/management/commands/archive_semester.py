@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import ARCHIVE_BATCH_SIZE, archive_semester, has_upcoming_lessons
+from api.jobs import enqueue
+from api.models import VALID_SEMESTER_VALUES
+
+
+class Command(BaseCommand):
+    help = 'Переносит занятия, оценки и посещаемость закрытого семестра в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True, help='Учебный год курсов')
+        parser.add_argument('--semester', choices=VALID_SEMESTER_VALUES, required=True)
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Архивировать, даже если в семестре есть предстоящие занятия',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Поставить задачу в очередь run_gradar_worker вместо выполнения',
+        )
+
+    def handle(self, *args, **options):
+        year, semester = options['year'], options['semester']
+        if not options['force'] and has_upcoming_lessons(year, semester):
+            raise CommandError(
+                f"Семестр {semester} {year} не закрыт: есть предстоящие занятия (используйте --force)"
+            )
+
+        if options['enqueue']:
+            job = enqueue('archive_semester', {
+                'year': year, 'semester': semester, 'batch_size': options['batch_size'],
+            })
+            self.stdout.write(self.style.SUCCESS(f"Задача поставлена в очередь: #{job.pk}"))
+            return
+
+        counts = archive_semester(year, semester, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено в архив: занятий {counts['lessons']}, "
+            f"оценок {counts['grades']}, отметок посещаемости {counts['attendance']}"
+        ))
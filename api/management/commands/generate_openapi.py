@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gradar.schema import generate_schema
+
+
+class Command(BaseCommand):
+    help = 'Генерирует OpenAPI-схему в файл, который затем отдается по /openapi.json'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Путь к файлу схемы (по умолчанию settings.OPENAPI_SCHEMA_PATH)',
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options['output']) if options['output'] else settings.OPENAPI_SCHEMA_PATH
+        content = generate_schema()
+
+        # Файл перезаписывается только при изменении схемы, чтобы не сбивать кэш сборки
+        if output.exists() and output.read_bytes() == content:
+            self.stdout.write(f'Схема не изменилась: {output}')
+            return
+
+        output.write_bytes(content)
+        self.stdout.write(self.style.SUCCESS(f'Схема записана в {output}'))
@@ -0,0 +1,53 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи Gradar из таблицы Job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='потоков в пуле')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='пауза при пустой очереди, сек')
+        parser.add_argument('--kinds', nargs='*', choices=jobs.registered_kinds(), help='типы задач')
+        parser.add_argument('--once', action='store_true', help='выполнить готовые задачи и выйти')
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        concurrency = options['concurrency']
+        self.stdout.write(f"Воркер {worker_id}: потоков {concurrency}")
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            loops = [
+                pool.submit(self.loop, f'{worker_id}:{n}', options)
+                for n in range(concurrency)
+            ]
+            processed = sum(loop.result() for loop in loops)
+
+        self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {processed}"))
+
+    def loop(self, worker_id, options):
+        processed = 0
+        last_requeue = 0
+        while not self.stop.is_set():
+            if time.monotonic() - last_requeue > jobs.JOB_LOCK_TIMEOUT / 10:
+                jobs.requeue_stale()
+                last_requeue = time.monotonic()
+            if jobs.work_once(worker_id, options['kinds']):
+                processed += 1
+            elif options['once']:
+                break
+            else:
+                self.stop.wait(options['poll_interval'])
+        return processed
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:00
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_alter_course_options_remove_attendance_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLesson',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('topic', models.CharField(default='-', max_length=200, verbose_name='Тема занятия')),
+                ('date', models.DateTimeField(verbose_name='Дата и время')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_lessons', to='api.course', verbose_name='Курс')),
+            ],
+            options={
+                'verbose_name': 'Архивное занятие',
+                'verbose_name_plural': 'Архивные занятия',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedGrade',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('value', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Оценка')),
+                ('comment', models.TextField(blank=True, default='-', null=True, verbose_name='Комментарий')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grades', to='api.archivedlesson', verbose_name='Занятие')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.PROTECT, related_name='archived_grades', to=settings.AUTH_USER_MODEL, verbose_name='Студент')),
+            ],
+            options={
+                'verbose_name': 'Архивная оценка',
+                'verbose_name_plural': 'Архивные оценки',
+                'unique_together': {('lesson', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('is_present', models.BooleanField(default=False, verbose_name='Присутствовал')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='api.archivedlesson', verbose_name='Занятие')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.PROTECT, related_name='archived_attendances', to=settings.AUTH_USER_MODEL, verbose_name='Студент')),
+            ],
+            options={
+                'verbose_name': 'Архивная посещаемость',
+                'verbose_name_plural': 'Архивная посещаемость',
+                'unique_together': {('lesson', 'student')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Выражения индексов совпадают с тем, что строит SearchVector в api/search.py,
+# иначе PostgreSQL не сможет использовать индекс
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX IF NOT EXISTS api_course_search_idx ON api_course USING gin (
+        to_tsvector('russian'::regconfig, COALESCE(name, '') || ' ' || COALESCE(description, ''))
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS api_lesson_search_idx ON api_lesson USING gin (
+        to_tsvector('russian'::regconfig, COALESCE(topic, ''))
+    )
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS api_course_search_idx",
+    "DROP INDEX IF EXISTS api_lesson_search_idx",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    # FTS5-таблицы для SQLite создаются в post_migrate (см. api.search.install_sqlite_fts):
+    # при пересборке таблицы миграцией SQLite удаляет ее триггеры
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in POSTGRES_FORWARD:
+        schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in POSTGRES_BACKWARD:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_archived_lesson_grade_attendance'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# Индексы повторяют выражение, которое Django строит для istartswith на PostgreSQL:
+# UPPER("api_user"."field"::text) LIKE UPPER('префикс%')
+AUTOCOMPLETE_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+def create_autocomplete_indexes(apps, schema_editor):
+    # На SQLite индексы не создаются: LIKE там не использует обычные индексы
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in AUTOCOMPLETE_FIELDS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS api_user_{field}_prefix_idx "
+            f"ON api_user (UPPER({field}::text) text_pattern_ops)"
+        )
+
+
+def drop_autocomplete_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in AUTOCOMPLETE_FIELDS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS api_user_{field}_prefix_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_autocomplete_indexes, drop_autocomplete_indexes),
+    ]
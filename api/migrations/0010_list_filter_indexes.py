@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_user_autocomplete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['lesson', 'is_present'], name='api_att_lesson_present_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'is_present'], name='api_att_student_present_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['teacher', 'year', 'semester'], name='api_course_teacher_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['year', 'semester'], name='api_course_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['lesson', 'value'], name='api_grade_lesson_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', 'value'], name='api_grade_student_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['course', 'date'], name='api_lesson_course_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'id'], name='api_user_role_id_idx'),
+        ),
+    ]
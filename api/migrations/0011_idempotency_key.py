@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:11
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='Ключ')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=255, verbose_name='Путь')),
+                ('request_hash', models.CharField(max_length=64, verbose_name='Хэш запроса')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='Статус ответа')),
+                ('response_body', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Тело ответа')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Создан')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ключ идемпотентности',
+                'verbose_name_plural': 'Ключи идемпотентности',
+                'unique_together': {('user', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:14
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='Тип')),
+                ('action', models.CharField(max_length=10, verbose_name='Действие')),
+                ('object_id', models.BigIntegerField(verbose_name='ID объекта')),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Данные')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Создано')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Событие изменения',
+                'verbose_name_plural': 'События изменений',
+                'indexes': [models.Index(fields=['user', 'id'], name='api_changeevent_user_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_change_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создано'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создано'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='grade',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создано'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='grade',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создано'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создано'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Изменено'),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Курс'), ('group', 'Группа'), ('lesson', 'Занятие'), ('grade', 'Оценка'), ('attendance', 'Посещаемость'), ('scope', 'Область видимости')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.BigIntegerField(verbose_name='ID объекта')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Удалено')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Запись об удалении',
+                'verbose_name_plural': 'Записи об удалении',
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='api_tombstone_user_del_idx')],
+            },
+        ),
+    ]
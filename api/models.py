@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 
 # Константы для семестров
 SEMESTER_SPRING = 'spring'
@@ -51,6 +52,10 @@ class User(AbstractUser):
         ordering = ['id']
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # ?role= со стандартной сортировкой по id
+            models.Index(fields=['role', 'id'], name='api_user_role_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_role_display()})"
@@ -72,6 +77,16 @@ class Group(models.Model):
         verbose_name='Студенты'
     )
 
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменено'
+    )
+
     class Meta:
         verbose_name = 'Группа'
         verbose_name_plural = 'Группы'
@@ -132,9 +147,23 @@ class Course(models.Model):
         verbose_name='Учебный год'
     )
 
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменено'
+    )
+
     class Meta:
         verbose_name = 'Курс'
         verbose_name_plural = 'Курсы'
+        indexes = [
+            models.Index(fields=['teacher', 'year', 'semester'], name='api_course_teacher_term_idx'),
+            models.Index(fields=['year', 'semester'], name='api_course_term_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_semester_display()} {self.year})"
@@ -156,10 +185,24 @@ class Lesson(models.Model):
         verbose_name='Дата и время'
     )
 
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменено'
+    )
+
     class Meta:
         verbose_name = 'Занятие'
         verbose_name_plural = 'Занятия'
         ordering = ['-date']
+        indexes = [
+            # ?course= с диапазоном дат и сортировкой по дате
+            models.Index(fields=['course', 'date'], name='api_lesson_course_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.name} — {self.topic} ({self.date:%d.%m.%Y})"
@@ -184,10 +227,24 @@ class Attendance(models.Model):
         verbose_name='Присутствовал'
     )
 
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменено'
+    )
+
     class Meta:
         verbose_name = 'Посещаемость'
         verbose_name_plural = 'Посещаемость'
         unique_together = ('lesson', 'student')
+        indexes = [
+            models.Index(fields=['lesson', 'is_present'], name='api_att_lesson_present_idx'),
+            models.Index(fields=['student', 'is_present'], name='api_att_student_present_idx'),
+        ]
 
     def __str__(self):
         status = "Присутствовал" if self.is_present else "Отсутствовал"
@@ -220,10 +277,353 @@ class Grade(models.Model):
         verbose_name='Комментарий'
     )
 
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='Изменено'
+    )
+
     class Meta:
         verbose_name = 'Оценка'
         verbose_name_plural = 'Оценки'
         unique_together = ('lesson', 'student')
+        indexes = [
+            models.Index(fields=['lesson', 'value'], name='api_grade_lesson_value_idx'),
+            models.Index(fields=['student', 'value'], name='api_grade_student_value_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.get_full_name()} — {self.value} за {self.lesson.topic}"
+
+
+class ArchivedLesson(models.Model):
+    """Занятие закрытого семестра, перенесенное из Lesson командой archive_semester"""
+    id = models.BigIntegerField(primary_key=True)
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='archived_lessons',
+        verbose_name='Курс'
+    )
+    topic = models.CharField(
+        max_length=200,
+        verbose_name='Тема занятия',
+        default='-'
+    )
+    date = models.DateTimeField(
+        verbose_name='Дата и время'
+    )
+
+    class Meta:
+        verbose_name = 'Архивное занятие'
+        verbose_name_plural = 'Архивные занятия'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.course.name} — {self.topic} ({self.date:%d.%m.%Y})"
+
+
+class ArchivedAttendance(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    lesson = models.ForeignKey(
+        ArchivedLesson,
+        on_delete=models.CASCADE,
+        related_name='attendances',
+        verbose_name='Занятие'
+    )
+    student = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='archived_attendances',
+        limit_choices_to={'role': 'student'},
+        verbose_name='Студент'
+    )
+    is_present = models.BooleanField(
+        default=False,
+        verbose_name='Присутствовал'
+    )
+
+    class Meta:
+        verbose_name = 'Архивная посещаемость'
+        verbose_name_plural = 'Архивная посещаемость'
+        unique_together = ('lesson', 'student')
+
+    def __str__(self):
+        status = "Присутствовал" if self.is_present else "Отсутствовал"
+        return f"{self.student.get_full_name()} — {status} на {self.lesson}"
+
+
+class ArchivedGrade(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    lesson = models.ForeignKey(
+        ArchivedLesson,
+        on_delete=models.CASCADE,
+        related_name='grades',
+        verbose_name='Занятие'
+    )
+    student = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='archived_grades',
+        limit_choices_to={'role': 'student'},
+        verbose_name='Студент'
+    )
+    value = models.IntegerField(
+        default=0,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        verbose_name='Оценка'
+    )
+    comment = models.TextField(
+        blank=True,
+        null=True,
+        default='-',
+        verbose_name='Комментарий'
+    )
+
+    class Meta:
+        verbose_name = 'Архивная оценка'
+        verbose_name_plural = 'Архивные оценки'
+        unique_together = ('lesson', 'student')
 
     def __str__(self):
         return f"{self.student.get_full_name()} — {self.value} за {self.lesson.topic}"
+
+
+class IdempotencyKey(models.Model):
+    """Ответ на запрос записи с заголовком Idempotency-Key (см. api/idempotency.py)"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name='Пользователь'
+    )
+    key = models.CharField(
+        max_length=255,
+        verbose_name='Ключ'
+    )
+    method = models.CharField(
+        max_length=10,
+        verbose_name='Метод'
+    )
+    path = models.CharField(
+        max_length=255,
+        verbose_name='Путь'
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        verbose_name='Хэш запроса'
+    )
+    # Пока запрос выполняется, статус и тело ответа пустые
+    status_code = models.PositiveSmallIntegerField(
+        null=True,
+        verbose_name='Статус ответа'
+    )
+    response_body = models.JSONField(
+        null=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name='Тело ответа'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Создан'
+    )
+
+    class Meta:
+        verbose_name = 'Ключ идемпотентности'
+        verbose_name_plural = 'Ключи идемпотентности'
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return f"{self.key} ({self.method} {self.path})"
+
+
+class Job(models.Model):
+    """Фоновая задача, которую выполняет manage.py run_gradar_worker (см. api/jobs.py)"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_SUCCEEDED, 'Выполнена'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    kind = models.CharField(
+        max_length=50,
+        verbose_name='Тип задачи'
+    )
+    payload = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        verbose_name='Параметры'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        verbose_name='Статус'
+    )
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        validators=[MaxValueValidator(100)],
+        verbose_name='Прогресс, %'
+    )
+    progress_message = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Текущий шаг'
+    )
+    result = models.JSONField(
+        null=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name='Результат'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='Максимум попыток'
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Не раньше'
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Воркер'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        verbose_name='Взята в работу'
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='jobs',
+        verbose_name='Автор'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        verbose_name='Завершена'
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-id']
+        indexes = [
+            # Выбор следующей задачи воркером и поиск зависших
+            models.Index(fields=['status', 'run_after'], name='api_job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+
+
+class ChangeEvent(models.Model):
+    """Изменение оценки или посещаемости студента для потока событий (см. api/events.py)"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='change_events',
+        verbose_name='Получатель'
+    )
+    kind = models.CharField(
+        max_length=20,
+        verbose_name='Тип'
+    )
+    action = models.CharField(
+        max_length=10,
+        verbose_name='Действие'
+    )
+    object_id = models.BigIntegerField(
+        verbose_name='ID объекта'
+    )
+    payload = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        verbose_name='Данные'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Создано'
+    )
+
+    class Meta:
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменений'
+        indexes = [
+            # Досылка пропущенных событий по Last-Event-ID
+            models.Index(fields=['user', 'id'], name='api_changeevent_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.action} #{self.object_id} для {self.user_id}"
+
+
+class Tombstone(models.Model):
+    """Удаление или смена области видимости для дельта-синхронизации (см. api/sync.py)"""
+    KIND_COURSE = 'course'
+    KIND_GROUP = 'group'
+    KIND_LESSON = 'lesson'
+    KIND_GRADE = 'grade'
+    KIND_ATTENDANCE = 'attendance'
+    # Набор доступных пользователю объектов изменился: нужна полная синхронизация
+    KIND_SCOPE = 'scope'
+    KIND_CHOICES = [
+        (KIND_COURSE, 'Курс'),
+        (KIND_GROUP, 'Группа'),
+        (KIND_LESSON, 'Занятие'),
+        (KIND_GRADE, 'Оценка'),
+        (KIND_ATTENDANCE, 'Посещаемость'),
+        (KIND_SCOPE, 'Область видимости'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='tombstones',
+        verbose_name='Получатель'
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name='Тип'
+    )
+    object_id = models.BigIntegerField(
+        verbose_name='ID объекта'
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Удалено'
+    )
+
+    class Meta:
+        verbose_name = 'Запись об удалении'
+        verbose_name_plural = 'Записи об удалении'
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='api_tombstone_user_del_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} для {self.user_id}"
@@ -0,0 +1,28 @@
+"""
+Парсеры тел запросов: JSON через orjson и MessagePack (см. api/renderers.py).
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import MessagePackRenderer, msgpack, orjson
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # orjson принимает только UTF-8 и, как strict-режим DRF, отвергает NaN
+            return orjson.loads(stream.read() if stream is not None else b'')
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(BaseParser):
+    media_type = MessagePackRenderer.media_type
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.ExtraData, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,241 @@
+"""
+Проекции для списочных эндпоинтов: чтение через .values() без создания моделей.
+
+Проекция строится по сериализатору: берет его читаемые поля в том же порядке,
+выбирает ровно нужные колонки одним запросом с JOIN по внешним ключам, а
+связи многие-ко-многим (группы курса, студенты группы) — одним запросом по
+промежуточной таблице на каждый уровень. Значения, которые сериализатор
+преобразует (даты), проходят через to_representation того же поля, поэтому
+результат совпадает с ``Serializer(queryset, many=True).data``.
+
+Повторяющиеся вложенные объекты (курс у каждого занятия, группы курса) в
+пределах одного ответа собираются один раз и разделяются между строками:
+результат предназначен только для рендеринга и не должен изменяться.
+
+Нормализованный вид (?format=normalized) строится из тех же строк: вложенные
+объекты заменяются их id, а сами объекты выводятся по одному разу в разделах
+included, поэтому размер ответа не растет от повторов связанных объектов.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .renderers import FastJSONRenderer
+from .serializers import (
+    AttendanceSerializer, CourseSerializer, CourseStatsSerializer, GradeSerializer, GroupSerializer, LessonSerializer,
+    UserSerializer,
+)
+
+# Поля, у которых to_representation не меняет значение, полученное из базы
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+VALUE, ONE, MANY = 'value', 'one', 'many'
+
+
+class Projection:
+    """
+    related — вложенные сериализаторы внешних ключей: {поле: Projection};
+    many — вложенные сериализаторы связей многие-ко-многим: {поле: Projection}
+    """
+
+    def __init__(self, serializer_class, related=None, many=None):
+        self.serializer_class = serializer_class
+        self.related = related or {}
+        self.many = many or {}
+
+    @cached_property
+    def model(self):
+        return self.serializer_class.Meta.model
+
+    @cached_property
+    def plan(self):
+        """[(ключ в ответе, вид, колонка, вложенная проекция или преобразование)]"""
+        plan = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{name}: source='*' не поддерживается")
+            source = field.source.replace('.', '__')
+            if name in self.related:
+                plan.append((name, ONE, source, self.related[name]))
+            elif name in self.many:
+                plan.append((name, MANY, source, self.many[name]))
+            elif isinstance(field, serializers.BaseSerializer):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name}: вложенный сериализатор без проекции"
+                )
+            else:
+                convert = None if isinstance(field, IDENTITY_FIELDS) else field.to_representation
+                plan.append((name, VALUE, source, convert))
+        return plan
+
+    def columns(self, prefix=''):
+        columns = [prefix + 'id']
+        for name, kind, source, extra in self.plan:
+            if kind == VALUE and source != 'id':
+                columns.append(prefix + source)
+            elif kind == ONE:
+                columns.extend(extra.columns(f'{prefix}{source}__'))
+        return columns
+
+    @cached_property
+    def included_key(self):
+        """Раздел included нормализованного ответа: lessons, courses, groups, users"""
+        return f'{self.model._meta.model_name}s'
+
+    def evaluate(self, queryset):
+        """Список словарей в формате serializer_class(queryset, many=True).data"""
+        return self.shape(list(queryset.values(*self.columns())), db=queryset.db)
+
+    def normalize(self, *querysets):
+        """
+        Составной документ {'data': [...], 'included': {раздел: [...]}}: вложенные
+        объекты заменены их id и каждый выводится в included один раз. Несколько
+        queryset'ов (рабочая и архивная таблицы) дают один документ
+        """
+        rows = [row for queryset in querysets for row in queryset.values(*self.columns())]
+        included = {}
+        many = self._load_many(rows, '', querysets[0].db, included)
+        data = [self._flatten(row, '', many, included) for row in rows]
+        return {
+            'data': data,
+            'included': {key: list(items.values()) for key, items in included.items()},
+        }
+
+    def shape(self, rows, prefix='', db=None):
+        many = self._load_many(rows, prefix, db)
+        cache = {}
+        return [self._build(row, prefix, many, cache) for row in rows]
+
+    def _load_many(self, rows, prefix, db, included=None):
+        """
+        {(префикс, поле): {id владельца: [объекты]}} для m2m-полей на всех уровнях;
+        с included вместо объектов — их id, а сами объекты добавляются в included
+        """
+        loaded = {}
+        for name, kind, source, extra in self.plan:
+            if kind == ONE:
+                loaded.update(extra._load_many(rows, f'{prefix}{source}__', db, included))
+            elif kind == MANY:
+                owner_ids = {row[prefix + 'id'] for row in rows} - {None}
+                loaded[(prefix, source)] = self._fetch_many(source, extra, owner_ids, db, included)
+        return loaded
+
+    def _fetch_many(self, source, projection, owner_ids, db, included=None):
+        field = self.model._meta.get_field(source)
+        owner, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        # Порядок как у related manager: Meta.ordering целевой модели, иначе порядок связей
+        ordering = [
+            ('-' if order.startswith('-') else '') + f"{target}__{order.lstrip('-')}"
+            for order in projection.model._meta.ordering
+        ] or ['pk']
+        links = list(
+            field.remote_field.through.objects.using(db)
+            .filter(**{f'{owner}__in': owner_ids})
+            .order_by(*ordering)
+            .values(f'{owner}_id', *projection.columns(f'{target}__'))
+        )
+        prefix = f'{target}__'
+        if included is None:
+            items = projection.shape(links, prefix, db)
+        else:
+            many = projection._load_many(links, prefix, db, included)
+            items = [projection._include(link, prefix, many, included) for link in links]
+        result = {owner_id: [] for owner_id in owner_ids}
+        for link, item in zip(links, items):
+            result[link[f'{owner}_id']].append(item)
+        return result
+
+    def _build(self, row, prefix, many, cache):
+        pk = row[prefix + 'id']
+        if pk is None:
+            return None
+        key = (id(self), pk)
+        item = cache.get(key)
+        if item is not None:
+            return item
+
+        item = {}
+        for name, kind, source, extra in self.plan:
+            if kind == VALUE:
+                value = row[prefix + source]
+                item[name] = value if extra is None or value is None else extra(value)
+            elif kind == ONE:
+                item[name] = extra._build(row, f'{prefix}{source}__', many, cache)
+            else:
+                item[name] = many[(prefix, source)][pk]
+        cache[key] = item
+        return item
+
+    def _flatten(self, row, prefix, many, included):
+        """Как _build, но вложенные объекты заменены их id (m2m — списками id)"""
+        pk = row[prefix + 'id']
+        item = {}
+        for name, kind, source, extra in self.plan:
+            if kind == VALUE:
+                value = row[prefix + source]
+                item[name] = value if extra is None or value is None else extra(value)
+            elif kind == ONE:
+                item[name] = extra._include(row, f'{prefix}{source}__', many, included)
+            else:
+                item[name] = many[(prefix, source)][pk]
+        return item
+
+    def _include(self, row, prefix, many, included):
+        """Добавляет объект из row в included (если его там нет) и возвращает его id"""
+        pk = row[prefix + 'id']
+        if pk is None:
+            return None
+        section = included.setdefault(self.included_key, {})
+        if pk not in section:
+            section[pk] = self._flatten(row, prefix, many, included)
+        return pk
+
+
+USER = Projection(UserSerializer)
+GROUP = Projection(GroupSerializer, many={'students': USER})
+COURSE = Projection(CourseSerializer, related={'teacher': USER}, many={'groups': GROUP})
+# Требует queryset, аннотированный aggregates.annotate_courses
+COURSE_STATS = Projection(CourseStatsSerializer, related={'teacher': USER}, many={'groups': GROUP})
+LESSON = Projection(LessonSerializer, related={'course': COURSE})
+GRADE = Projection(GradeSerializer, related={'lesson': LESSON, 'student': USER})
+ATTENDANCE = Projection(AttendanceSerializer, related={'lesson': LESSON, 'student': USER})
+
+
+NORMALIZED_FORMAT = 'normalized'
+
+
+def normalized_requested(request):
+    return request.query_params.get(api_settings.URL_FORMAT_OVERRIDE) == NORMALIZED_FORMAT
+
+
+class ProjectionListMixin:
+    """
+    Примесь для ViewSet'ов: list отдает list_projection вместо сериализатора,
+    а с ?format=normalized — составной документ Projection.normalize
+    """
+    list_projection = None
+
+    def perform_content_negotiation(self, request, force=False):
+        # format=normalized — вид документа, а не рендерер DRF; документ отдается в JSON
+        if self.action == 'list' and self.list_projection is not None and normalized_requested(request):
+            renderer = FastJSONRenderer()
+            return (renderer, renderer.media_type)
+        return super().perform_content_negotiation(request, force)
+
+    def list(self, request, *args, **kwargs):
+        if self.list_projection is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        if normalized_requested(request):
+            return Response(self.list_projection.normalize(queryset))
+        return Response(self.list_projection.evaluate(queryset))
@@ -0,0 +1,62 @@
+"""
+Рендереры ответов API.
+
+FastJSONRenderer сериализует через orjson и дает тот же байтовый результат,
+что и стандартный JSONRenderer DRF (компактный UTF-8, даты в ISO 8601 с Z).
+Без orjson, с отступами (Browsable API, ``Accept: application/json; indent=4``)
+и для значений, которые orjson не поддерживает, используется стандартный путь.
+
+MessagePackRenderer отдает ``application/msgpack`` для мобильных клиентов и
+подключается в настройках, только если установлен пакет msgpack.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+# Типы, которые orjson не знает (Decimal, timedelta, ленивые строки, QuerySet),
+# кодируются так же, как в DRF
+_encoder = JSONEncoder()
+
+
+def msgpack_available():
+    return msgpack is not None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Целые больше 64 бит и прочие значения вне возможностей orjson
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и DRF, экранируем разделители строк, недопустимые в JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
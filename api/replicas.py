@@ -0,0 +1,77 @@
+"""
+Маршрутизация чтения на реплики.
+
+Безопасные запросы к ViewSet'ам (GET/HEAD/OPTIONS) читают с реплик из
+settings.DATABASE_REPLICAS; запись, транзакции и все остальное идут в основную
+базу. После успешной записи пользователь на DATABASE_REPLICA_STICKY_SECONDS
+«прилипает» к основной базе, чтобы сразу видеть свои изменения несмотря на
+задержку репликации. Метка хранится в кэше Django, поэтому для нескольких
+воркеров кэш должен быть общим.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework import permissions
+
+# Разрешено ли текущему запросу читать с реплики
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+STICKY_KEY = 'replica-sticky:{}'
+
+
+def mark_sticky(user_id):
+    cache.set(STICKY_KEY.format(user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return cache.get(STICKY_KEY.format(user_id), False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not _read_from_replica.get():
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаем то, что в ней же записано
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+
+class ReplicaReadMixin:
+    """Примесь для ViewSet'ов: включает чтение с реплик для безопасных запросов"""
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_from_replica.set(False)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            user = getattr(self.request, 'user', None)
+            if (
+                self.request.method not in permissions.SAFE_METHODS
+                and response.status_code < 400
+                and user is not None
+                and user.is_authenticated
+            ):
+                mark_sticky(user.pk)
+            return response
+        finally:
+            _read_from_replica.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        # Пользователь уже загружен из основной базы при аутентификации
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in permissions.SAFE_METHODS
+            and not (request.user.is_authenticated and is_sticky(request.user.pk))
+        ):
+            _read_from_replica.set(True)
@@ -0,0 +1,218 @@
+"""
+Полнотекстовый поиск по курсам (название, описание) и темам занятий
+и автодополнение пользователей.
+
+На PostgreSQL используется to_tsvector с GIN-индексами по тем же выражениям
+(миграция 0008), на SQLite — внешние FTS5-таблицы api_course_fts и
+api_lesson_fts, которые поддерживаются триггерами и пересоздаются после
+каждого migrate (пересборка таблицы в SQLite удаляет ее триггеры). Каждое слово запроса
+ищется как префикс, результаты сортируются по релевантности.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Course, Group, Lesson
+
+# Конфигурация to_tsvector; должна совпадать с выражением индексов в миграции
+SEARCH_CONFIG = 'russian'
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Поля пользователя, по которым работает автодополнение. На PostgreSQL для
+# каждого есть индекс UPPER(field) text_pattern_ops (миграция 0009), который
+# обслуживает istartswith
+AUTOCOMPLETE_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+COURSE_FTS_TABLE = 'api_course_fts'
+LESSON_FTS_TABLE = 'api_lesson_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def scoped_courses(user):
+    """Курсы, видимые пользователю (как в CourseViewSet.get_queryset)"""
+    if user.role == 'teacher':
+        return Course.objects.filter(teacher=user)
+    return Course.objects.filter(groups__students=user)
+
+
+def scoped_lessons(user):
+    """Занятия, видимые пользователю (как в LessonViewSet.get_queryset)"""
+    if user.role == 'teacher':
+        return Lesson.objects.filter(course__teacher=user)
+    return Lesson.objects.filter(course__groups__students=user)
+
+
+# FTS5-таблица: (исходная таблица, индексируемые колонки)
+SQLITE_FTS_TABLES = {
+    COURSE_FTS_TABLE: ('api_course', ('name', 'description')),
+    LESSON_FTS_TABLE: ('api_lesson', ('topic',)),
+}
+
+
+def _fts5_statements(table, source, columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+        f"USING fts5({column_list}, content='{source}', content_rowid='id')",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN
+            INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN
+            INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {source} BEGIN
+            INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END""",
+        f"INSERT INTO {table}({table}) VALUES ('rebuild')",
+    ]
+
+
+def install_sqlite_fts(using='default', **kwargs):
+    """Обработчик post_migrate: создает FTS5-таблицы и триггеры и перестраивает индекс"""
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        for table, (source, columns) in SQLITE_FTS_TABLES.items():
+            for statement in _fts5_statements(table, source, columns):
+                cursor.execute(statement)
+    _cache.pop(using, None)
+
+
+_cache = {}
+
+
+def _fts5_available(conn):
+    if conn.alias not in _cache:
+        _cache[conn.alias] = LESSON_FTS_TABLE in conn.introspection.table_names()
+    return _cache[conn.alias]
+
+
+def _postgres_search(queryset, fields, tokens):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    vector = SearchVector(*fields, config=SEARCH_CONFIG)
+    query = SearchQuery(
+        ' & '.join(f'{token}:*' for token in tokens),
+        config=SEARCH_CONFIG,
+        search_type='raw',
+    )
+    return (
+        queryset.annotate(search=vector)
+        .filter(search=query)
+        .annotate(rank=SearchRank(vector, query))
+    )
+
+
+def _fts5_search(queryset, table, tokens):
+    # Каждое слово экранируется как строка FTS5 и ищется как префикс
+    match = ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+    source = queryset.model._meta.db_table
+    # bm25() тем меньше, чем документ релевантнее
+    rank = RawSQL(
+        f'SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s AND rowid = {source}.id',
+        [match],
+    )
+    return queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+    ).annotate(rank=rank)
+
+
+def _fallback_search(queryset, fields, tokens):
+    for token in tokens:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': token})
+        queryset = queryset.filter(condition)
+    return queryset.annotate(rank=Value(0.0))
+
+
+def _search(queryset, fields, fts_table, tokens):
+    conn = connections[router.db_for_read(queryset.model)]
+    if conn.vendor == 'postgresql':
+        return _postgres_search(queryset, fields, tokens)
+    if conn.vendor == 'sqlite' and _fts5_available(conn):
+        return _fts5_search(queryset, fts_table, tokens)
+    return _fallback_search(queryset, fields, tokens)
+
+
+# Модель -> (индексируемые поля, FTS5-таблица)
+FULL_TEXT_MODELS = {
+    Course: (('name', 'description'), COURSE_FTS_TABLE),
+    Lesson: (('topic',), LESSON_FTS_TABLE),
+}
+
+
+def filter_full_text(queryset, query):
+    """Курсы или занятия из queryset, подходящие под query, по тому же индексу, что и search"""
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+    fields, table = FULL_TEXT_MODELS[queryset.model]
+    return _search(queryset, fields, table, tokens)
+
+
+def search(user, query, limit=SEARCH_DEFAULT_LIMIT):
+    """Возвращает {'courses': [...], 'lessons': [...]} в порядке релевантности"""
+    tokens = tokenize(query)
+    if not tokens:
+        return {'courses': [], 'lessons': []}
+
+    courses = _search(scoped_courses(user), ('name', 'description'), COURSE_FTS_TABLE, tokens)
+    lessons = _search(scoped_lessons(user), ('topic',), LESSON_FTS_TABLE, tokens)
+
+    return {
+        'courses': list(
+            courses.order_by('-rank', 'id')
+            .values('id', 'name', 'description', 'semester', 'year', 'rank')[:limit]
+        ),
+        'lessons': list(
+            lessons.order_by('-rank', '-date')
+            .annotate(course_name=F('course__name'))
+            .values('id', 'topic', 'date', 'course_id', 'course_name', 'rank')[:limit]
+        ),
+    }
+
+
+def autocomplete_users(queryset, query, role=None, ungrouped=False, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+    """
+    Пользователи, у которых каждое слово запроса является префиксом
+    username, имени, фамилии или email
+    """
+    tokens = query.split()
+    if not tokens:
+        return []
+
+    for token in tokens:
+        condition = Q()
+        for field in AUTOCOMPLETE_FIELDS:
+            condition |= Q(**{f'{field}__istartswith': token})
+        queryset = queryset.filter(condition)
+
+    if role:
+        queryset = queryset.filter(role=role)
+    if ungrouped:
+        queryset = queryset.filter(
+            ~Exists(Group.students.through.objects.filter(user_id=OuterRef('pk')))
+        )
+
+    return list(
+        queryset.order_by('last_name', 'first_name', 'id')
+        .values('id', 'username', 'first_name', 'last_name', 'email', 'role')[:limit]
+    )
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import User, Course, Lesson, Attendance, Grade, Group
+from .models import User, Course, Lesson, Attendance, Grade, Group, Job
+from .compiled import CompiledListSerializer
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -9,6 +10,7 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'bio']
+        list_serializer_class = CompiledListSerializer
         extra_kwargs = {
             'password': {'write_only': True}
         }
@@ -127,6 +129,35 @@ class CourseSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class RoundedFloatField(serializers.FloatField):
+    def __init__(self, digits=2, **kwargs):
+        self.digits = digits
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return round(float(value), self.digits)
+
+class AggregateFieldsSerializer(serializers.Serializer):
+    """
+    Показатели из api/aggregates.py. Значения берутся из аннотаций queryset'а;
+    у объекта без аннотаций (ответы на запись) поля не выводятся
+    """
+    student_count = serializers.IntegerField(read_only=True)
+    lesson_count = serializers.IntegerField(read_only=True)
+    next_lesson_at = serializers.DateTimeField(read_only=True)
+    avg_grade = RoundedFloatField(read_only=True)
+    attendance_rate = RoundedFloatField(digits=4, read_only=True)
+
+AGGREGATE_FIELDS = ['student_count', 'lesson_count', 'next_lesson_at', 'avg_grade', 'attendance_rate']
+
+class GroupStatsSerializer(AggregateFieldsSerializer, GroupSerializer):
+    class Meta(GroupSerializer.Meta):
+        fields = GroupSerializer.Meta.fields + AGGREGATE_FIELDS
+
+class CourseStatsSerializer(AggregateFieldsSerializer, CourseSerializer):
+    class Meta(CourseSerializer.Meta):
+        fields = CourseSerializer.Meta.fields + AGGREGATE_FIELDS
+
 class LessonSerializer(serializers.ModelSerializer):
     course = CourseSerializer(read_only=True)
     course_id = serializers.IntegerField(write_only=True)
@@ -169,6 +200,7 @@ class AttendanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attendance
         fields = ['id', 'lesson', 'student', 'lesson_id', 'student_id', 'is_present']
+        list_serializer_class = CompiledListSerializer
 
     def validate(self, data):
         # При обновлении не требуем lesson_id и student_id
@@ -216,6 +248,7 @@ class GradeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Grade
         fields = ['id', 'lesson', 'student', 'lesson_id', 'student_id', 'value', 'comment']
+        list_serializer_class = CompiledListSerializer
 
     def create(self, validated_data):
         lesson_id = validated_data.pop('lesson_id')
@@ -235,3 +268,12 @@ class GradeSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         return instance
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'progress', 'progress_message', 'result', 'error',
+            'attempts', 'max_attempts', 'created_at', 'finished_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,182 @@
+"""
+Сброс второстепенных запросов при перегрузке воркера.
+
+LoadSheddingMiddleware считает запросы, которые процесс обрабатывает прямо
+сейчас, а обертка курсоров — запросы к базе, выполняющиеся в этот момент во
+всех потоках процесса; с пулом соединений psycopg учитываются и запросы,
+ожидающие свободного соединения. Пока хотя бы один показатель выше порога
+(LOAD_SHED_* в settings), безопасные запросы к действиям из shed_actions
+представлений — списки, поиск, выгрузки — сразу получают 503 с Retry-After и не
+занимают базу. Запись и остальные запросы выполняются как обычно, поэтому
+отметки посещаемости и оценки проходят, даже когда сотни студентов одновременно
+открывают списки.
+
+Счетчики хранятся в памяти процесса; снимок для мониторинга — GET /api/load/.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import permissions, status
+
+SHED_MESSAGE = "Сервер перегружен, повторите запрос позже"
+
+
+class LoadCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.in_flight = 0
+            self.in_flight_peak = 0
+            self.db_queries = 0
+            self.db_queries_peak = 0
+            self.requests = 0
+            self.shed = {}
+
+    def request_started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.in_flight_peak = max(self.in_flight_peak, self.in_flight)
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def query_started(self):
+        with self._lock:
+            self.db_queries += 1
+            self.db_queries_peak = max(self.db_queries_peak, self.db_queries)
+
+    def query_finished(self):
+        with self._lock:
+            self.db_queries -= 1
+
+    def request_shed(self, reason):
+        with self._lock:
+            self.shed[reason] = self.shed.get(reason, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'in_flight_peak': self.in_flight_peak,
+                'db_queries': self.db_queries,
+                'db_queries_peak': self.db_queries_peak,
+                'requests': self.requests,
+                'shed': dict(self.shed),
+            }
+
+
+counters = LoadCounters()
+
+
+def _count_query(execute, sql, params, many, context):
+    counters.query_started()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counters.query_finished()
+
+
+@receiver(connection_created)
+def track_queries(sender, connection, **kwargs):
+    # Объект соединения переиспользуется при переподключении
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def pool_waiting():
+    """Сколько запросов ждут соединения в пулах psycopg (Django 5.1+), иначе 0"""
+    waiting = 0
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            waiting += pool.get_stats().get('requests_waiting', 0)
+    return waiting
+
+
+def overload_reason():
+    """Имя превышенного порога или None"""
+    if counters.in_flight > settings.LOAD_SHED_MAX_IN_FLIGHT:
+        return 'in_flight'
+    if counters.db_queries > settings.LOAD_SHED_MAX_DB_QUERIES:
+        return 'db_queries'
+    if pool_waiting() > settings.LOAD_SHED_MAX_POOL_WAITING:
+        return 'pool_waiting'
+    return None
+
+
+def is_sheddable(request, view_func):
+    """
+    Можно ли сбросить запрос: безопасный метод и действие из shed_actions
+    ({action} у ViewSet'ов, {метод} у APIView)
+    """
+    if request.method not in permissions.SAFE_METHODS:
+        return False
+    view_class = getattr(view_func, 'cls', None)
+    shed_actions = getattr(view_class, 'shed_actions', ())
+    if not shed_actions:
+        return False
+    method = 'get' if request.method == 'HEAD' else request.method.lower()
+    actions = getattr(view_func, 'actions', None)
+    action = actions.get(method) if actions else method
+    return action in shed_actions
+
+
+def shed_reason(request, view_func):
+    """Причина сбросить запрос сейчас или None, если его нужно выполнить"""
+    if not settings.LOAD_SHEDDING_ENABLED or not is_sheddable(request, view_func):
+        return None
+    reason = overload_reason()
+    if reason is not None:
+        counters.request_shed(reason)
+    return reason
+
+
+def shed_response():
+    response = JsonResponse({'error': SHED_MESSAGE}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(settings.LOAD_SHED_RETRY_AFTER)
+    return response
+
+
+def stats():
+    return {
+        **counters.snapshot(),
+        'pool_waiting': pool_waiting(),
+        'thresholds': {
+            'in_flight': settings.LOAD_SHED_MAX_IN_FLIGHT,
+            'db_queries': settings.LOAD_SHED_MAX_DB_QUERIES,
+            'pool_waiting': settings.LOAD_SHED_MAX_POOL_WAITING,
+        },
+        'enabled': settings.LOAD_SHEDDING_ENABLED,
+    }
+
+
+class LoadSheddingMiddleware(MiddlewareMixin):
+    """
+    Запрос считается выполняющимся до возврата ответа; у потоковых ответов
+    (выгрузки, SSE) — до начала передачи тела
+    """
+
+    def process_request(self, request):
+        counters.request_started()
+        request._load_counted = True
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if shed_reason(request, view_func) is not None:
+            return shed_response()
+        return None
+
+    def process_response(self, request, response):
+        if getattr(request, '_load_counted', False):
+            request._load_counted = False
+            counters.request_finished()
+        return response
@@ -0,0 +1,231 @@
+"""
+Дельта-синхронизация для офлайн-клиентов: GET /api/sync/?since=<cursor>.
+
+Ответ содержит строки курсов, групп, занятий, оценок и посещаемости из области
+видимости пользователя, измененные после курсора (по updated_at), и id
+удаленных объектов из таблицы Tombstone. Курсор непрозрачен для клиента: это
+время начала предыдущей выборки в микросекундах.
+
+Записи об удалении пишутся по одной на каждого получателя (студент и
+преподаватель курса), поэтому выборка удалений — один запрос по индексу
+(user, deleted_at). Удаление занятия подразумевает удаление его оценок и
+посещаемости, удаление курса — его занятий: дочерние строки отдельных записей
+не получают. Если набор доступных объектов меняется (студента перевели в другую
+группу, группу прикрепили к курсу), пользователь получает запись KIND_SCOPE, и
+следующая синхронизация возвращает полный снимок (full=true).
+
+Архивация семестра не считается удалением: перенесенные оценки остаются в
+истории студента (my-grades).
+"""
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Course, Group, Lesson, Grade, Attendance, Tombstone
+
+# Строки, закоммиченные позже начала выборки, но с более ранним updated_at,
+# попадают в следующую синхронизацию за счет перекрытия; клиент применяет
+# изменения по id, поэтому повторы безопасны
+SYNC_CURSOR_OVERLAP = timedelta(seconds=30)
+# Сколько хранятся записи об удалении; более старый курсор дает полный снимок
+SYNC_TOMBSTONE_TTL = timedelta(days=30)
+PURGE_PROBABILITY = 0.01
+
+SYNC_FIELDS = {
+    'courses': ('id', 'name', 'description', 'semester', 'year', 'teacher_id', 'updated_at'),
+    'groups': ('id', 'name', 'year', 'updated_at'),
+    'lessons': ('id', 'course_id', 'topic', 'date', 'updated_at'),
+    'grades': ('id', 'lesson_id', 'student_id', 'value', 'comment', 'updated_at'),
+    'attendance': ('id', 'lesson_id', 'student_id', 'is_present', 'updated_at'),
+}
+
+TOMBSTONE_SECTIONS = {
+    Tombstone.KIND_COURSE: 'courses',
+    Tombstone.KIND_GROUP: 'groups',
+    Tombstone.KIND_LESSON: 'lessons',
+    Tombstone.KIND_GRADE: 'grades',
+    Tombstone.KIND_ATTENDANCE: 'attendance',
+}
+
+
+class SyncError(Exception):
+    pass
+
+
+def encode_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(cursor):
+    try:
+        return datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise SyncError("Неверный курсор синхронизации")
+
+
+def scoped_querysets(user):
+    """Те же правила доступа, что и у списков ViewSet'ов"""
+    if user.role == 'teacher':
+        return {
+            'courses': Course.objects.filter(teacher=user),
+            'groups': Group.objects.filter(courses__teacher=user).distinct(),
+            'lessons': Lesson.objects.filter(course__teacher=user),
+            'grades': Grade.objects.filter(lesson__course__teacher=user),
+            'attendance': Attendance.objects.filter(lesson__course__teacher=user),
+        }
+    return {
+        'courses': Course.objects.filter(groups__students=user).distinct(),
+        'groups': Group.objects.filter(students=user),
+        'lessons': Lesson.objects.filter(course__groups__students=user).distinct(),
+        'grades': Grade.objects.filter(student=user),
+        'attendance': Attendance.objects.filter(student=user),
+    }
+
+
+def _attach_ids(rows, through, owner_field, related_field, name):
+    """Добавляет к строкам списки связанных id одним запросом по промежуточной таблице"""
+    by_owner = {row['id']: row for row in rows}
+    for row in rows:
+        row[name] = []
+    if by_owner:
+        links = through.objects.filter(**{f'{owner_field}__in': by_owner}).order_by(related_field)
+        for owner_id, related_id in links.values_list(owner_field, related_field):
+            by_owner[owner_id][name].append(related_id)
+    return rows
+
+
+def changes(user, since=None):
+    """Изменения и удаления после курсора since; без курсора — полный снимок"""
+    now = timezone.now()
+    if since is not None:
+        since = decode_cursor(since)
+    full = since is None or since < now - SYNC_TOMBSTONE_TTL
+
+    tombstones = []
+    if not full:
+        tombstones = list(
+            Tombstone.objects.filter(user=user, deleted_at__gt=since - SYNC_CURSOR_OVERLAP)
+            .values_list('kind', 'object_id')
+        )
+        full = any(kind == Tombstone.KIND_SCOPE for kind, _ in tombstones)
+
+    result = {}
+    for section, queryset in scoped_querysets(user).items():
+        if not full:
+            queryset = queryset.filter(updated_at__gt=since - SYNC_CURSOR_OVERLAP)
+        result[section] = list(queryset.order_by('id').values(*SYNC_FIELDS[section]))
+    _attach_ids(result['courses'], Course.groups.through, 'course_id', 'group_id', 'group_ids')
+    _attach_ids(result['groups'], Group.students.through, 'group_id', 'user_id', 'student_ids')
+
+    deleted = {section: [] for section in SYNC_FIELDS}
+    for kind, object_id in sorted(set(tombstones)):
+        if kind in TOMBSTONE_SECTIONS:
+            deleted[TOMBSTONE_SECTIONS[kind]].append(object_id)
+
+    return {'cursor': encode_cursor(now), 'full': full, 'changes': result, 'deleted': deleted}
+
+
+# Запись удалений
+
+def _record(kind, recipients):
+    """recipients — пары (object_id, user_id)"""
+    tombstones = [
+        Tombstone(user_id=user_id, kind=kind, object_id=object_id)
+        for object_id, user_id in set(recipients) if user_id is not None
+    ]
+    Tombstone.objects.bulk_create(tombstones)
+    if random.random() < PURGE_PROBABILITY:
+        Tombstone.objects.filter(deleted_at__lt=timezone.now() - SYNC_TOMBSTONE_TTL).delete()
+
+
+def _course_students(course_ids):
+    return Group.students.through.objects.filter(group__courses__in=course_ids).values_list(
+        'group__courses', 'user_id'
+    )
+
+
+def reset_scope(user_ids):
+    """Следующая синхронизация этих пользователей вернет полный снимок"""
+    _record(Tombstone.KIND_SCOPE, [(0, user_id) for user_id in user_ids])
+
+
+def record_deleted(instance):
+    """Вызывается перед удалением оценки, посещаемости, занятия, курса или группы"""
+    record_deleted_queryset(type(instance).objects.filter(pk=instance.pk))
+
+
+def record_deleted_queryset(queryset):
+    """
+    Как record_deleted, но для всех строк queryset сразу: получатели выбираются
+    одним-двумя запросами, записи создаются одним bulk_create на вид
+    """
+    model = queryset.model
+    if model in (Grade, Attendance):
+        kind = Tombstone.KIND_GRADE if model is Grade else Tombstone.KIND_ATTENDANCE
+        recipients = []
+        for pk, student_id, teacher_id in queryset.values_list('pk', 'student_id', 'lesson__course__teacher_id'):
+            recipients += [(pk, student_id), (pk, teacher_id)]
+        _record(kind, recipients)
+    elif model is Lesson:
+        students = Group.students.through.objects.filter(group__courses__lessons__in=queryset).values_list(
+            'group__courses__lessons', 'user_id'
+        )
+        _record(Tombstone.KIND_LESSON, list(students) + list(queryset.values_list('pk', 'course__teacher_id')))
+    elif model is Course:
+        _record(
+            Tombstone.KIND_COURSE,
+            list(_course_students(queryset)) + list(queryset.values_list('pk', 'teacher_id'))
+        )
+    elif model is Group:
+        # Студенты группы теряют и группу, и ее курсы
+        reset_scope(Group.students.through.objects.filter(group__in=queryset).values_list('user_id', flat=True))
+        _record(Tombstone.KIND_GROUP, Course.objects.filter(groups__in=queryset).values_list('groups', 'teacher_id'))
+
+
+class TombstoneMixin:
+    """Примесь для ViewSet'ов: удаление через API оставляет записи для синхронизации"""
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_deleted(instance)
+            super().perform_destroy(instance)
+
+
+# Изменения состава групп и групп курсов не вызывают save(), поэтому updated_at
+# обновляется здесь
+
+def _changed_ids(instance, reverse, pk_set, forward_related, reverse_related):
+    """Возвращает (id владельцев, id связанных объектов) для m2m_changed"""
+    if reverse:
+        related = set(pk_set) if pk_set is not None else set(
+            getattr(instance, reverse_related).values_list('pk', flat=True)
+        )
+        return related, {instance.pk}
+    related = set(pk_set) if pk_set is not None else set(
+        getattr(instance, forward_related).values_list('pk', flat=True)
+    )
+    return {instance.pk}, related
+
+
+@receiver(m2m_changed, sender=Group.students.through)
+def group_students_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    group_ids, student_ids = _changed_ids(instance, reverse, pk_set, 'students', 'student_groups')
+    Group.objects.filter(pk__in=group_ids).update(updated_at=timezone.now())
+    reset_scope(student_ids)
+
+
+@receiver(m2m_changed, sender=Course.groups.through)
+def course_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    course_ids, group_ids = _changed_ids(instance, reverse, pk_set, 'groups', 'courses')
+    Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+    students = Group.students.through.objects.filter(group_id__in=group_ids).values_list('user_id', flat=True)
+    teachers = Course.objects.filter(pk__in=course_ids).values_list('teacher_id', flat=True)
+    reset_scope(set(students) | set(teachers))
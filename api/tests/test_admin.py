@@ -0,0 +1,150 @@
+import uuid
+
+import pytest
+from django.apps import apps
+from django.contrib import admin
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from api import admin as api_admin, sync
+from api.models import Course, Group, Lesson, Grade, Attendance, ChangeEvent, Job, Tombstone
+
+
+@pytest.fixture
+def staff_client(client, create_user):
+    user = create_user(role='teacher', is_staff=True, is_superuser=True)
+    client.force_login(user)
+    return client
+
+
+@pytest.mark.django_db
+class TestAdmin:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user):
+        self.create_user = create_user
+        self.teacher = create_user(role='teacher', first_name='Анна', last_name='Петрова')
+        self.group = Group.objects.create(name=f'Group {uuid.uuid4().hex}', year=2024)
+        self.course = Course.objects.create(
+            name='Математический анализ', description='Пределы', semester='spring', year=2024, teacher=self.teacher
+        )
+        self.course.groups.add(self.group)
+        self.lessons = [
+            Lesson.objects.create(course=self.course, topic=f'Интегралы {i}', date=timezone.now())
+            for i in range(2)
+        ]
+
+    def add_students(self, count):
+        students = [self.create_user(role='student') for _ in range(count)]
+        self.group.students.add(*students)
+        for student in students:
+            for lesson in self.lessons:
+                Grade.objects.create(lesson=lesson, student=student, value=50)
+                Attendance.objects.create(lesson=lesson, student=student, is_present=False)
+        return students
+
+    def test_every_model_registered(self):
+        for model in apps.get_app_config('api').get_models():
+            assert admin.site.is_registered(model), model.__name__
+
+    @pytest.mark.parametrize('model_name', [
+        'user', 'group', 'course', 'lesson', 'grade', 'attendance', 'archivedlesson', 'archivedgrade',
+        'archivedattendance', 'idempotencykey', 'job', 'changeevent', 'tombstone',
+    ])
+    def test_changelist_opens(self, staff_client, model_name):
+        self.add_students(2)
+        response = staff_client.get(reverse(f'admin:api_{model_name}_changelist'))
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('model_name', ['grade', 'attendance', 'lesson'])
+    def test_changelist_queries_do_not_grow_with_rows(self, staff_client, model_name):
+        url = reverse(f'admin:api_{model_name}_changelist')
+        self.add_students(1)
+        with CaptureQueriesContext(connection) as before:
+            staff_client.get(url)
+        self.add_students(5)
+        with CaptureQueriesContext(connection) as after:
+            staff_client.get(url)
+        assert len(after) == len(before)
+
+    def test_grade_search_by_student_prefix(self, staff_client):
+        student = self.add_students(2)[0]
+        response = staff_client.get(reverse('admin:api_grade_changelist'), {'q': student.username[:-4]})
+        assert response.status_code == 200
+        assert set(response.context['cl'].queryset.values_list('student_id', flat=True)) == {student.id}
+
+    def test_lesson_search_uses_full_text(self, staff_client):
+        Lesson.objects.create(course=self.course, topic='Ряды Фурье', date=timezone.now())
+        response = staff_client.get(reverse('admin:api_lesson_changelist'), {'q': 'фурье'})
+        assert [lesson.topic for lesson in response.context['cl'].queryset] == ['Ряды Фурье']
+
+    def test_delete_selected_records_tombstones(self, staff_client):
+        student = self.add_students(1)[0]
+        grades = list(Grade.objects.filter(student=student))
+        response = staff_client.post(reverse('admin:api_grade_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [grade.id for grade in grades],
+            'post': 'yes',
+        })
+        assert response.status_code == 302
+        assert not Grade.objects.filter(student=student).exists()
+        assert set(
+            Tombstone.objects.filter(user=student, kind=Tombstone.KIND_GRADE).values_list('object_id', flat=True)
+        ) == {grade.id for grade in grades}
+        assert ChangeEvent.objects.filter(user=student, kind='grade', action='deleted').count() == len(grades)
+
+    @pytest.mark.parametrize('model', [Grade, Attendance, Lesson, Group])
+    def test_bulk_delete_queries_do_not_grow_with_rows(self, monkeypatch, model):
+        monkeypatch.setattr(sync, 'PURGE_PROBABILITY', 0)
+        model_admin = admin.site._registry[model]
+        self.add_students(1)
+        with CaptureQueriesContext(connection) as few:
+            with transaction.atomic():
+                model_admin._record_deleted(model.objects.all())
+        self.add_students(5)
+        with CaptureQueriesContext(connection) as many:
+            with transaction.atomic():
+                model_admin._record_deleted(model.objects.all())
+        assert len(many) == len(few)
+
+    def test_bulk_delete_notifies_teacher_and_students(self):
+        students = self.add_students(3)
+        admin.site._registry[Lesson]._record_deleted(Lesson.objects.filter(pk=self.lessons[0].pk))
+        recipients = set(Tombstone.objects.filter(kind=Tombstone.KIND_LESSON).values_list('user_id', 'object_id'))
+        assert recipients == {(user.id, self.lessons[0].pk) for user in students + [self.teacher]}
+
+    def test_mark_present_action(self, staff_client):
+        student = self.add_students(1)[0]
+        attendance = list(Attendance.objects.filter(student=student))
+        before = attendance[0].updated_at
+        response = staff_client.post(reverse('admin:api_attendance_changelist'), {
+            'action': 'mark_present',
+            '_selected_action': [item.id for item in attendance],
+        })
+        assert response.status_code == 302
+        assert all(Attendance.objects.filter(student=student).values_list('is_present', flat=True))
+        assert Attendance.objects.get(pk=attendance[0].pk).updated_at > before
+        assert ChangeEvent.objects.filter(user=student, kind='attendance', action='saved').count() == 2 * len(attendance)
+
+    def test_retry_failed_jobs(self, staff_client):
+        job = Job.objects.create(kind='export', run_after=timezone.now(), status=Job.STATUS_FAILED,
+                                 attempts=3, error='boom', finished_at=timezone.now())
+        staff_client.post(reverse('admin:api_job_changelist'), {'action': 'retry', '_selected_action': [job.id]})
+        job.refresh_from_db()
+        assert (job.status, job.attempts, job.error, job.finished_at) == (Job.STATUS_QUEUED, 0, '', None)
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+    def test_exact_count_without_estimate(self):
+        assert api_admin.estimated_count(Grade.objects.all()) is None
+        assert api_admin.EstimatedCountPaginator(Grade.objects.order_by('id'), 10).count == 0
+
+    def test_uses_estimate_for_unfiltered_queryset(self, monkeypatch):
+        monkeypatch.setattr(api_admin, 'estimated_count', lambda queryset: 2_000_000)
+        assert api_admin.EstimatedCountPaginator(Grade.objects.order_by('id'), 10).count == 2_000_000
+        assert api_admin.EstimatedCountPaginator(Grade.objects.filter(value=5).order_by('id'), 10).count == 0
+
+    def test_small_estimate_is_not_trusted(self, monkeypatch):
+        monkeypatch.setattr(api_admin, 'estimated_count', lambda queryset: 10)
+        assert api_admin.EstimatedCountPaginator(Grade.objects.order_by('id'), 10).count == 0
@@ -0,0 +1,138 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from api import aggregates
+from api.models import Course, Group, Lesson, Grade, Attendance
+
+
+@pytest.mark.django_db
+class TestAggregateFields:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, create_user):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        self.other_student = create_user(role='student')
+        self.third_student = create_user(role='student')
+
+        self.group = Group.objects.create(name=f'Group A {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student, self.other_student)
+        self.other_group = Group.objects.create(name=f'Group B {uuid.uuid4().hex}', year=2024)
+        self.other_group.students.add(self.third_student)
+
+        self.course = self.create_course('Math', self.group, self.other_group)
+        self.small_course = self.create_course('Physics', self.group)
+        self.empty_course = self.create_course('Empty')
+
+        now = timezone.now()
+        self.past = [
+            Lesson.objects.create(course=self.course, topic=f'Past {i}', date=now - timezone.timedelta(days=i + 1))
+            for i in range(2)
+        ]
+        self.next_lesson = Lesson.objects.create(
+            course=self.course, topic='Next', date=now + timezone.timedelta(days=1)
+        )
+        Lesson.objects.create(course=self.course, topic='Later', date=now + timezone.timedelta(days=3))
+        Lesson.objects.create(course=self.small_course, topic='Past', date=now - timezone.timedelta(days=1))
+
+        lesson = self.past[0]
+        Grade.objects.create(lesson=lesson, student=self.student, value=80)
+        Grade.objects.create(lesson=lesson, student=self.other_student, value=91)
+        Grade.objects.create(lesson=lesson, student=self.third_student, value=10)
+        Attendance.objects.create(lesson=lesson, student=self.student, is_present=True)
+        Attendance.objects.create(lesson=lesson, student=self.other_student, is_present=False)
+        Attendance.objects.create(lesson=lesson, student=self.third_student, is_present=True)
+
+    def create_course(self, name, *groups):
+        course = Course.objects.create(
+            name=name, description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        course.groups.add(*groups)
+        return course
+
+    def by_id(self, response):
+        assert response.status_code == status.HTTP_200_OK
+        return {item['id']: item for item in response.json()}
+
+    def test_course_list(self):
+        courses = self.by_id(self.teacher_client.get(reverse('course-list')))
+
+        course = courses[self.course.id]
+        assert course['student_count'] == 3
+        assert course['lesson_count'] == 4
+        assert course['next_lesson_at'] == serializers.DateTimeField().to_representation(self.next_lesson.date)
+        assert course['avg_grade'] == 60.33
+        assert course['attendance_rate'] == 0.6667
+
+        assert courses[self.small_course.id]['student_count'] == 2
+        assert courses[self.small_course.id]['next_lesson_at'] is None
+
+        empty = courses[self.empty_course.id]
+        assert (empty['student_count'], empty['lesson_count']) == (0, 0)
+        assert empty['avg_grade'] is None and empty['attendance_rate'] is None
+
+    def test_course_detail(self):
+        response = self.student_client.get(reverse('course-detail', args=[self.course.id]))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['lesson_count'] == 4
+        assert len(response.json()['groups']) == 2
+
+    def test_group_list(self):
+        groups = self.by_id(self.teacher_client.get(reverse('group-list')))
+
+        group = groups[self.group.id]
+        assert group['student_count'] == 2
+        assert group['lesson_count'] == 5
+        assert group['avg_grade'] == 85.5
+        assert group['attendance_rate'] == 0.5
+
+        other = groups[self.other_group.id]
+        assert (other['student_count'], other['lesson_count']) == (1, 4)
+        assert other['avg_grade'] == 10.0
+        assert other['attendance_rate'] == 1.0
+
+    def test_student_sees_own_group(self):
+        groups = self.by_id(self.student_client.get(reverse('group-list')))
+        assert list(groups) == [self.group.id]
+        assert groups[self.group.id]['student_count'] == 2
+
+    def test_query_count_does_not_grow_with_rows(self):
+        url = reverse('course-list')
+        with CaptureQueriesContext(connection) as before:
+            self.teacher_client.get(url)
+        for index in range(3):
+            self.create_course(f'Extra {index}', self.group)
+        with CaptureQueriesContext(connection) as after:
+            response = self.teacher_client.get(url)
+        assert len(response.json()) == 6
+        assert len(after) == len(before)
+
+    def test_write_response_has_no_aggregates(self):
+        response = self.teacher_client.patch(
+            reverse('course-detail', args=[self.course.id]), {'name': 'Algebra'}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['name'] == 'Algebra'
+        assert 'student_count' not in response.json()
+
+    def test_other_reads_skip_aggregates(self, monkeypatch):
+        annotated = []
+
+        def annotate_courses(queryset, now=None):
+            annotated.append(queryset)
+            return queryset
+
+        monkeypatch.setattr(aggregates, 'annotate_courses', annotate_courses)
+        response = self.teacher_client.get(reverse('course-export', args=[self.course.id]))
+        assert response.status_code == status.HTTP_200_OK
+        b''.join(response.streaming_content)
+        response = self.student_client.get(reverse('course-my-grades', args=[self.course.id]))
+        assert response.status_code == status.HTTP_200_OK
+        assert annotated == []
+
+        assert self.teacher_client.get(reverse('course-detail', args=[self.course.id])).status_code == status.HTTP_200_OK
+        assert len(annotated) == 1
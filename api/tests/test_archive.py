@@ -0,0 +1,82 @@
+import uuid
+
+import pytest
+from django.core.management import call_command, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api.models import (
+    Course, Group, Lesson, Grade, Attendance,
+    ArchivedLesson, ArchivedGrade, ArchivedAttendance,
+)
+
+
+@pytest.mark.django_db
+class TestSemesterArchive:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+
+        self.course = Course.objects.create(
+            name='Old Course',
+            description='Test Description',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+
+        self.lesson = Lesson.objects.create(
+            course=self.course,
+            topic='Past Lesson',
+            date=timezone.now() - timezone.timedelta(days=30)
+        )
+        self.grade = Grade.objects.create(lesson=self.lesson, student=self.student, value=77)
+        self.attendance = Attendance.objects.create(lesson=self.lesson, student=self.student, is_present=True)
+
+    def test_archive_moves_rows(self):
+        call_command('archive_semester', year=2024, semester='spring')
+
+        assert not Lesson.objects.filter(course=self.course).exists()
+        assert not Grade.objects.exists()
+        assert not Attendance.objects.exists()
+
+        archived_lesson = ArchivedLesson.objects.get(id=self.lesson.id)
+        assert archived_lesson.topic == 'Past Lesson'
+        assert ArchivedGrade.objects.get(id=self.grade.id).value == 77
+        assert ArchivedAttendance.objects.get(id=self.attendance.id).is_present
+
+    def test_other_semesters_untouched(self):
+        call_command('archive_semester', year=2024, semester='autumn')
+        assert Lesson.objects.filter(id=self.lesson.id).exists()
+        assert not ArchivedLesson.objects.exists()
+
+    def test_refuses_semester_with_upcoming_lessons(self):
+        Lesson.objects.create(
+            course=self.course,
+            topic='Future Lesson',
+            date=timezone.now() + timezone.timedelta(days=1)
+        )
+        with pytest.raises(CommandError):
+            call_command('archive_semester', year=2024, semester='spring')
+        assert not ArchivedLesson.objects.exists()
+
+    def test_history_endpoints_read_archive(self):
+        before = self.student_client.get(reverse('grade-my-grades')).data
+        course_before = self.student_client.get(reverse('course-my-grades', args=[self.course.id])).data
+        attendance_before = self.student_client.get(reverse('attendance-list')).data
+
+        call_command('archive_semester', year=2024, semester='spring')
+
+        response = self.student_client.get(reverse('grade-my-grades'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == before
+
+        response = self.student_client.get(reverse('course-my-grades', args=[self.course.id]))
+        assert response.data == course_before
+
+        response = self.student_client.get(reverse('attendance-list'))
+        assert response.data == attendance_before
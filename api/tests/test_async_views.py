@@ -0,0 +1,111 @@
+import json
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from api import async_views
+from api.models import Course, Group, Lesson, Grade
+
+
+def call_async(view, path, user=None, method='get', **kwargs):
+    headers = {}
+    if user is not None:
+        headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+    request = getattr(AsyncRequestFactory(), method)(path, headers=headers)
+    return async_to_sync(view)(request, **kwargs)
+
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+
+        self.course = Course.objects.create(
+            name='Test Course',
+            description='Test Description',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+
+        self.lesson = Lesson.objects.create(
+            course=self.course,
+            topic='Test Lesson',
+            date=timezone.now() + timezone.timedelta(days=1)
+        )
+        Grade.objects.create(lesson=self.lesson, student=self.student, value=90)
+
+    def assert_same(self, sync_response, async_response):
+        assert async_response.status_code == sync_response.status_code
+        assert json.loads(async_response.content) == json.loads(sync_response.content)
+
+    def test_course_list_matches_sync(self):
+        url = reverse('course-list')
+        for client, user in ((self.teacher_client, self.teacher), (self.student_client, self.student)):
+            self.assert_same(client.get(url), call_async(async_views.course_list_view, url, user))
+
+    def test_normalized_lists_match_sync(self):
+        for name, view in (('course-list', async_views.course_list_view), ('lesson-list', async_views.lesson_list_view)):
+            url = f"{reverse(name)}?format=normalized"
+            self.assert_same(self.teacher_client.get(url), call_async(view, url, self.teacher))
+
+    def test_lesson_list_matches_sync(self):
+        url = reverse('lesson-list')
+        for client, user in ((self.teacher_client, self.teacher), (self.student_client, self.student)):
+            self.assert_same(client.get(url), call_async(async_views.lesson_list_view, url, user))
+
+    def test_course_my_grades_matches_sync(self):
+        url = reverse('course-my-grades', args=[self.course.id])
+        for client, user in ((self.teacher_client, self.teacher), (self.student_client, self.student)):
+            self.assert_same(
+                client.get(url),
+                call_async(async_views.course_my_grades_view, url, user, pk=self.course.id)
+            )
+
+    def test_course_my_grades_unknown_course(self):
+        url = reverse('course-my-grades', args=[self.course.id + 1])
+        self.assert_same(
+            self.student_client.get(url),
+            call_async(async_views.course_my_grades_view, url, self.student, pk=self.course.id + 1)
+        )
+
+    def test_grade_my_grades_matches_sync(self):
+        url = reverse('grade-my-grades')
+        for client, user in ((self.teacher_client, self.teacher), (self.student_client, self.student)):
+            self.assert_same(client.get(url), call_async(async_views.grade_my_grades_view, url, user))
+
+    def test_user_me_matches_sync(self):
+        url = reverse('user-me')
+        self.assert_same(
+            self.student_client.get(url),
+            call_async(async_views.user_me_view, url, self.student)
+        )
+
+    def test_unauthenticated(self):
+        response = call_async(async_views.course_list_view, reverse('course-list'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'].startswith('Bearer')
+
+    def test_write_delegates_to_viewset(self):
+        response = call_async(
+            async_views.course_list_view, reverse('course-list'), self.student, method='post'
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_list_filters_match_sync(self):
+        url = reverse('course-list') + '?semester=autumn'
+        self.assert_same(self.teacher_client.get(url), call_async(async_views.course_list_view, url, self.teacher))
+        url = reverse('lesson-list') + f'?course={self.course.id}&date_after=2000-01-01T00:00:00Z'
+        self.assert_same(self.student_client.get(url), call_async(async_views.lesson_list_view, url, self.student))
+        url = reverse('lesson-list') + '?course=abc'
+        self.assert_same(self.teacher_client.get(url), call_async(async_views.lesson_list_view, url, self.teacher))
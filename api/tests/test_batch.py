@@ -0,0 +1,105 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api import batch
+from api.models import Course, Group, Lesson, Grade
+
+
+@pytest.mark.django_db
+class TestBatch:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+
+        self.course = Course.objects.create(
+            name='Test Course', description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+        self.lesson = Lesson.objects.create(
+            course=self.course, topic='Lesson', date=timezone.now() + timezone.timedelta(days=1)
+        )
+        self.url = reverse('batch')
+
+    def post(self, client, requests, **extra):
+        return client.post(self.url, {'requests': requests, **extra}, format='json')
+
+    def grade(self, value):
+        return {
+            'method': 'POST',
+            'path': reverse('grade-list'),
+            'body': {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': value},
+        }
+
+    def test_reads_match_individual_calls(self):
+        paths = [reverse('user-me'), reverse('course-list'), reverse('lesson-list') + f'?course={self.course.id}']
+        response = self.post(self.teacher_client, [{'method': 'GET', 'path': path} for path in paths])
+        assert response.status_code == status.HTTP_200_OK
+        for path, item in zip(paths, response.data['responses']):
+            direct = self.teacher_client.get(path)
+            assert item['status'] == direct.status_code
+            assert item['body'] == direct.data
+
+    def test_auth_shared_with_subrequests(self, django_assert_num_queries):
+        # Пользователь загружается из токена один раз на весь пакет
+        with django_assert_num_queries(1):
+            response = self.post(self.student_client, [{'path': reverse('user-me')}] * 3)
+        assert [item['body']['id'] for item in response.data['responses']] == [self.student.id] * 3
+
+    def test_errors_are_per_request(self):
+        response = self.post(self.student_client, [
+            {'path': reverse('course-detail', args=[self.course.id])},
+            {'path': '/api/unknown/'},
+            {'method': 'POST', 'path': reverse('course-list'), 'body': {'name': 'x'}},
+        ])
+        statuses = [item['status'] for item in response.data['responses']]
+        assert statuses == [200, 404, 403]
+
+    def test_non_atomic_writes_are_kept(self):
+        response = self.post(self.teacher_client, [self.grade(90), self.grade(80)])
+        assert [item['status'] for item in response.data['responses']] == [201, 400]
+        assert Grade.objects.get().value == 90
+
+    def test_atomic_batch_rolls_back(self):
+        response = self.post(
+            self.teacher_client,
+            [self.grade(90), self.grade(80), {'path': reverse('user-me')}],
+            atomic=True,
+        )
+        assert response.data['committed'] is False
+        assert [item['status'] for item in response.data['responses']] == [201, 400, 424]
+        assert not Grade.objects.exists()
+
+    def test_atomic_batch_commits(self):
+        response = self.post(
+            self.teacher_client,
+            [self.grade(90), {'method': 'PATCH', 'path': reverse('lesson-detail', args=[self.lesson.id]),
+                              'body': {'topic': 'Renamed'}}],
+            atomic=True,
+        )
+        assert response.data['committed'] is True
+        assert Grade.objects.count() == 1
+        self.lesson.refresh_from_db()
+        assert self.lesson.topic == 'Renamed'
+
+    def test_validation(self):
+        assert self.post(self.teacher_client, []).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.post(self.teacher_client, [{'path': '/admin/'}]).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.post(self.teacher_client, [{'method': 'TRACE', 'path': '/api/'}]).status_code == 400
+        too_many = [{'path': reverse('user-me')}] * (batch.BATCH_MAX_REQUESTS + 1)
+        assert self.post(self.teacher_client, too_many).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_nested_batch_rejected(self):
+        response = self.post(self.teacher_client, [
+            {'method': 'POST', 'path': self.url, 'body': {'requests': [{'path': reverse('user-me')}]}}
+        ])
+        assert response.data['responses'][0]['status'] == status.HTTP_400_BAD_REQUEST
+
+    def test_unauthenticated(self, api_client):
+        response = api_client.post(self.url, {'requests': [{'path': reverse('user-me')}]}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
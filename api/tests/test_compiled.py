@@ -0,0 +1,119 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from api import aggregates, compiled
+from api import serializers as api_serializers
+from api.models import Course, Group, Lesson, Grade, Attendance, Job, User
+from api.renderers import FastJSONRenderer
+
+COMPILED_SERIALIZERS = [
+    (api_serializers.UserSerializer, lambda: User.objects.all()),
+    (api_serializers.GroupSerializer, lambda: Group.objects.all()),
+    (api_serializers.CourseSerializer, lambda: Course.objects.all()),
+    (api_serializers.LessonSerializer, lambda: Lesson.objects.all()),
+    (api_serializers.GradeSerializer, lambda: Grade.objects.order_by('-id')),
+    (api_serializers.AttendanceSerializer, lambda: Attendance.objects.all()),
+    (api_serializers.JobSerializer, lambda: Job.objects.all()),
+]
+
+
+@pytest.mark.django_db
+class TestCompiledSerializers:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, create_user):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.students = [create_user(role='student', bio='Био') for _ in range(3)]
+        self.students.append(create_user(role='student', first_name='', bio=''))
+
+        group = Group.objects.create(name=f'Group {uuid.uuid4().hex}', year=2024)
+        group.students.add(*self.students)
+        Group.objects.create(name=f'Empty {uuid.uuid4().hex}', year=2023)
+        course = Course.objects.create(
+            name='Курс', description='Описание', semester='autumn', year=2024, teacher=self.teacher
+        )
+        course.groups.add(group)
+
+        now = timezone.now()
+        for day in range(2):
+            lesson = Lesson.objects.create(
+                course=course, topic=f'Тема {day}', date=now + timezone.timedelta(days=day + 1, microseconds=day)
+            )
+            for student in self.students:
+                Grade.objects.create(lesson=lesson, student=student, value=day * 50, comment=None if day else 'ok')
+                Attendance.objects.create(lesson=lesson, student=student, is_present=bool(day))
+        Job.objects.create(kind='export', created_by=self.teacher, run_after=now, status=Job.STATUS_SUCCEEDED,
+                           result={'rows': [1, 2]}, finished_at=now)
+        Job.objects.create(kind='export', created_by=self.teacher, run_after=now)
+
+    def test_compiled_at_startup(self):
+        for serializer_class, _ in COMPILED_SERIALIZERS:
+            assert compiled.compiled_for(serializer_class) is not None
+
+    @pytest.mark.parametrize('serializer_class, queryset', COMPILED_SERIALIZERS)
+    def test_matches_serializer(self, serializer_class, queryset):
+        represent = compiled.compiled_for(serializer_class)
+        for instance in queryset():
+            assert represent(instance) == serializer_class(instance).data
+
+    @pytest.mark.parametrize('serializer_class, queryset', COMPILED_SERIALIZERS)
+    def test_many_matches_generic_list(self, serializer_class, queryset):
+        # Сравниваются байты ответа, чтобы совпадал и порядок ключей
+        renderer = FastJSONRenderer()
+        generic = serializers.ListSerializer(child=serializer_class())
+        expected = renderer.render(generic.to_representation(queryset()))
+        result = serializer_class(queryset(), many=True)
+        assert renderer.render(result.data) == expected
+
+    def test_prefetched_matches_generic_list(self):
+        grades = Grade.objects.select_related('lesson__course__teacher', 'student').prefetch_related(
+            'lesson__course__groups__students'
+        )
+        generic = serializers.ListSerializer(child=api_serializers.GradeSerializer())
+        assert api_serializers.GradeSerializer(grades, many=True).data == generic.to_representation(grades)
+
+    def test_many_uses_compiled_list(self):
+        result = api_serializers.GradeSerializer(Grade.objects.all(), many=True)
+        assert isinstance(result, compiled.CompiledListSerializer)
+
+    def test_unsaved_values_converted_like_serializer(self):
+        grade = Grade(id=1, lesson=Lesson.objects.first(), student=self.students[0], value='7', comment=12)
+        expected = api_serializers.GradeSerializer(grade).data
+        assert compiled.compiled_for(api_serializers.GradeSerializer)(grade) == expected
+        assert expected['value'] == 7 and expected['comment'] == '12'
+
+    def test_method_field_is_not_compiled(self):
+        class WithMethod(serializers.ModelSerializer):
+            full_name = serializers.SerializerMethodField()
+
+            class Meta:
+                model = User
+                fields = ['id', 'full_name']
+                list_serializer_class = compiled.CompiledListSerializer
+
+            def get_full_name(self, obj):
+                return obj.get_full_name()
+
+        with pytest.raises(compiled.CompileError):
+            compiled.compile_serializer(WithMethod)
+        data = WithMethod(User.objects.filter(id=self.teacher.id), many=True).data
+        assert data == [{'id': self.teacher.id, 'full_name': self.teacher.get_full_name()}]
+
+    def test_dotted_source_is_not_compiled(self):
+        class WithDotted(serializers.ModelSerializer):
+            course_name = serializers.CharField(source='course.name')
+
+            class Meta:
+                model = Lesson
+                fields = ['id', 'course_name']
+
+        with pytest.raises(compiled.CompileError):
+            compiled.compile_serializer(WithDotted)
+
+    def test_list_endpoint(self):
+        response = self.teacher_client.get(reverse('group-list'))
+        assert response.status_code == status.HTTP_200_OK
+        expected = api_serializers.GroupStatsSerializer(aggregates.annotate_groups(Group.objects.all()), many=True).data
+        assert response.json() == expected
@@ -0,0 +1,158 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api.models import Course, Group, Lesson, Grade, Attendance
+
+
+@pytest.mark.django_db
+class TestStudentDashboard:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        _, self.other_student = auth_client(role='student')
+
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student, self.other_student)
+
+        self.url = reverse('dashboard-student')
+
+    def create_course(self, name, lessons=2):
+        course = Course.objects.create(
+            name=name, description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        course.groups.add(self.group)
+        now = timezone.now()
+        past = [
+            Lesson.objects.create(course=course, topic=f'{name} past {i}', date=now - timezone.timedelta(days=i + 1))
+            for i in range(lessons)
+        ]
+        future = Lesson.objects.create(course=course, topic=f'{name} next', date=now + timezone.timedelta(days=1))
+        return course, past, future
+
+    def test_aggregates(self):
+        course, (first, second), future = self.create_course('Math')
+        empty_course, _, _ = self.create_course('Empty')
+        Grade.objects.create(lesson=first, student=self.student, value=80)
+        Grade.objects.create(lesson=second, student=self.student, value=91)
+        Grade.objects.create(lesson=first, student=self.other_student, value=10)
+        Attendance.objects.create(lesson=first, student=self.student, is_present=True)
+        Attendance.objects.create(lesson=second, student=self.student, is_present=False)
+        Attendance.objects.create(lesson=first, student=self.other_student, is_present=False)
+
+        response = self.student_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+
+        assert data['user']['id'] == self.student.id
+        courses = {c['id']: c for c in data['courses']}
+        assert courses[course.id]['average_grade'] == 85.5
+        assert courses[course.id]['grade_count'] == 2
+        assert courses[course.id]['attendance_rate'] == 0.5
+        assert courses[course.id]['teacher_last_name'] == self.teacher.last_name
+        assert courses[empty_course.id]['average_grade'] is None
+        assert courses[empty_course.id]['grade_count'] == 0
+        assert courses[empty_course.id]['attendance_rate'] is None
+
+        assert {lesson['course_name'] for lesson in data['upcoming_lessons']} == {'Math', 'Empty'}
+        assert [grade['value'] for grade in data['recent_grades']] == [80, 91]
+        assert data['recent_grades'][0]['lesson_topic'] == first.topic
+
+    def test_query_count_does_not_grow(self, django_assert_max_num_queries):
+        for i in range(5):
+            course, lessons, _ = self.create_course(f'Course {i}', lessons=3)
+            for lesson in lessons:
+                Grade.objects.create(lesson=lesson, student=self.student, value=70 + i)
+                Attendance.objects.create(lesson=lesson, student=self.student, is_present=True)
+
+        with django_assert_max_num_queries(6):
+            response = self.student_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['courses']) == 5
+
+    def test_teacher_forbidden(self):
+        response = self.teacher_client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestTeacherDashboard:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        _, self.other_student = auth_client(role='student')
+        _, self.other_teacher = auth_client(role='teacher')
+        self.url = reverse('dashboard-teacher')
+
+    def create_course(self, name, teacher=None, year=2024, students=()):
+        course = Course.objects.create(
+            name=name, description='-', semester='spring', year=year, teacher=teacher or self.teacher
+        )
+        group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=year)
+        group.students.add(*students)
+        course.groups.add(group)
+        return course
+
+    def test_aggregates(self):
+        course = self.create_course('Math', students=(self.student, self.other_student))
+        self.create_course('Foreign', teacher=self.other_teacher, students=(self.student,))
+        now = timezone.now()
+        graded = Lesson.objects.create(course=course, topic='Graded', date=now - timezone.timedelta(days=2))
+        Lesson.objects.create(course=course, topic='Ungraded', date=now - timezone.timedelta(days=1))
+        upcoming = Lesson.objects.create(course=course, topic='Next', date=now + timezone.timedelta(days=1))
+        Lesson.objects.create(course=course, topic='Later', date=now + timezone.timedelta(days=5))
+        Grade.objects.create(lesson=graded, student=self.student, value=60)
+        Grade.objects.create(lesson=graded, student=self.other_student, value=90)
+        Attendance.objects.create(lesson=graded, student=self.student, is_present=True)
+        Attendance.objects.create(lesson=graded, student=self.other_student, is_present=True)
+        Attendance.objects.create(lesson=upcoming, student=self.student, is_present=False)
+        Attendance.objects.create(lesson=upcoming, student=self.other_student, is_present=True)
+
+        response = self.teacher_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        [stats] = response.data['courses']
+        assert stats['id'] == course.id
+        assert stats['student_count'] == 2
+        assert stats['lesson_count'] == 4
+        assert stats['upcoming_lesson_count'] == 2
+        assert stats['next_lesson_date'] == upcoming.date
+        assert stats['ungraded_lesson_count'] == 1
+        assert stats['average_grade'] == 75
+        assert stats['attendance_rate'] == 0.75
+        assert [lesson['topic'] for lesson in response.data['upcoming_lessons']] == ['Next', 'Later']
+
+    def test_empty_course(self):
+        course = self.create_course('Empty')
+        [stats] = self.teacher_client.get(self.url).data['courses']
+        assert stats['id'] == course.id
+        assert stats['student_count'] == 0
+        assert stats['lesson_count'] == 0
+        assert stats['next_lesson_date'] is None
+        assert stats['average_grade'] is None
+        assert stats['attendance_rate'] is None
+
+    def test_year_filter(self):
+        self.create_course('Old', year=2023)
+        current = self.create_course('Current', year=2024)
+        response = self.teacher_client.get(self.url, {'year': 2024})
+        assert [c['id'] for c in response.data['courses']] == [current.id]
+
+    def test_query_count_does_not_grow(self, django_assert_max_num_queries):
+        now = timezone.now()
+        for i in range(15):
+            course = self.create_course(f'Course {i}', students=(self.student,))
+            for days in (-2, -1, 1):
+                lesson = Lesson.objects.create(course=course, topic='-', date=now + timezone.timedelta(days=days))
+                Grade.objects.create(lesson=lesson, student=self.student, value=50 + i)
+
+        with django_assert_max_num_queries(3):
+            response = self.teacher_client.get(self.url)
+        assert len(response.data['courses']) == 15
+
+    def test_student_forbidden(self):
+        response = self.student_client.get(self.url)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from api import events
+from api.async_views import events_view
+from api.models import Course, Group, Lesson, Grade, Attendance, ChangeEvent
+
+
+def parse_sse(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+    return fields['event'], json.loads(fields['data']), int(fields['id'])
+
+
+async def read_chunks(response, count, timeout=5):
+    content = response.streaming_content
+    chunks = []
+    try:
+        for _ in range(count):
+            chunk = await asyncio.wait_for(content.__anext__(), timeout)
+            chunks.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+    finally:
+        await content.aclose()
+    return chunks
+
+
+@pytest.mark.django_db
+class TestChangeEvents:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        _, self.other_student = auth_client(role='student')
+
+        self.course = Course.objects.create(
+            name='Test Course',
+            description='Test Description',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student, self.other_student)
+        self.course.groups.add(self.group)
+        self.lesson = Lesson.objects.create(
+            course=self.course,
+            topic='Test Lesson',
+            date=timezone.now() + timezone.timedelta(days=1)
+        )
+
+    def open_stream(self, user, **headers):
+        if user is not None:
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+        return AsyncRequestFactory().get('/api/events/', headers=headers)
+
+    def test_grade_save_records_event_for_student(self):
+        grade = Grade.objects.create(lesson=self.lesson, student=self.student, value=80, comment='ok')
+        grade.value = 95
+        grade.save()
+
+        recorded = list(ChangeEvent.objects.filter(user=self.student).order_by('id'))
+        assert [(event.kind, event.action) for event in recorded] == [('grade', 'saved')] * 2
+        assert recorded[-1].payload == {'id': grade.id, 'lesson_id': self.lesson.id, 'value': 95, 'comment': 'ok'}
+        assert not ChangeEvent.objects.filter(user=self.other_student).exists()
+
+    def test_delete_through_api_records_event(self):
+        attendance = Attendance.objects.create(lesson=self.lesson, student=self.student, is_present=True)
+        response = self.teacher_client.delete(reverse('attendance-detail', args=[attendance.id]))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        event = ChangeEvent.objects.filter(user=self.student).latest('id')
+        assert (event.kind, event.action) == ('attendance', 'deleted')
+        assert event.payload == {'id': attendance.id, 'lesson_id': self.lesson.id}
+
+    def test_api_write_rolls_back_without_event(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError('event store unavailable')
+
+        monkeypatch.setattr(events.ChangeEvent.objects, 'create', fail)
+        response = self.teacher_client.post(
+            reverse('grade-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': 90},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert not Grade.objects.exists()
+
+        response = self.teacher_client.post(
+            reverse('attendance-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'is_present': True},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert not Attendance.objects.exists()
+
+    def test_publish_after_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            grade = Grade.objects.create(lesson=self.lesson, student=self.student, value=70)
+        assert len(callbacks) == 1
+
+        async def scenario():
+            queue = events.broker.subscribe(self.student.pk)
+            try:
+                # on_commit синхронного ViewSet выполняется в другом потоке
+                await asyncio.get_running_loop().run_in_executor(None, callbacks[0])
+                return await asyncio.wait_for(queue.get(), 5)
+            finally:
+                events.broker.unsubscribe(self.student.pk, queue)
+
+        message = async_to_sync(scenario)()
+        assert message['event'] == 'grade.saved'
+        assert message['data']['id'] == grade.id
+
+    def test_stream_replays_missed_events(self):
+        first = Grade.objects.create(lesson=self.lesson, student=self.student, value=60)
+        Grade.objects.create(lesson=self.lesson, student=self.other_student, value=70)
+        last_seen = ChangeEvent.objects.get(object_id=first.id).id
+        first.value = 75
+        first.save()
+
+        async def scenario():
+            response = await events_view(self.open_stream(self.student, **{'Last-Event-ID': str(last_seen)}))
+            assert response.status_code == status.HTTP_200_OK
+            assert response['Content-Type'] == 'text/event-stream'
+            return await read_chunks(response, 2)
+
+        retry, chunk = async_to_sync(scenario)()
+        assert retry.startswith('retry:')
+        event, data, event_id = parse_sse(chunk)
+        assert event == 'grade.saved'
+        assert data['value'] == 75
+        assert event_id > last_seen
+
+    def test_stream_delivers_live_events_once(self):
+        message = {'id': 10 ** 9, 'user_id': self.student.pk, 'event': 'grade.saved', 'data': {'value': 100}}
+
+        async def scenario():
+            response = await events_view(self.open_stream(self.student))
+            content = response.streaming_content
+            assert (await content.__anext__()).startswith(b'retry:')
+            pending = asyncio.ensure_future(content.__anext__())
+            await asyncio.sleep(0)
+            # То же событие из pub/sub и из опроса таблицы отправляется один раз
+            events.broker.publish(message)
+            events.broker.publish(message)
+            events.broker.publish({**message, 'id': message['id'] + 1})
+            chunks = [await asyncio.wait_for(pending, 5), await asyncio.wait_for(content.__anext__(), 5)]
+            await content.aclose()
+            return [chunk.decode() for chunk in chunks]
+
+        chunks = async_to_sync(scenario)()
+        assert [parse_sse(chunk)[2] for chunk in chunks] == [message['id'], message['id'] + 1]
+        assert not events.broker.has_subscribers()
+
+    def test_stream_skips_events_before_subscription(self):
+        grade = Grade.objects.create(lesson=self.lesson, student=self.student, value=60)
+        old = events.as_message(ChangeEvent.objects.get(object_id=grade.id))
+        grade.value = 90
+
+        async def scenario():
+            response = await events_view(self.open_stream(self.student))
+            content = response.streaming_content
+            assert (await content.__anext__()).startswith(b'retry:')
+            pending = asyncio.ensure_future(content.__anext__())
+            await asyncio.sleep(0.1)
+            # Опрос таблицы перечитывает событие, записанное до подключения
+            events.broker.publish(old)
+            await sync_to_async(grade.save)()
+            new = await sync_to_async(ChangeEvent.objects.latest)('id')
+            events.broker.publish(events.as_message(new))
+            chunk = await asyncio.wait_for(pending, 5)
+            await content.aclose()
+            return chunk.decode()
+
+        event, data, event_id = parse_sse(async_to_sync(scenario)())
+        assert event_id > old['id']
+        assert data['value'] == 90
+
+    def test_poll_survives_errors(self, monkeypatch):
+        calls = []
+
+        def events_after(event_id, user_id=None):
+            calls.append(event_id)
+            if len(calls) == 1:
+                raise RuntimeError('database unavailable')
+            return []
+
+        monkeypatch.setattr(events, 'EVENT_POLL_SECONDS', 0)
+        monkeypatch.setattr(events, 'events_after', events_after)
+        broker = events.Broker()
+
+        async def scenario():
+            queue = broker.subscribe(self.student.pk)
+            try:
+                for _ in range(100):
+                    if len(calls) >= 2:
+                        break
+                    await asyncio.sleep(0.01)
+                return broker._poller.done()
+            finally:
+                broker.unsubscribe(self.student.pk, queue)
+
+        assert async_to_sync(scenario)() is False
+        assert len(calls) >= 2
+
+    def test_purge_runs_after_commit(self, monkeypatch, django_capture_on_commit_callbacks):
+        expired = ChangeEvent.objects.create(
+            user=self.student, kind='grade', action='saved', object_id=0, payload={}
+        )
+        ChangeEvent.objects.filter(id=expired.id).update(
+            created_at=timezone.now() - timezone.timedelta(hours=events.EVENT_TTL_HOURS + 1)
+        )
+        monkeypatch.setattr(events, 'PURGE_PROBABILITY', 1)
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            Grade.objects.create(lesson=self.lesson, student=self.student, value=70)
+        assert ChangeEvent.objects.filter(id=expired.id).exists()
+        for callback in callbacks:
+            callback()
+        assert not ChangeEvent.objects.filter(id=expired.id).exists()
+
+    def test_stream_accepts_token_query_param(self):
+        token = RefreshToken.for_user(self.student).access_token
+        request = AsyncRequestFactory().get('/api/events/', {'token': str(token)})
+
+        async def scenario():
+            response = await events_view(request)
+            assert response.status_code == status.HTTP_200_OK
+            return await read_chunks(response, 1)
+
+        assert async_to_sync(scenario)()[0].startswith('retry:')
+
+    def test_stream_requires_authentication(self):
+        response = async_to_sync(events_view)(self.open_stream(None))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_stream_rejects_invalid_last_event_id(self):
+        request = self.open_stream(self.student, **{'Last-Event-ID': 'abc'})
+        response = async_to_sync(events_view)(request)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stream_requires_asgi(self):
+        response = self.student_client.get(reverse('events'))
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+        assert 'error' in response.json()
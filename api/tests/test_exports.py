@@ -0,0 +1,93 @@
+import csv
+import io
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api.models import Course, Group, Lesson, Grade, Attendance
+
+
+def read_csv(response):
+    content = b''.join(response.streaming_content).decode('utf-8')
+    return list(csv.reader(io.StringIO(content)))
+
+
+@pytest.mark.django_db
+class TestCourseExportAPI:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+
+        self.course = Course.objects.create(
+            name='Test Course',
+            description='Test Description',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+
+        self.lesson = Lesson.objects.create(
+            course=self.course,
+            topic='Test Lesson',
+            date=timezone.now() + timezone.timedelta(days=1)
+        )
+        Grade.objects.create(lesson=self.lesson, student=self.student, value=90, comment='Отлично')
+        Attendance.objects.create(lesson=self.lesson, student=self.student, is_present=True)
+
+        self.url = reverse('course-export', args=[self.course.id])
+
+    def test_export_csv(self):
+        response = self.teacher_client.get(self.url, {'format': 'csv'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'attachment' in response['Content-Disposition']
+
+        rows = read_csv(response)
+        assert rows[0][0] == 'record'
+        assert len(rows) == 3
+        grade_row, attendance_row = rows[1], rows[2]
+        assert grade_row[0] == 'grade'
+        assert grade_row[4] == str(self.student.id)
+        assert grade_row[8] == '90'
+        assert grade_row[9] == 'Отлично'
+        assert attendance_row[0] == 'attendance'
+        assert attendance_row[10] == '1'
+
+    def test_export_include_grades_only(self):
+        response = self.teacher_client.get(self.url, {'format': 'csv', 'include': 'grades'})
+        assert response.status_code == status.HTTP_200_OK
+        rows = read_csv(response)
+        assert [row[0] for row in rows[1:]] == ['grade']
+
+    def test_export_xlsx(self):
+        openpyxl = pytest.importorskip('openpyxl')
+        response = self.teacher_client.get(self.url, {'format': 'xlsx'})
+        assert response.status_code == status.HTTP_200_OK
+
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        assert workbook.sheetnames == ['grades', 'attendance']
+        rows = list(workbook['grades'].values)
+        assert rows[1][8] == 90
+
+    def test_export_invalid_format(self):
+        response = self.teacher_client.get(self.url, {'format': 'pdf'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_export_invalid_include(self):
+        response = self.teacher_client.get(self.url, {'include': 'grades,homework'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_student_cannot_export(self):
+        response = self.student_client.get(self.url, {'format': 'csv'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_other_teacher_cannot_export(self, auth_client):
+        other_client, _ = auth_client(role='teacher')
+        response = other_client.get(self.url, {'format': 'csv'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api.models import Course, Group, Lesson, Grade, Attendance, ArchivedLesson, ArchivedAttendance
+
+
+@pytest.mark.django_db
+class TestListFilters:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.other_client, self.other_teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        _, self.other_student = auth_client(role='student')
+
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+
+        self.spring = Course.objects.create(
+            name='Spring', description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        self.autumn = Course.objects.create(
+            name='Autumn', description='-', semester='autumn', year=2023, teacher=self.teacher
+        )
+        self.foreign = Course.objects.create(
+            name='Foreign', description='-', semester='spring', year=2024, teacher=self.other_teacher
+        )
+        for course in (self.spring, self.autumn, self.foreign):
+            course.groups.add(self.group)
+
+        now = timezone.now()
+        self.past = Lesson.objects.create(course=self.spring, topic='Past', date=now - timezone.timedelta(days=10))
+        self.future = Lesson.objects.create(course=self.spring, topic='Future', date=now + timezone.timedelta(days=10))
+        self.autumn_lesson = Lesson.objects.create(course=self.autumn, topic='Autumn', date=now)
+        self.foreign_lesson = Lesson.objects.create(course=self.foreign, topic='Foreign', date=now)
+
+        self.low = Grade.objects.create(lesson=self.past, student=self.student, value=40)
+        self.high = Grade.objects.create(lesson=self.future, student=self.student, value=95)
+        self.other = Grade.objects.create(lesson=self.past, student=self.other_student, value=70)
+        self.foreign_grade = Grade.objects.create(lesson=self.foreign_lesson, student=self.student, value=80)
+
+        Attendance.objects.create(lesson=self.past, student=self.student, is_present=True)
+        Attendance.objects.create(lesson=self.future, student=self.student, is_present=False)
+        Attendance.objects.create(lesson=self.past, student=self.other_student, is_present=False)
+
+    def ids(self, response):
+        assert response.status_code == status.HTTP_200_OK
+        return sorted(item['id'] for item in response.data)
+
+    def test_teacher_sees_only_grades_of_own_courses(self):
+        response = self.teacher_client.get(reverse('grade-list'))
+        assert self.ids(response) == sorted([self.low.id, self.high.id, self.other.id])
+
+    def test_grade_filters(self):
+        url = reverse('grade-list')
+        assert self.ids(self.teacher_client.get(url, {'lesson': self.past.id})) == sorted([self.low.id, self.other.id])
+        assert self.ids(self.teacher_client.get(url, {'student': self.student.id})) == sorted([self.low.id, self.high.id])
+        assert self.ids(self.teacher_client.get(url, {'value_min': 50, 'value_max': 90})) == [self.other.id]
+        assert self.ids(self.teacher_client.get(url, {'course': self.autumn.id})) == []
+        date_after = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+        assert self.ids(self.teacher_client.get(url, {'date_after': date_after})) == [self.high.id]
+        assert self.ids(self.student_client.get(url, {'course': self.foreign.id})) == [self.foreign_grade.id]
+
+    def test_invalid_filter_value(self):
+        response = self.teacher_client.get(reverse('grade-list'), {'value_min': 'abc'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_lesson_filters(self):
+        url = reverse('lesson-list')
+        assert self.ids(self.teacher_client.get(url, {'course': self.spring.id})) == sorted([self.past.id, self.future.id])
+        date_before = timezone.now().isoformat()
+        response = self.teacher_client.get(url, {'course': self.spring.id, 'date_before': date_before})
+        assert self.ids(response) == [self.past.id]
+
+    def test_course_filters(self):
+        url = reverse('course-list')
+        assert self.ids(self.teacher_client.get(url, {'year': 2024, 'semester': 'spring'})) == [self.spring.id]
+        assert self.ids(self.student_client.get(url, {'semester': 'spring'})) == sorted([self.spring.id, self.foreign.id])
+
+    def test_user_filters(self):
+        url = reverse('user-list')
+        response = self.teacher_client.get(url, {'role': 'student', 'group': self.group.id})
+        assert self.ids(response) == [self.student.id]
+        assert self.ids(self.teacher_client.get(url, {'role': 'teacher'})) == sorted(
+            [self.teacher.id, self.other_teacher.id]
+        )
+
+    def test_attendance_filters_teacher(self):
+        url = reverse('attendance-list')
+        response = self.teacher_client.get(url, {'lesson': self.past.id, 'is_present': 'false'})
+        assert [item['student']['id'] for item in response.data] == [self.other_student.id]
+
+    def test_attendance_filters_student_include_archive(self):
+        archived_lesson = ArchivedLesson.objects.create(
+            id=10_000, course=self.autumn, topic='Old', date=timezone.now()
+        )
+        ArchivedAttendance.objects.create(id=10_000, lesson=archived_lesson, student=self.student, is_present=True)
+
+        url = reverse('attendance-list')
+        response = self.student_client.get(url, {'is_present': 'true'})
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(item['lesson']['topic'] for item in response.data) == ['Old', 'Past']
+
+        response = self.student_client.get(url, {'course': self.autumn.id})
+        assert [item['lesson']['topic'] for item in response.data] == ['Old']
+
+        response = self.student_client.get(url, {'lesson': 'abc'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
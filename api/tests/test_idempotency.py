@@ -0,0 +1,153 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.idempotency import request_hash
+from api.models import Course, Group, Lesson, Grade, IdempotencyKey
+
+
+@pytest.mark.django_db
+class TestIdempotencyKeys:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.other_client, self.other_teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        _, self.second_student = auth_client(role='student')
+
+        self.course = Course.objects.create(
+            name='Test Course', description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student, self.second_student)
+        self.course.groups.add(self.group)
+        self.lesson = Lesson.objects.create(
+            course=self.course, topic='Lesson', date=timezone.now() + timezone.timedelta(days=1)
+        )
+
+    def post_grade(self, key, value=90, client=None):
+        return (client or self.teacher_client).post(
+            reverse('grade-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': value},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_stored_response(self, django_assert_max_num_queries):
+        first = self.post_grade('grade-1')
+        assert first.status_code == status.HTTP_201_CREATED
+
+        # Повтор: пользователь и сохраненный ответ, без валидации и вставок
+        with django_assert_max_num_queries(3):
+            retry = self.post_grade('grade-1')
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.data == first.data
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert Grade.objects.count() == 1
+
+    def test_without_key_retry_fails(self):
+        self.teacher_client.post(
+            reverse('grade-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': 90},
+            format='json',
+        )
+        response = self.teacher_client.post(
+            reverse('grade-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': 90},
+            format='json',
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_key_reused_with_different_request(self):
+        self.post_grade('grade-1', value=90)
+        response = self.post_grade('grade-1', value=50)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Grade.objects.get().value == 90
+
+    def test_request_in_progress(self):
+        # Ключ зарезервирован запросом, который еще не завершился
+        body = f'{{"lesson_id": {self.lesson.id}, "student_id": {self.student.id}, "value": 90}}'
+        request = Request(APIRequestFactory().post(
+            reverse('grade-list'), body, content_type='application/json'
+        ))
+        IdempotencyKey.objects.create(
+            user=self.teacher, key='grade-1', method='POST', path=reverse('grade-list'),
+            request_hash=request_hash(request),
+        )
+        response = self.teacher_client.post(
+            reverse('grade-list'), body, content_type='application/json', HTTP_IDEMPOTENCY_KEY='grade-1'
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not Grade.objects.exists()
+
+    def test_keys_are_per_user(self):
+        self.post_grade('shared')
+        response = self.post_grade('shared', client=self.other_client)
+        # Для чужого курса преподаватель получает свою ошибку, а не чужой ответ
+        assert response.status_code != status.HTTP_201_CREATED
+        assert 'Idempotent-Replayed' not in response
+
+    def test_expired_key_is_executed_again(self):
+        self.post_grade('grade-1')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        Grade.objects.all().delete()
+
+        response = self.post_grade('grade-1')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert 'Idempotent-Replayed' not in response
+        assert Grade.objects.count() == 1
+
+    def test_bulk_grades(self):
+        url = reverse('lesson-bulk-grades', args=[self.lesson.id])
+        data = [
+            {'student_id': self.student.id, 'value': 80},
+            {'student_id': self.second_student.id, 'value': 70},
+        ]
+        first = self.teacher_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='bulk-1')
+        retry = self.teacher_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='bulk-1')
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.data == first.data
+        assert Grade.objects.count() == 2
+
+    def test_bulk_grades_partial_failure_writes_nothing(self):
+        url = reverse('lesson-bulk-grades', args=[self.lesson.id])
+        data = [
+            {'student_id': self.student.id, 'value': 80},
+            {'student_id': 999999, 'value': 70},
+        ]
+        first = self.teacher_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='bulk-2')
+        assert first.status_code == status.HTTP_400_BAD_REQUEST
+        assert Grade.objects.count() == 0
+
+        retry = self.teacher_client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='bulk-2')
+        assert retry.status_code == status.HTTP_400_BAD_REQUEST
+        assert retry['Idempotent-Replayed'] == 'true'
+        assert Grade.objects.count() == 0
+
+        # Исправленный запрос с новым ключом не упирается в уже записанные оценки
+        fixed = self.teacher_client.post(url, data[:1], format='json', HTTP_IDEMPOTENCY_KEY='bulk-3')
+        assert fixed.status_code == status.HTTP_201_CREATED
+        assert Grade.objects.count() == 1
+
+    def test_bulk_add_students(self):
+        newcomer = self.second_student
+        group = Group.objects.create(name=f'Empty Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.remove(newcomer)
+        url = reverse('group-bulk-add-students', args=[group.id])
+        first = self.teacher_client.post(url, {'student_ids': [newcomer.id]}, format='json',
+                                         HTTP_IDEMPOTENCY_KEY='add-1')
+        retry = self.teacher_client.post(url, {'student_ids': [newcomer.id]}, format='json',
+                                         HTTP_IDEMPOTENCY_KEY='add-1')
+        assert first.status_code == status.HTTP_200_OK
+        assert retry.data == first.data
+        assert retry['Idempotent-Replayed'] == 'true'
+
+    def test_key_too_long(self):
+        response = self.post_grade('k' * 300)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Grade.objects.exists()
@@ -0,0 +1,184 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api import jobs
+from api.models import Course, Group, Lesson, Grade, Job, ChangeEvent, Tombstone
+
+
+@pytest.fixture
+def failing_job():
+    calls = []
+
+    @jobs.register('test_failing')
+    def handler(job, fail_times):
+        calls.append(job.attempts)
+        if len(calls) <= fail_times:
+            raise RuntimeError('boom')
+        return {'calls': len(calls)}
+
+    yield calls
+    jobs._handlers.pop('test_failing', None)
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.other_client, self.other_teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+
+        self.course = Course.objects.create(
+            name='Test Course', description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        group.students.add(self.student)
+        self.course.groups.add(group)
+        for day in range(3):
+            lesson = Lesson.objects.create(
+                course=self.course, topic=f'Lesson {day}', date=timezone.now() + timedelta(days=day + 1)
+            )
+            Grade.objects.create(lesson=lesson, student=self.student, value=80)
+
+    def run_next(self):
+        job = jobs.claim('test-worker')
+        assert job is not None
+        jobs.run(job)
+        job.refresh_from_db()
+        return job
+
+    def test_background_course_delete(self):
+        url = reverse('course-detail', args=[self.course.id])
+        response = self.teacher_client.delete(url + '?background=true')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == Job.STATUS_QUEUED
+        assert Course.objects.filter(id=self.course.id).exists()
+
+        job = self.run_next()
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert job.progress == 100
+        assert job.result == {'course_id': self.course.id, 'lessons': 3, 'deleted': True}
+        assert not Course.objects.filter(id=self.course.id).exists()
+        assert not Grade.objects.exists()
+
+        response = self.teacher_client.get(reverse('job-detail', args=[response.data['id']]))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == Job.STATUS_SUCCEEDED
+
+    def test_background_course_delete_records_deletions(self):
+        lesson_ids = set(Lesson.objects.filter(course=self.course).values_list('id', flat=True))
+        jobs.enqueue('delete_course', {'course_id': self.course.id}, user=self.teacher)
+        assert self.run_next().status == Job.STATUS_SUCCEEDED
+
+        deleted = ChangeEvent.objects.filter(user=self.student, kind='grade', action='deleted')
+        assert {event.payload['lesson_id'] for event in deleted} == lesson_ids
+        for user in (self.student, self.teacher):
+            tombstones = Tombstone.objects.filter(user=user)
+            assert set(tombstones.filter(kind=Tombstone.KIND_LESSON).values_list('object_id', flat=True)) == lesson_ids
+            assert tombstones.filter(kind=Tombstone.KIND_COURSE, object_id=self.course.id).exists()
+
+    def test_background_delete_requires_course_teacher(self):
+        url = reverse('course-detail', args=[self.course.id]) + '?background=true'
+        assert self.other_client.delete(url).status_code in (status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND)
+        assert not Job.objects.exists()
+
+    def test_background_export(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        url = reverse('course-export', args=[self.course.id])
+        response = self.teacher_client.post(f'{url}?format=csv&include=grades')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['kind'] == 'export_course'
+
+        job = self.run_next()
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert job.progress == 100
+        assert job.result['filename'] == f'course-{self.course.id}-export.csv'
+        assert (tmp_path / job.result['file']).stat().st_size == job.result['size']
+
+        download = reverse('job-download', args=[job.id])
+        response = self.teacher_client.get(download)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'attachment' in response['Content-Disposition']
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        assert lines[0].startswith('record,')
+        assert len(lines) == 4
+        assert all(line.startswith('grade,') for line in lines[1:])
+
+        assert self.other_client.get(download).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_background_export_requires_course_teacher(self):
+        url = reverse('course-export', args=[self.course.id])
+        assert self.other_client.post(url).status_code in (status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND)
+        assert not Job.objects.exists()
+
+    def test_download_without_file(self):
+        job = jobs.enqueue('delete_course', {'course_id': self.course.id}, user=self.teacher)
+        response = self.teacher_client.get(reverse('job-download', args=[job.id]))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_jobs_visible_only_to_author(self):
+        job = jobs.enqueue('delete_course', {'course_id': self.course.id}, user=self.teacher)
+        assert self.other_client.get(reverse('job-detail', args=[job.id])).status_code == status.HTTP_404_NOT_FOUND
+        assert [j['id'] for j in self.teacher_client.get(reverse('job-list')).data] == [job.id]
+
+    def test_claim_is_exclusive(self):
+        jobs.enqueue('delete_course', {'course_id': self.course.id})
+        assert jobs.claim('worker-1') is not None
+        assert jobs.claim('worker-2') is None
+
+    def test_delayed_job_not_claimed(self):
+        jobs.enqueue('delete_course', {'course_id': self.course.id}, delay=60)
+        assert jobs.claim('worker-1') is None
+
+    def test_retry_with_backoff_then_success(self, failing_job):
+        jobs.enqueue('test_failing', {'fail_times': 1}, max_attempts=3)
+        job = self.run_next()
+        assert job.status == Job.STATUS_QUEUED
+        assert job.attempts == 1
+        assert 'RuntimeError' in job.error
+        assert job.run_after > timezone.now()
+
+        Job.objects.update(run_after=timezone.now())
+        job = self.run_next()
+        assert job.status == Job.STATUS_SUCCEEDED
+        assert job.result == {'calls': 2}
+
+    def test_fails_after_max_attempts(self, failing_job):
+        jobs.enqueue('test_failing', {'fail_times': 5}, max_attempts=2)
+        self.run_next()
+        Job.objects.update(run_after=timezone.now())
+        job = self.run_next()
+        assert job.status == Job.STATUS_FAILED
+        assert job.attempts == 2
+        assert job.finished_at is not None
+
+    def test_stale_job_requeued(self):
+        job = jobs.enqueue('delete_course', {'course_id': self.course.id})
+        jobs.claim('dead-worker')
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=jobs.JOB_LOCK_TIMEOUT + 1))
+        assert jobs.requeue_stale() == 1
+        assert jobs.claim('worker-2').id == job.id
+
+    def test_unknown_kind(self):
+        with pytest.raises(jobs.JobError):
+            jobs.enqueue('no_such_job')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_command_runs_queued_jobs(create_user):
+    teacher = create_user(role='teacher')
+    course = Course.objects.create(name='C', description='-', semester='spring', year=2024, teacher=teacher)
+    job = jobs.enqueue('delete_course', {'course_id': course.id})
+
+    # Потоки воркера с общей SQLite в памяти блокируют таблицы друг друга;
+    # исключительность захвата проверяет test_claim_is_exclusive
+    call_command('run_gradar_worker', '--once', '--concurrency', '1')
+
+    job.refresh_from_db()
+    assert job.status == Job.STATUS_SUCCEEDED
+    assert not Course.objects.exists()
@@ -0,0 +1,131 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api import projections
+from api.archive import archive_semester
+from api.models import Course, Group, Lesson, Grade, Attendance, ArchivedAttendance
+
+# Вложенные поля: поле -> раздел included
+REFERENCES = {
+    'lesson': 'lessons',
+    'course': 'courses',
+    'student': 'users',
+    'teacher': 'users',
+    'groups': 'groups',
+    'students': 'users',
+}
+
+
+def denormalize(document):
+    """Собирает из составного документа вложенный список, как в обычном ответе"""
+    index = {key: {item['id']: item for item in items} for key, items in document['included'].items()}
+
+    def expand(item):
+        result = {}
+        for name, value in item.items():
+            if name in REFERENCES and isinstance(value, list):
+                result[name] = [expand(index[REFERENCES[name]][pk]) for pk in value]
+            elif name in REFERENCES and value is not None:
+                result[name] = expand(index[REFERENCES[name]][value])
+            else:
+                result[name] = value
+        return result
+
+    return [expand(item) for item in document['data']]
+
+
+@pytest.mark.django_db
+class TestNormalizedFormat:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, create_user):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        self.students = [self.student] + [create_user(role='student') for _ in range(3)]
+
+        groups = []
+        for index, students in enumerate((self.students[:2], self.students[2:])):
+            group = Group.objects.create(name=f'Group {index} {uuid.uuid4().hex}', year=2024)
+            group.students.add(*students)
+            groups.append(group)
+
+        now = timezone.now()
+        for index in range(2):
+            course = Course.objects.create(
+                name=f'Курс {index}', description='-', semester='autumn', year=2024, teacher=self.teacher
+            )
+            course.groups.add(*groups[:index + 1])
+            for day in range(3):
+                lesson = Lesson.objects.create(
+                    course=course, topic=f'Тема {day}', date=now + timezone.timedelta(days=day + 1)
+                )
+                for student in course.groups.first().students.all():
+                    Grade.objects.create(lesson=lesson, student=student, value=day * 10)
+                    Attendance.objects.create(lesson=lesson, student=student, is_present=bool(day % 2))
+
+    @pytest.mark.parametrize('url_name', ['course-list', 'lesson-list', 'grade-list', 'attendance-list'])
+    def test_matches_regular_list(self, url_name):
+        regular = self.teacher_client.get(reverse(url_name))
+        response = self.teacher_client.get(reverse(url_name), {'format': 'normalized'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+        assert denormalize(response.json()) == regular.json()
+        assert len(response.content) < len(regular.content)
+
+    def test_entities_included_once(self):
+        document = self.teacher_client.get(reverse('grade-list'), {'format': 'normalized'}).json()
+        assert document['data'][0]['lesson'] in {lesson['id'] for lesson in document['included']['lessons']}
+        assert set(document['included']) == {'lessons', 'courses', 'groups', 'users'}
+        for items in document['included'].values():
+            ids = [item['id'] for item in items]
+            assert len(ids) == len(set(ids))
+        assert len(document['included']['lessons']) == Lesson.objects.count()
+        # Преподаватель курса и студенты групп попадают в общий раздел users
+        assert len(document['included']['users']) == len(self.students) + 1
+
+    def test_filtered_student_list(self):
+        lesson = Lesson.objects.first()
+        response = self.student_client.get(reverse('grade-list'), {'format': 'normalized', 'lesson': lesson.id})
+        document = response.json()
+        assert [grade['student'] for grade in document['data']] == [self.student.id]
+        assert denormalize(document) == self.student_client.get(reverse('grade-list'), {'lesson': lesson.id}).json()
+
+    def test_student_attendance_with_archive(self):
+        # Студенту список посещаемости отдается вместе с архивными семестрами
+        archived = Course.objects.create(
+            name='Архив', description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        archived.groups.add(self.student.student_groups.first())
+        lesson = Lesson.objects.create(course=archived, topic='Старая тема', date=timezone.now())
+        Attendance.objects.create(lesson=lesson, student=self.student, is_present=True)
+        archive_semester(2024, 'spring')
+        assert ArchivedAttendance.objects.filter(student=self.student).exists()
+
+        regular = self.student_client.get(reverse('attendance-list'))
+        response = self.student_client.get(reverse('attendance-list'), {'format': 'normalized'})
+        assert response.status_code == status.HTTP_200_OK
+        document = response.json()
+        assert set(document) == {'data', 'included'}
+        assert {item['student'] for item in document['data']} == {self.student.id}
+        assert lesson.id in {item['id'] for item in document['included']['lessons']}
+        assert denormalize(document) == regular.json()
+
+        filtered = self.student_client.get(reverse('attendance-list'), {'format': 'normalized', 'lesson': lesson.id})
+        assert [item['lesson'] for item in filtered.json()['data']] == [lesson.id]
+
+    def test_query_count_matches_projection(self):
+        with CaptureQueriesContext(connection) as queries:
+            projections.GRADE.normalize(Grade.objects.all())
+        assert len(queries) == 3
+
+    def test_empty_list(self):
+        assert projections.GRADE.normalize(Grade.objects.none()) == {'data': [], 'included': {}}
+
+    def test_detail_does_not_accept_normalized(self):
+        grade = Grade.objects.first()
+        response = self.teacher_client.get(reverse('grade-detail', args=[grade.id]), {'format': 'normalized'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
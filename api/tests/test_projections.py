@@ -0,0 +1,83 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api import aggregates, projections
+from api.models import Course, Group, Lesson, Grade, Attendance
+from api.renderers import FastJSONRenderer
+from api.serializers import (
+    AttendanceSerializer, CourseSerializer, CourseStatsSerializer, GradeSerializer, LessonSerializer,
+)
+
+
+@pytest.mark.django_db
+class TestProjections:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, create_user):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        self.students = [self.student] + [create_user(role='student', bio='Био') for _ in range(3)]
+
+        self.groups = []
+        for index, students in enumerate((self.students[:2], self.students[2:])):
+            group = Group.objects.create(name=f'Group {index} {uuid.uuid4().hex}', year=2024)
+            group.students.add(*students)
+            self.groups.append(group)
+
+        self.courses = []
+        for index in range(2):
+            course = Course.objects.create(
+                name=f'Курс {index}', description='Описание', semester='autumn', year=2024, teacher=self.teacher
+            )
+            course.groups.add(*self.groups[:index + 1])
+            self.courses.append(course)
+
+        now = timezone.now()
+        for course in self.courses:
+            for day in range(3):
+                lesson = Lesson.objects.create(
+                    course=course, topic=f'Тема {day}', date=now + timezone.timedelta(days=day + 1, microseconds=day)
+                )
+                for student in course.groups.first().students.all():
+                    Grade.objects.create(lesson=lesson, student=student, value=day * 10, comment=None if day else 'ok')
+                    Attendance.objects.create(lesson=lesson, student=student, is_present=bool(day % 2))
+
+    @pytest.mark.parametrize('projection, serializer_class, queryset', [
+        (projections.COURSE, CourseSerializer, lambda: Course.objects.all()),
+        (projections.COURSE_STATS, CourseStatsSerializer, lambda: aggregates.annotate_courses(Course.objects.all())),
+        (projections.LESSON, LessonSerializer, lambda: Lesson.objects.all()),
+        (projections.GRADE, GradeSerializer, lambda: Grade.objects.order_by('-id')),
+        (projections.ATTENDANCE, AttendanceSerializer, lambda: Attendance.objects.all()),
+    ])
+    def test_matches_serializer(self, projection, serializer_class, queryset):
+        # Сравниваются байты ответа, чтобы совпадал и порядок ключей
+        renderer = FastJSONRenderer()
+        expected = renderer.render(serializer_class(queryset(), many=True).data)
+        assert renderer.render(projection.evaluate(queryset())) == expected
+
+    def test_empty_queryset(self):
+        assert projections.GRADE.evaluate(Grade.objects.none()) == []
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # Основной запрос + группы курсов + студенты групп
+        with CaptureQueriesContext(connection) as queries:
+            projections.GRADE.evaluate(Grade.objects.all())
+        assert len(queries) == 3
+
+    @pytest.mark.parametrize('url_name', ['course-list', 'lesson-list', 'grade-list', 'attendance-list'])
+    def test_list_endpoints_use_projection(self, url_name):
+        response = self.teacher_client.get(reverse(url_name))
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) > 0
+
+    def test_filtered_student_list(self):
+        response = self.student_client.get(reverse('grade-list'), {'lesson': Lesson.objects.first().id})
+        assert response.status_code == status.HTTP_200_OK
+        expected = GradeSerializer(
+            Grade.objects.filter(student=self.student, lesson=Lesson.objects.first()), many=True
+        ).data
+        assert response.json() == expected
@@ -0,0 +1,104 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from api.models import Course, Group, Lesson, Grade
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+SAMPLE = {
+    'id': 1,
+    'name': 'Алгебра — введение',
+    'created': datetime.datetime(2024, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'local': datetime.datetime(2024, 3, 1, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+    'day': datetime.date(2024, 3, 1),
+    'duration': datetime.timedelta(minutes=90),
+    'average': decimal.Decimal('4.50'),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Оценка'),
+    'separators': 'a\u2028b\u2029c',
+    'nested': [{'value': 90, 'comment': None, 'passed': True, 'ratio': 0.25}],
+    3: 'ключ-число',
+}
+
+
+class TestFastJSONRenderer:
+    def test_output_matches_drf(self):
+        assert FastJSONRenderer().render(SAMPLE) == JSONRenderer().render(SAMPLE)
+
+    def test_indent_uses_standard_path(self):
+        expected = JSONRenderer().render(SAMPLE, 'application/json; indent=2')
+        assert FastJSONRenderer().render(SAMPLE, 'application/json; indent=2') == expected
+
+    def test_values_outside_orjson_range_fall_back(self):
+        data = {'big': 2 ** 70}
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_none_renders_empty_body(self):
+        assert FastJSONRenderer().render(None) == b''
+
+
+class TestFastJSONParser:
+    def parse(self, body):
+        return FastJSONParser().parse(io.BytesIO(body))
+
+    def test_parses_like_drf(self):
+        body = '{"value": 90, "comment": "Отлично", "items": [1, 2.5, null]}'.encode()
+        assert self.parse(body) == JSONParser().parse(io.BytesIO(body))
+
+    @pytest.mark.parametrize('body', [b'{"value": ', b'{"value": NaN}'])
+    def test_invalid_json(self, body):
+        with pytest.raises(ParseError):
+            self.parse(body)
+
+
+@pytest.mark.django_db
+class TestContentNegotiation:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        self.course = Course.objects.create(
+            name='Test Course', description='Test Description', semester='spring', year=2024, teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+        self.lesson = Lesson.objects.create(
+            course=self.course, topic='Test Lesson', date=timezone.now() + timezone.timedelta(days=1)
+        )
+        Grade.objects.create(lesson=self.lesson, student=self.student, value=90)
+
+    def test_malformed_json_body(self):
+        response = self.client.generic(
+            'POST', reverse('batch'), b'{"requests": ', content_type='application/json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()['detail'].startswith('JSON parse error')
+
+    def test_msgpack_round_trip(self):
+        msgpack = pytest.importorskip('msgpack')
+        url = reverse('grade-list')
+        json_response = self.client.get(url)
+
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/msgpack'
+        assert msgpack.unpackb(response.content, raw=False) == json_response.json()
+
+        body = msgpack.packb({'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': 75})
+        response = self.client.generic(
+            'PATCH', reverse('grade-detail', args=[Grade.objects.get().id]), body,
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert msgpack.unpackb(response.content, raw=False)['value'] == 75
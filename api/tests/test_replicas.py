@@ -0,0 +1,91 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from rest_framework import status
+from api.models import Course
+from api.replicas import ReplicaRouter, _read_from_replica
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    cache.clear()
+    yield 'replica'
+    cache.clear()
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+    """Реплика не получает изменений, поэтому видно, из какой базы пришли данные"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, replica):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.url = reverse('course-list')
+        Course.objects.create(
+            name='Test Course',
+            description='Test Description',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+
+    def test_safe_requests_read_from_replica(self):
+        response = self.teacher_client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+
+    def test_read_your_writes_after_write(self):
+        data = {
+            'name': 'New Course',
+            'description': 'Test Description',
+            'semester': 'spring',
+            'year': 2024
+        }
+        response = self.teacher_client.post(self.url, data)
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = self.teacher_client.get(self.url)
+        assert len(response.data) == 2
+
+        # Окно «прилипания» истекло — снова читаем с реплики
+        cache.clear()
+        response = self.teacher_client.get(self.url)
+        assert response.data == []
+
+    def test_failed_write_is_not_sticky(self, auth_client):
+        student_client, _ = auth_client(role='student')
+        response = student_client.post(self.url, {'name': 'Course'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        response = student_client.get(self.url)
+        assert response.data == []
+
+    def test_without_replicas_reads_from_primary(self, settings):
+        settings.DATABASE_REPLICAS = []
+        response = self.teacher_client.get(self.url)
+        assert len(response.data) == 1
+
+
+class TestReplicaRouter:
+    def test_writes_go_to_primary(self, settings):
+        settings.DATABASE_REPLICAS = ['replica']
+        token = _read_from_replica.set(True)
+        try:
+            assert ReplicaRouter().db_for_write(Course) == 'default'
+        finally:
+            _read_from_replica.reset(token)
+
+    def test_reads_outside_viewsets_go_to_primary(self, settings):
+        settings.DATABASE_REPLICAS = ['replica']
+        assert ReplicaRouter().db_for_read(Course) == 'default'
+
+    @pytest.mark.django_db
+    def test_transactions_read_from_primary(self, settings):
+        settings.DATABASE_REPLICAS = ['replica']
+        token = _read_from_replica.set(True)
+        try:
+            with transaction.atomic():
+                assert ReplicaRouter().db_for_read(Course) == 'default'
+        finally:
+            _read_from_replica.reset(token)
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+from gradar import schema
+
+
+@pytest.fixture
+def schema_file(settings, tmp_path):
+    settings.OPENAPI_SCHEMA_PATH = tmp_path / 'openapi.json'
+    schema.reset_schema_cache()
+    yield settings.OPENAPI_SCHEMA_PATH
+    schema.reset_schema_cache()
+
+
+@pytest.mark.django_db
+class TestOpenAPISchema:
+    def test_generate_command_writes_schema(self, schema_file):
+        call_command('generate_openapi')
+        data = json.loads(schema_file.read_bytes())
+        assert data['info']['title'] == 'Gradar API'
+        assert '/courses/' in data['paths']
+
+    def test_schema_served_from_file(self, client, schema_file):
+        schema_file.write_bytes(b'{"swagger": "2.0", "paths": {}}')
+        response = client.get('/openapi.json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b'{"swagger": "2.0", "paths": {}}'
+        assert response['ETag']
+
+    def test_schema_generated_when_file_missing(self, client, schema_file):
+        response = client.get('/openapi.json')
+        assert response.status_code == status.HTTP_200_OK
+        assert '/courses/' in json.loads(response.content)['paths']
+
+    def test_etag_not_modified(self, client, schema_file):
+        etag = client.get('/openapi.json')['ETag']
+        response = client.get('/openapi.json', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_etag_list_weak_and_wildcard(self, client, schema_file):
+        etag = client.get('/openapi.json')['ETag']
+        for header in (f'"other", {etag}', f'W/{etag}', '*'):
+            response = client.get('/openapi.json', HTTP_IF_NONE_MATCH=header)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED, header
+
+    def test_etag_substring_does_not_match(self, client, schema_file):
+        etag = client.get('/openapi.json')['ETag']
+        for header in (f'"x{etag[1:]}', f'"{etag}"', etag[1:-1]):
+            response = client.get('/openapi.json', HTTP_IF_NONE_MATCH=header)
+            assert response.status_code == status.HTTP_200_OK, header
+
+    def test_swagger_format_openapi_uses_cache(self, client, schema_file):
+        schema_file.write_bytes(b'{"swagger": "2.0", "paths": {}}')
+        response = client.get('/swagger/', {'format': 'openapi'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b'{"swagger": "2.0", "paths": {}}'
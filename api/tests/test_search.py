@@ -0,0 +1,162 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api.models import Course, Group, Lesson
+
+
+@pytest.mark.django_db
+class TestSearch:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.other_client, self.other_teacher = auth_client(role='teacher')
+
+        self.course = Course.objects.create(
+            name='Линейная алгебра',
+            description='Матрицы и определители',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+
+        self.other_course = Course.objects.create(
+            name='Алгебра и геометрия',
+            description='Чужой курс',
+            semester='spring',
+            year=2024,
+            teacher=self.other_teacher
+        )
+
+        now = timezone.now()
+        self.lesson = Lesson.objects.create(course=self.course, topic='Ранг матрицы', date=now)
+        Lesson.objects.create(course=self.course, topic='Векторные пространства', date=now)
+        Lesson.objects.create(course=self.other_course, topic='Матрицы поворота', date=now)
+
+    def search(self, client, q, **params):
+        return client.get(reverse('search'), {'q': q, **params})
+
+    def test_requires_query(self):
+        response = self.teacher_client.get(reverse('search'))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'error' in response.data
+
+    def test_prefix_match_on_course_name(self):
+        response = self.search(self.teacher_client, 'алгеб')
+        assert response.status_code == status.HTTP_200_OK
+        assert [c['id'] for c in response.data['courses']] == [self.course.id]
+
+    def test_course_description_and_lesson_topic(self):
+        response = self.search(self.teacher_client, 'матриц')
+        assert [c['id'] for c in response.data['courses']] == [self.course.id]
+        lessons = response.data['lessons']
+        assert [lesson['id'] for lesson in lessons] == [self.lesson.id]
+        assert lessons[0]['course_name'] == self.course.name
+
+    def test_all_words_must_match(self):
+        response = self.search(self.teacher_client, 'ранг пространства')
+        assert response.data['lessons'] == []
+
+    def test_scoped_like_viewsets(self):
+        response = self.search(self.student_client, 'матриц')
+        assert [c['id'] for c in response.data['courses']] == [self.course.id]
+        assert [lesson['id'] for lesson in response.data['lessons']] == [self.lesson.id]
+
+        response = self.search(self.other_client, 'матриц')
+        assert response.data['courses'] == []
+        assert [lesson['topic'] for lesson in response.data['lessons']] == ['Матрицы поворота']
+
+    def test_index_follows_updates_and_deletes(self):
+        self.lesson.topic = 'Определитель'
+        self.lesson.save()
+        assert self.search(self.teacher_client, 'ранг').data['lessons'] == []
+        assert len(self.search(self.teacher_client, 'определитель').data['lessons']) == 1
+
+        self.lesson.delete()
+        assert self.search(self.teacher_client, 'определитель').data['lessons'] == []
+
+    def test_ranked_results(self):
+        Lesson.objects.create(
+            course=self.course, topic='Матрицы: матрицы и ещё раз матрицы', date=timezone.now()
+        )
+        lessons = self.search(self.teacher_client, 'матрицы').data['lessons']
+        assert len(lessons) == 2
+        assert lessons[0]['rank'] >= lessons[1]['rank']
+
+    def test_limit(self):
+        response = self.search(self.teacher_client, 'матриц', limit='abc')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = self.search(self.teacher_client, 'а', limit=1)
+        assert len(response.data['lessons']) <= 1
+
+    def test_unauthenticated(self, api_client):
+        response = api_client.get(reverse('search'), {'q': 'алгебра'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestUserAutocomplete:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client, create_user):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+
+        self.ivanov = create_user(username='ivanov', first_name='Иван', last_name='Иванов',
+                                  email='ivanov@example.com')
+        self.petrov = create_user(username='petrov', first_name='Пётр', last_name='Петров',
+                                  email='pp@example.com')
+        self.ivanova = create_user(username='ivanova_t', first_name='Анна', last_name='Иванова',
+                                   email='anna@example.com', role='teacher')
+
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.petrov)
+
+    def autocomplete(self, client, **params):
+        return client.get(reverse('user-autocomplete'), params)
+
+    def ids(self, response):
+        return [user['id'] for user in response.data]
+
+    def test_requires_query(self):
+        response = self.autocomplete(self.teacher_client)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_prefix_over_all_fields(self):
+        assert set(self.ids(self.autocomplete(self.teacher_client, q='Иван'))) == {
+            self.ivanov.id, self.ivanova.id
+        }
+        assert self.ids(self.autocomplete(self.teacher_client, q='PP@')) == [self.petrov.id]
+        assert self.ids(self.autocomplete(self.teacher_client, q='PETR')) == [self.petrov.id]
+        assert self.autocomplete(self.teacher_client, q='ванов').data == []
+
+    def test_every_word_must_match(self):
+        response = self.autocomplete(self.teacher_client, q='Анна Иван')
+        assert self.ids(response) == [self.ivanova.id]
+        assert 'bio' not in response.data[0]
+
+    def test_role_and_ungrouped_filters(self):
+        response = self.autocomplete(self.teacher_client, q='Иван', role='student')
+        assert self.ids(response) == [self.ivanov.id]
+
+        response = self.autocomplete(self.teacher_client, q='p', role='student')
+        assert self.ids(response) == [self.petrov.id]
+        response = self.autocomplete(self.teacher_client, q='p', role='student', ungrouped='true')
+        assert response.data == []
+
+        response = self.autocomplete(self.teacher_client, q='Иван', role='admin')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_limit(self):
+        response = self.autocomplete(self.teacher_client, q='Иван', limit=1)
+        assert len(response.data) == 1
+
+    def test_student_sees_only_self(self):
+        assert self.autocomplete(self.student_client, q='Иван').data == []
+        response = self.autocomplete(self.student_client, q=self.student.username)
+        assert self.ids(response) == [self.student.id]
@@ -0,0 +1,125 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api import async_views, shedding
+from api.models import Course, Group, Lesson, Grade
+
+
+@pytest.fixture
+def overloaded(settings):
+    # Сам запрос уже выполняется, поэтому любой запрос выше порога
+    settings.LOAD_SHED_MAX_IN_FLIGHT = 0
+
+
+@pytest.mark.django_db
+class TestLoadShedding:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.student_client, self.student = auth_client(role='student')
+        self.staff_client, self.staff = auth_client(role='teacher')
+        self.staff.is_staff = True
+        self.staff.save(update_fields=['is_staff'])
+
+        self.course = Course.objects.create(
+            name='Test Course', description='-', semester='spring', year=2024, teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student)
+        self.course.groups.add(self.group)
+        self.lesson = Lesson.objects.create(course=self.course, topic='Test Lesson', date=timezone.now())
+        shedding.counters.reset()
+
+    def test_not_overloaded(self):
+        assert self.teacher_client.get(reverse('grade-list')).status_code == status.HTTP_200_OK
+        assert shedding.counters.snapshot()['shed'] == {}
+
+    @pytest.mark.usefixtures('overloaded')
+    def test_sheds_lists_search_and_export(self):
+        for url in (
+            reverse('grade-list'),
+            reverse('course-list'),
+            f"{reverse('search')}?q=test",
+            reverse('course-export', args=[self.course.id]),
+        ):
+            response = self.teacher_client.get(url)
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE, url
+            assert response['Retry-After'] == '5'
+            assert response.json() == {'error': shedding.SHED_MESSAGE}
+        assert shedding.counters.snapshot()['shed'] == {'in_flight': 4}
+
+    @pytest.mark.usefixtures('overloaded')
+    def test_protects_writes_and_detail_reads(self):
+        response = self.teacher_client.post(
+            reverse('grade-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': 90},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        response = self.teacher_client.post(
+            reverse('attendance-list'),
+            {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'is_present': True},
+            format='json'
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert self.teacher_client.get(reverse('course-detail', args=[self.course.id])).status_code == status.HTTP_200_OK
+        assert self.student_client.get(reverse('grade-my-grades')).status_code == status.HTTP_200_OK
+
+    @pytest.mark.usefixtures('overloaded')
+    def test_batch_subrequests(self):
+        response = self.teacher_client.post(reverse('batch'), {'requests': [
+            {'method': 'GET', 'path': reverse('grade-list')},
+            {'method': 'POST', 'path': reverse('grade-list'),
+             'body': {'lesson_id': self.lesson.id, 'student_id': self.student.id, 'value': 70}},
+        ]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        statuses = [item['status'] for item in response.json()['responses']]
+        assert statuses == [status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_201_CREATED]
+        assert Grade.objects.filter(student=self.student, value=70).exists()
+
+    def test_disabled(self, settings):
+        settings.LOAD_SHED_MAX_IN_FLIGHT = 0
+        settings.LOAD_SHEDDING_ENABLED = False
+        assert self.teacher_client.get(reverse('grade-list')).status_code == status.HTTP_200_OK
+
+    def test_db_pressure(self, settings, monkeypatch):
+        settings.LOAD_SHED_MAX_DB_QUERIES = 3
+        monkeypatch.setattr(shedding.counters, 'db_queries', 10)
+        assert shedding.overload_reason() == 'db_queries'
+
+        monkeypatch.setattr(shedding.counters, 'db_queries', 0)
+        monkeypatch.setattr(shedding, 'pool_waiting', lambda: 5)
+        assert shedding.overload_reason() == 'pool_waiting'
+        response = self.teacher_client.get(reverse('lesson-list'))
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_counts_queries(self):
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        snapshot = shedding.counters.snapshot()
+        assert snapshot['db_queries'] == 0
+        assert snapshot['db_queries_peak'] >= 1
+
+    def test_async_views_use_viewset_actions(self, rf):
+        request = rf.get(reverse('course-list'))
+        assert shedding.is_sheddable(request, async_views.course_list_view)
+        assert not shedding.is_sheddable(request, async_views.course_my_grades_view)
+        assert not shedding.is_sheddable(rf.post(reverse('course-list')), async_views.course_list_view)
+
+    def test_load_stats(self):
+        self.teacher_client.get(reverse('grade-list'))
+        response = self.staff_client.get(reverse('load'))
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['requests'] == 2
+        assert data['in_flight'] == 1
+        assert data['thresholds']['in_flight'] == 32
+        assert data['enabled'] is True
+
+    def test_load_stats_staff_only(self):
+        assert self.teacher_client.get(reverse('load')).status_code == status.HTTP_403_FORBIDDEN
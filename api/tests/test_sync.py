@@ -0,0 +1,155 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api import jobs, sync
+from api.models import Course, Group, Lesson, Grade, Attendance, Tombstone
+
+
+@pytest.mark.django_db
+class TestSync:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+        self.other_client, self.other_student = auth_client(role='student')
+
+        self.course = Course.objects.create(
+            name='Test Course',
+            description='Test Description',
+            semester='spring',
+            year=2024,
+            teacher=self.teacher
+        )
+        self.group = Group.objects.create(name=f'Test Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.add(self.student, self.other_student)
+        self.course.groups.add(self.group)
+        self.lesson = Lesson.objects.create(
+            course=self.course,
+            topic='Test Lesson',
+            date=timezone.now() + timedelta(days=1)
+        )
+        self.grade = Grade.objects.create(lesson=self.lesson, student=self.student, value=80)
+        self.other_grade = Grade.objects.create(lesson=self.lesson, student=self.other_student, value=70)
+        self.attendance = Attendance.objects.create(lesson=self.lesson, student=self.student, is_present=True)
+
+    def age_everything(self):
+        """Переносит все изменения в прошлое и возвращает курсор после них"""
+        past = timezone.now() - timedelta(hours=1)
+        for model in (Course, Group, Lesson, Grade, Attendance):
+            model.objects.update(updated_at=past)
+        Tombstone.objects.update(deleted_at=past)
+        return sync.encode_cursor(past + timedelta(minutes=1))
+
+    def get_sync(self, client, since=None):
+        params = {'since': since} if since else {}
+        response = client.get(reverse('sync'), params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    def test_full_snapshot_is_scoped(self):
+        data = self.get_sync(self.student_client)
+        assert data['full'] is True
+        assert data['cursor']
+        changes = data['changes']
+        assert [course['id'] for course in changes['courses']] == [self.course.id]
+        assert changes['courses'][0]['group_ids'] == [self.group.id]
+        assert [lesson['id'] for lesson in changes['lessons']] == [self.lesson.id]
+        assert [grade['id'] for grade in changes['grades']] == [self.grade.id]
+        assert sorted(changes['groups'][0]['student_ids']) == sorted([self.student.id, self.other_student.id])
+
+        teacher_data = self.get_sync(self.teacher_client)
+        assert {grade['id'] for grade in teacher_data['changes']['grades']} == {self.grade.id, self.other_grade.id}
+
+    def test_delta_returns_only_changed_rows(self):
+        cursor = self.age_everything()
+        self.grade.value = 95
+        self.grade.save()
+
+        data = self.get_sync(self.student_client, cursor)
+        assert data['full'] is False
+        assert data['changes']['grades'] == [
+            {
+                'id': self.grade.id, 'lesson_id': self.lesson.id, 'student_id': self.student.id,
+                'value': 95, 'comment': self.grade.comment,
+                'updated_at': data['changes']['grades'][0]['updated_at'],
+            }
+        ]
+        for section in ('courses', 'groups', 'lessons', 'attendance'):
+            assert data['changes'][section] == []
+        assert all(ids == [] for ids in data['deleted'].values())
+
+        # Повтор с новым курсором не возвращает уже полученную строку
+        Grade.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        assert self.get_sync(self.student_client, data['cursor'])['changes']['grades'] == []
+
+    def test_deleted_grade_reaches_student_and_teacher(self):
+        cursor = self.age_everything()
+        response = self.teacher_client.delete(reverse('grade-detail', args=[self.grade.id]))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        for client in (self.student_client, self.teacher_client):
+            assert self.get_sync(client, cursor)['deleted']['grades'] == [self.grade.id]
+        assert self.get_sync(self.other_client, cursor)['deleted']['grades'] == []
+
+    def test_deleted_lesson_reaches_course_students(self):
+        cursor = self.age_everything()
+        response = self.teacher_client.delete(reverse('lesson-detail', args=[self.lesson.id]))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        data = self.get_sync(self.student_client, cursor)
+        assert data['deleted']['lessons'] == [self.lesson.id]
+        # Оценки удаленного занятия клиент удаляет сам
+        assert data['deleted']['grades'] == []
+
+    def test_background_course_delete_records_tombstones(self):
+        cursor = self.age_everything()
+        job = jobs.enqueue('delete_course', {'course_id': self.course.id}, user=self.teacher)
+        assert jobs.run(jobs.claim('test-worker'))
+
+        assert self.get_sync(self.teacher_client, cursor)['deleted']['courses'] == [self.course.id]
+        assert self.get_sync(self.student_client, cursor)['deleted']['courses'] == [self.course.id]
+        job.refresh_from_db()
+        assert job.result['deleted'] is True
+
+    def test_membership_change_forces_full_snapshot(self):
+        cursor = self.age_everything()
+        self.group.students.remove(self.other_student)
+
+        # Оставшийся студент получает обновленный состав группы
+        data = self.get_sync(self.student_client, cursor)
+        assert data['full'] is False
+        assert data['changes']['groups'][0]['student_ids'] == [self.student.id]
+
+        # Исключенный студент получает полный снимок уже без курса группы
+        data = self.get_sync(self.other_client, cursor)
+        assert data['full'] is True
+        assert data['changes']['courses'] == []
+        assert data['changes']['grades'][0]['id'] == self.other_grade.id
+
+    def test_group_attached_to_course_forces_full_snapshot(self):
+        new_group = Group.objects.create(name=f'New Group {uuid.uuid4().hex}', year=2024)
+        self.group.students.remove(self.other_student)
+        new_group.students.add(self.other_student)
+        cursor = self.age_everything()
+
+        self.course.groups.add(new_group)
+        data = self.get_sync(self.other_client, cursor)
+        assert data['full'] is True
+        assert [course['id'] for course in data['changes']['courses']] == [self.course.id]
+        assert self.get_sync(self.teacher_client, cursor)['full'] is True
+
+    def test_invalid_cursor(self):
+        response = self.student_client.get(reverse('sync'), {'since': 'yesterday'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'error' in response.json()
+
+    def test_expired_cursor_returns_full_snapshot(self):
+        self.age_everything()
+        cursor = sync.encode_cursor(timezone.now() - sync.SYNC_TOMBSTONE_TTL - timedelta(days=1))
+        data = self.get_sync(self.student_client, cursor)
+        assert data['full'] is True
+        assert [grade['id'] for grade in data['changes']['grades']] == [self.grade.id]
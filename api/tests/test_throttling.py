@@ -0,0 +1,148 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from api import async_views, throttling
+from api.tests.test_async_views import call_async
+
+BUCKETS = {
+    'anon': {'capacity': 2, 'refill': 0.01},
+    'student': {'capacity': 10, 'refill': 0.01},
+    'teacher': {'capacity': 20, 'refill': 0.01},
+    'staff': {'capacity': 30, 'refill': 0.01},
+    'auth': {'capacity': 3, 'refill': 0.01},
+}
+
+
+@pytest.fixture
+def throttled(settings):
+    settings.THROTTLE_ENABLED = True
+    settings.THROTTLE_BUCKETS = BUCKETS
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestTake:
+    @pytest.fixture(autouse=True)
+    def clear(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_burst_then_refill(self):
+        for _ in range(3):
+            assert throttling.take('throttle:test', 1, capacity=3, refill=1.0, now=100.0) == 0
+        assert throttling.take('throttle:test', 1, capacity=3, refill=1.0, now=100.0) == pytest.approx(1.0)
+        assert throttling.take('throttle:test', 2, capacity=3, refill=1.0, now=100.5) == pytest.approx(1.5)
+        # Через секунду восстановился один токен
+        assert throttling.take('throttle:test', 1, capacity=3, refill=1.0, now=101.0) == 0
+        assert throttling.take('throttle:test', 1, capacity=3, refill=1.0, now=101.0) > 0
+
+    def test_cost_above_capacity_is_capped(self):
+        assert throttling.take('throttle:test', 50, capacity=3, refill=1.0, now=0.0) == 0
+        assert throttling.take('throttle:test', 1, capacity=3, refill=1.0, now=0.0) == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('throttled')
+class TestCostThrottle:
+    @pytest.fixture(autouse=True)
+    def setup(self, auth_client):
+        self.student_client, self.student = auth_client(role='student')
+        self.other_client, self.other = auth_client(role='student')
+        self.teacher_client, self.teacher = auth_client(role='teacher')
+
+    def test_list_costs_more_than_detail(self):
+        url = reverse('course-list')
+        assert self.student_client.get(url).status_code == status.HTTP_200_OK
+        assert self.student_client.get(url).status_code == status.HTTP_200_OK
+        response = self.student_client.get(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) > 0
+
+        # Следующий по стоимости запрос тоже не проходит, пока ведро не пополнится
+        assert self.student_client.get(reverse('user-me')).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_cheap_requests(self):
+        url = reverse('user-me')
+        for _ in range(10):
+            assert self.student_client.get(url).status_code == status.HTTP_200_OK
+        assert self.student_client.get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_buckets_are_per_user(self):
+        url = reverse('course-list')
+        self.student_client.get(url)
+        self.student_client.get(url)
+        assert self.student_client.get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert self.other_client.get(url).status_code == status.HTTP_200_OK
+
+    def test_teacher_bucket_is_larger(self):
+        url = reverse('course-list')
+        for _ in range(4):
+            assert self.teacher_client.get(url).status_code == status.HTTP_200_OK
+        assert self.teacher_client.get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_anonymous_by_ip(self, api_client):
+        url = reverse('user-list')
+        assert api_client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert api_client.post(url, {}, REMOTE_ADDR='10.0.0.2').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_forwarded_for_does_not_bypass_limit(self, api_client):
+        url = reverse('user-list')
+        statuses = [
+            api_client.post(url, {}, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{index}').status_code
+            for index in range(3)
+        ]
+        assert statuses[-1] == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_token_endpoints_use_auth_bucket(self, api_client):
+        login = reverse('token_obtain_pair')
+        data = {'username': self.student.username, 'password': 'testpass123'}
+        response = api_client.post(login, data, REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == status.HTTP_200_OK
+        refresh = {'refresh': response.data['refresh']}
+        response = api_client.post(reverse('token_refresh'), refresh, REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == status.HTTP_200_OK
+        assert api_client.post(login, data, REMOTE_ADDR='10.0.0.1').status_code == status.HTTP_200_OK
+        # Вход и обновление делят одно ведро по IP, отдельное от ведра анонимов
+        response = api_client.post(login, data, REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) > 0
+        response = api_client.post(reverse('user-list'), {}, REMOTE_ADDR='10.0.0.1')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert api_client.post(login, data, REMOTE_ADDR='10.0.0.2').status_code == status.HTTP_200_OK
+
+    def test_async_views_share_bucket(self):
+        url = reverse('course-list')
+        assert self.student_client.get(url).status_code == status.HTTP_200_OK
+        assert call_async(async_views.course_list_view, url, self.student).status_code == status.HTTP_200_OK
+        response = call_async(async_views.course_list_view, url, self.student)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) > 0
+
+    def test_disabled(self, settings):
+        settings.THROTTLE_ENABLED = False
+        url = reverse('course-list')
+        for _ in range(5):
+            assert self.student_client.get(url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_campus_logins_behind_one_nat(settings, api_client, create_user):
+    # Настройки по умолчанию: вход многих студентов с одного адреса не упирается в лимит анонимов
+    settings.THROTTLE_ENABLED = True
+    cache.clear()
+    try:
+        students = [create_user(role='student') for _ in range(40)]
+        for student in students:
+            response = api_client.post(
+                reverse('token_obtain_pair'),
+                {'username': student.username, 'password': 'testpass123'},
+                REMOTE_ADDR='10.0.0.1',
+            )
+            assert response.status_code == status.HTTP_200_OK
+    finally:
+        cache.clear()
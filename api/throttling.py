@@ -0,0 +1,93 @@
+"""
+Ограничение частоты запросов с учетом их стоимости.
+
+У каждого пользователя (анонима — по IP) есть ведро токенов, параметры
+которого зависят от роли (settings.THROTTLE_BUCKETS): capacity — запас на
+всплеск, refill — сколько токенов восстанавливается за секунду. Запрос
+списывает столько токенов, сколько стоит эндпоинт: представления задают
+стоимость атрибутом throttle_costs — {action: стоимость} у ViewSet'ов и
+{метод: стоимость} у APIView; остальные запросы стоят THROTTLE_DEFAULT_COST.
+Представление с атрибутом throttle_bucket (вход и обновление токена) списывает
+из своего ведра, общего для всех запросов с одного IP: иначе вход всего
+кампуса за NAT упирался бы в лимит анонимов.
+
+Ведро хранится в кэше Django одним числом — моментом, когда оно снова станет
+полным (GCRA, алгоритм «ведра» без фонового пополнения). С общим кэшем
+(REDIS_URL) лимит общий для всех воркеров; чтение и запись не атомарны, поэтому
+при одновременных запросах одного пользователя возможен небольшой перерасход.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_DEFAULT_COST = 1
+THROTTLE_KEY = 'throttle:{}'
+
+
+def bucket_for(user):
+    """Имя ведра из settings.THROTTLE_BUCKETS для пользователя"""
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    if user.is_staff:
+        return 'staff'
+    return user.role
+
+
+def throttle_cost(view, action):
+    costs = getattr(view, 'throttle_costs', None) or {}
+    return costs.get(action, THROTTLE_DEFAULT_COST)
+
+
+def take(key, cost, capacity, refill, now=None):
+    """
+    Списывает cost токенов из ведра key. Возвращает 0, если запрос разрешен,
+    иначе — сколько секунд ждать, пока в ведре наберется cost токенов
+    """
+    now = time.time() if now is None else now
+    interval = 1.0 / refill
+    tolerance = capacity * interval
+    # Дороже полного ведра запрос не бывает, иначе он никогда не пройдет
+    cost = min(cost, capacity)
+
+    full_at = max(cache.get(key, now), now)
+    new_full_at = full_at + cost * interval
+    wait = new_full_at - now - tolerance
+    if wait > 0:
+        return wait
+    cache.set(key, new_full_at, timeout=int(new_full_at - now) + 1)
+    return 0
+
+
+def charge(user, cost, ident=None, bucket=None):
+    """
+    Списывает стоимость запроса из ведра пользователя (анонима — из ведра его
+    IP ident); явно заданное ведро bucket тоже считается по IP. Возвращает 0
+    или сколько секунд ждать до повтора
+    """
+    if not settings.THROTTLE_ENABLED:
+        return 0
+    if bucket is None:
+        bucket = bucket_for(user)
+        if bucket != 'anon':
+            ident = user.pk
+    params = settings.THROTTLE_BUCKETS.get(bucket)
+    if params is None:
+        return 0
+    return take(THROTTLE_KEY.format(f'{bucket}:{ident}'), cost, params['capacity'], params['refill'])
+
+
+class CostThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        action = getattr(view, 'action', None) or request.method.lower()
+        self.wait_seconds = charge(
+            getattr(request, 'user', None),
+            throttle_cost(view, action),
+            self.get_ident(request),
+            getattr(view, 'throttle_bucket', None),
+        )
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
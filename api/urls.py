@@ -1,11 +1,13 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     UserViewSet, CourseViewSet, LessonViewSet,
-    GradeViewSet, AttendanceViewSet, GroupViewSet,
-    CustomTokenObtainPairView
+    GradeViewSet, AttendanceViewSet, GroupViewSet, JobViewSet,
+    SearchView, StudentDashboardView, TeacherDashboardView, BatchView, SyncView, LoadView,
+    CustomTokenObtainPairView, CustomTokenRefreshView
 )
+from .async_views import events_view
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -14,9 +16,31 @@ router.register(r'lessons', LessonViewSet)
 router.register(r'grades', GradeViewSet)
 router.register(r'attendance', AttendanceViewSet)
 router.register(r'groups', GroupViewSet)
+router.register(r'jobs', JobViewSet)
 
-urlpatterns = [
+urlpatterns = []
+
+# Асинхронные эндпоинты чтения должны стоять перед маршрутами роутера
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+
+    urlpatterns += [
+        path('users/me/', async_views.user_me_view),
+        path('courses/', async_views.course_list_view),
+        path('courses/<int:pk>/my-grades/', async_views.course_my_grades_view),
+        path('lessons/', async_views.lesson_list_view),
+        path('grades/my-grades/', async_views.grade_my_grades_view),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),  # Основной API путь
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('events/', events_view, name='events'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('load/', LoadView.as_view(), name='load'),
+    path('dashboard/student/', StudentDashboardView.as_view(), name='dashboard-student'),
+    path('dashboard/teacher/', TeacherDashboardView.as_view(), name='dashboard-teacher'),
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
 ]
@@ -4,16 +4,20 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import transaction
 from django.db.models import Q
 from .models import (
-    User, Course, Lesson, Attendance, Grade, Group,
+    User, Course, Lesson, Attendance, Grade, Group, Job,
     SEMESTER_SPRING, SEMESTER_AUTUMN, VALID_SEMESTER_VALUES
 )
-from .serializers import UserSerializer, CourseSerializer, LessonSerializer, AttendanceSerializer, GradeSerializer, GroupSerializer
+from .serializers import (
+    UserSerializer, CourseStatsSerializer, LessonSerializer, AttendanceSerializer, GradeSerializer,
+    GroupStatsSerializer, JobSerializer,
+)
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from .permissions import IsTeacher, IsStudent, IsAdminOrOwner
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .serializers import CustomTokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError as DjangoValidationError, ObjectDoesNotExist, PermissionDenied
@@ -21,13 +25,26 @@ from rest_framework import viewsets, status
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from rest_framework.views import APIView
+from . import aggregates, archive, batch, dashboards, events, exports, filters, jobs, projections, search, shedding, sync
+from .events import ChangeEventMixin
+from .idempotency import IdempotencyMixin
+from .projections import ProjectionListMixin
+from .renderers import FastJSONRenderer
+from .replicas import ReplicaReadMixin
+from .sync import TombstoneMixin
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = filters.UserFilter
+    throttle_costs = {'list': 5}
+    shed_actions = ('list',)
 
     def get_permissions(self):
         if self.action == 'create':
@@ -79,19 +96,48 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='autocomplete')
+    def autocomplete(self, request):
+        """Автодополнение пользователей по префиксу username/имени/фамилии/email"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': "Необходимо указать параметр q"}, status=status.HTTP_400_BAD_REQUEST)
+
+        role = request.query_params.get('role')
+        if role and role not in ('student', 'teacher'):
+            return Response(
+                {'error': "Недопустимая роль. Допустимые значения: 'student', 'teacher'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', search.AUTOCOMPLETE_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': "limit должен быть целым числом"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, search.AUTOCOMPLETE_MAX_LIMIT))
 
-class GroupViewSet(viewsets.ModelViewSet):
+        ungrouped = request.query_params.get('ungrouped', '').lower() in ('1', 'true', 'yes')
+        users = search.autocomplete_users(self.get_queryset(), query, role, ungrouped, limit)
+        return Response(users)
+
+
+class GroupViewSet(ReplicaReadMixin, IdempotencyMixin, TombstoneMixin, viewsets.ModelViewSet):
     queryset = Group.objects.prefetch_related('students')
-    serializer_class = GroupSerializer
+    serializer_class = GroupStatsSerializer
     permission_classes = [IsAuthenticated]
+    idempotent_actions = ('bulk_add_students',)
+    throttle_costs = {'list': 5, 'list_students': 3, 'bulk_add_students': 10}
+    shed_actions = ('list', 'list_students')
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):  # Проверка для swagger
             return Group.objects.none()
         
         if self.request.user.is_staff or self.request.user.is_teacher():
-            return self.queryset
-        return self.queryset.filter(students=self.request.user)
+            queryset = self.queryset.all()
+        else:
+            queryset = self.queryset.filter(students=self.request.user)
+        return aggregates.annotate_for_action(self, queryset, aggregates.annotate_groups)
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy', 'add_student', 'remove_student']:
@@ -304,10 +350,14 @@ class GroupViewSet(viewsets.ModelViewSet):
             )
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ReplicaReadMixin, ProjectionListMixin, TombstoneMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
-    serializer_class = CourseSerializer
+    serializer_class = CourseStatsSerializer
+    list_projection = projections.COURSE_STATS
     permission_classes = [IsAuthenticated]
+    filterset_class = filters.CourseFilter
+    throttle_costs = {'list': 5, 'my_grades': 3, 'export': 50}
+    shed_actions = ('list', 'export')
 
     def check_teacher_permission(self):
         if self.request.user.role != 'teacher':
@@ -319,8 +369,10 @@ class CourseViewSet(viewsets.ModelViewSet):
             
         user = self.request.user
         if user.role == 'teacher':
-            return Course.objects.filter(teacher=user)
-        return Course.objects.filter(groups__students=user)
+            queryset = Course.objects.filter(teacher=user)
+        else:
+            queryset = Course.objects.filter(groups__students=user)
+        return aggregates.annotate_for_action(self, queryset, aggregates.annotate_courses)
 
     def get_object(self):
         obj = super().get_object()
@@ -401,6 +453,10 @@ class CourseViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         try:
             instance = self.get_object()
+            # ?background=true: каскадное удаление выполняет воркер, клиент получает задачу
+            if request.query_params.get('background', '').lower() in ('1', 'true', 'yes'):
+                job = jobs.enqueue('delete_course', {'course_id': instance.id}, user=request.user)
+                return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             self.perform_destroy(instance)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except PermissionDenied as e:
@@ -443,18 +499,66 @@ class CourseViewSet(viewsets.ModelViewSet):
         if not Group.objects.filter(students=request.user, courses=course).exists():
             raise ValidationError("Вы не записаны на этот курс")
 
-        grades = Grade.objects.filter(
-            lesson__course=course,
-            student=request.user
-        )
+        # История включает оценки архивированных семестров
+        grades = archive.grade_history(request.user, course)
         serializer = GradeSerializer(grades, many=True)
         return Response(serializer.data)
 
+    def perform_content_negotiation(self, request, force=False):
+        # Параметр format у выгрузки означает формат файла (csv/xlsx), а не рендерер DRF
+        if self.action == 'export':
+            renderer = FastJSONRenderer()
+            return (renderer, renderer.media_type)
+        return super().perform_content_negotiation(request, force)
+
+    @action(detail=True, methods=['get', 'post'], url_path='export')
+    def export(self, request, pk=None):
+        """
+        GET — потоковая выгрузка оценок и посещаемости курса в CSV/XLSX,
+        POST — та же выгрузка фоновой задачей с сохранением файла
+        """
+        try:
+            course = self.get_object()
+            if course.teacher != request.user:
+                raise PermissionDenied("Только преподаватель курса может выгружать ведомость")
+
+            export_format = request.query_params.get('format', 'csv')
+            if export_format not in exports.EXPORT_FORMATS:
+                raise ValidationError(f"Формат должен быть одним из: {', '.join(exports.EXPORT_FORMATS)}")
+
+            include = exports.parse_include(request.query_params.get('include'))
+            if include is None:
+                raise ValidationError(
+                    f"Параметр include может содержать: {', '.join(exports.EXPORT_INCLUDES)}"
+                )
+
+            if export_format == 'xlsx' and not exports.xlsx_available():
+                raise ValidationError("Выгрузка в XLSX недоступна: не установлен openpyxl")
+
+            if request.method == 'POST':
+                job = jobs.enqueue('export_course', {
+                    'course_id': course.id, 'export_format': export_format, 'include': include,
+                }, user=request.user)
+                return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+            if export_format == 'xlsx':
+                return exports.build_xlsx(course, include)
+            return exports.stream_csv(course, include)
+
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionDenied as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(ReplicaReadMixin, ProjectionListMixin, IdempotencyMixin, TombstoneMixin, viewsets.ModelViewSet):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
+    list_projection = projections.LESSON
     permission_classes = [IsAuthenticated]
+    filterset_class = filters.LessonFilter
+    idempotent_actions = ('create', 'partial_update', 'bulk_grades')
+    throttle_costs = {'list': 5, 'bulk_grades': 20}
+    shed_actions = ('list',)
 
     def check_teacher_permission(self):
         if self.request.user.role != 'teacher':
@@ -552,33 +656,43 @@ class LessonViewSet(viewsets.ModelViewSet):
         if request.user != lesson.course.teacher:
             raise PermissionDenied("Вы не являетесь преподавателем этого курса")
 
+        # Все или ничего: сохраненный для Idempotency-Key ответ с ошибкой
+        # означает, что ни одна оценка не записана
         grades = []
-        for grade_data in request.data:
-            student_id = grade_data.get('student_id')
-            value = grade_data.get('value')
-            
-            try:
-                student = User.objects.get(id=student_id, role='student')
-                if not Group.objects.filter(students=student, courses=lesson.course).exists():
-                    raise ValidationError(f"Студент с ID {student_id} не записан на этот курс")
-                
-                grade = Grade.objects.create(
-                    lesson=lesson,
-                    student=student,
-                    value=value
-                )
-                grades.append(grade)
-            except User.DoesNotExist:
-                raise ValidationError(f"Студент с ID {student_id} не найден")
+        with transaction.atomic():
+            for grade_data in request.data:
+                student_id = grade_data.get('student_id')
+                value = grade_data.get('value')
+
+                try:
+                    student = User.objects.get(id=student_id, role='student')
+                    if not Group.objects.filter(students=student, courses=lesson.course).exists():
+                        raise ValidationError(f"Студент с ID {student_id} не записан на этот курс")
+
+                    grade = Grade.objects.create(
+                        lesson=lesson,
+                        student=student,
+                        value=value
+                    )
+                    grades.append(grade)
+                except User.DoesNotExist:
+                    raise ValidationError(f"Студент с ID {student_id} не найден")
 
         serializer = GradeSerializer(grades, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(
+    ReplicaReadMixin, ProjectionListMixin, IdempotencyMixin, ChangeEventMixin, TombstoneMixin, viewsets.ModelViewSet
+):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
+    list_projection = projections.ATTENDANCE
     permission_classes = [IsAuthenticated]
+    filterset_class = filters.AttendanceFilter
+    idempotent_actions = ('create', 'partial_update')
+    throttle_costs = {'list': 5}
+    shed_actions = ('list',)
 
     def check_teacher_permission(self):
         if self.request.user.role != 'teacher':
@@ -593,6 +707,22 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             return Attendance.objects.filter(lesson__course__teacher=user)
         return Attendance.objects.filter(student=user)
 
+    def list(self, request, *args, **kwargs):
+        # Студенту отдаем всю историю, включая архивированные семестры
+        if request.user.role != 'teacher':
+            # Фильтры применяются и к рабочей, и к архивной таблице
+            def filter_queryset(queryset):
+                return filters.filter_queryset(filters.AttendanceFilter, request.query_params, queryset)
+
+            if projections.normalized_requested(request):
+                return Response(self.list_projection.normalize(
+                    *archive.attendance_querysets(request.user, filter_queryset)
+                ))
+            history = archive.attendance_history(request.user, filter_queryset)
+            serializer = self.get_serializer(history, many=True)
+            return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         try:
             self.check_teacher_permission()
@@ -674,10 +804,17 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(
+    ReplicaReadMixin, ProjectionListMixin, IdempotencyMixin, ChangeEventMixin, TombstoneMixin, viewsets.ModelViewSet
+):
     queryset = Grade.objects.all()
     serializer_class = GradeSerializer
+    list_projection = projections.GRADE
     permission_classes = [IsAuthenticated]
+    filterset_class = filters.GradeFilter
+    idempotent_actions = ('create', 'partial_update')
+    throttle_costs = {'list': 5, 'my_grades': 3}
+    shed_actions = ('list',)
 
     def check_teacher_permission(self):
         if self.request.user.role != 'teacher':
@@ -689,6 +826,10 @@ class GradeViewSet(viewsets.ModelViewSet):
             
         user = self.request.user
         if user.role == 'teacher':
+            # В списке только оценки своих курсов; чужая оценка по id находится
+            # и отклоняется с 403 в get_object
+            if self.action == 'list':
+                return Grade.objects.filter(lesson__course__teacher=user)
             return Grade.objects.all()
         return Grade.objects.filter(student=user)
 
@@ -754,10 +895,128 @@ class GradeViewSet(viewsets.ModelViewSet):
     def my_grades(self, request):
         if request.user.role != 'student':
             raise PermissionDenied("Только студенты могут просматривать свои оценки")
-        grades = Grade.objects.filter(student=request.user)
+        grades = archive.grade_history(request.user)
         serializer = self.get_serializer(grades, many=True)
         return Response(serializer.data)
 
 
+class JobViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """Статус фоновых задач, поставленных пользователем"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):  # Проверка для swagger
+            return Job.objects.none()
+        return Job.objects.filter(created_by=self.request.user)
+
+    @action(detail=True, methods=['get'], url_path='download')
+    def download(self, request, pk=None):
+        """Файл, который сохранила задача (например, выгрузка ведомости)"""
+        job = self.get_object()
+        name = (job.result or {}).get('file') if job.status == Job.STATUS_SUCCEEDED else None
+        if not name or not default_storage.exists(name):
+            return Response({'error': "У задачи нет готового файла"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            default_storage.open(name), as_attachment=True, filename=job.result.get('filename')
+        )
+
+
+class SearchView(ReplicaReadMixin, APIView):
+    """Поиск по названиям и описаниям курсов и темам занятий"""
+    permission_classes = [IsAuthenticated]
+    throttle_costs = {'get': 5}
+    shed_actions = ('get',)
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': "Необходимо указать параметр q"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', search.SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': "limit должен быть целым числом"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, search.SEARCH_MAX_LIMIT))
+
+        return Response(search.search(request.user, query, limit))
+
+
+class StudentDashboardView(ReplicaReadMixin, APIView):
+    """Сводка для главного экрана студента за фиксированное число запросов"""
+    permission_classes = [IsAuthenticated]
+    throttle_costs = {'get': 3}
+
+    def get(self, request):
+        if request.user.role != 'student':
+            return Response(
+                {'error': "Сводка студента доступна только студентам"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response(dashboards.student_dashboard(request.user))
+
+
+class TeacherDashboardView(ReplicaReadMixin, APIView):
+    """Показатели по всем курсам преподавателя, посчитанные агрегатами в SQL"""
+    permission_classes = [IsAuthenticated]
+    throttle_costs = {'get': 3}
+
+    def get(self, request):
+        if request.user.role != 'teacher':
+            return Response(
+                {'error': "Сводка преподавателя доступна только преподавателям"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        courses = filters.filter_queryset(
+            filters.CourseFilter, request.query_params, request.user.taught_courses.all()
+        )
+        return Response(dashboards.teacher_dashboard(request.user, courses))
+
+
+class BatchView(APIView):
+    """Выполняет несколько запросов к API за один HTTP-запрос"""
+    permission_classes = [IsAuthenticated]
+    batch_exempt = True
+
+    def post(self, request):
+        try:
+            items, atomic = batch.parse_batch(request.data)
+        except batch.BatchError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        responses, committed = batch.run_batch(request, items, atomic)
+        return Response({'responses': responses, 'committed': committed})
+
+
+class SyncView(APIView):
+    """
+    Изменения и удаления после курсора для офлайн-клиентов. Читает основную
+    базу: отставание реплики больше перекрытия курсора привело бы к пропускам
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_costs = {'get': 5}
+    shed_actions = ('get',)
+
+    def get(self, request):
+        try:
+            return Response(sync.changes(request.user, request.query_params.get('since') or None))
+        except sync.SyncError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class LoadView(APIView):
+    """Счетчики нагрузки и сброшенных запросов текущего процесса для мониторинга"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(shedding.stats())
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = CustomTokenObtainPairSerializer
+    throttle_bucket = 'auth'
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    throttle_bucket = 'auth'
\ No newline at end of file
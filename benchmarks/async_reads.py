@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+Сравнение пропускной способности синхронного (WSGI) и асинхронного (ASGI)
+пути чтения при медленной базе данных и большом числе одновременных клиентов.
+
+Медленный Postgres имитируется задержкой на каждый SQL-запрос (execute_wrapper
+поверх SQLite-файла). WSGI-воркер моделируется пулом из --threads потоков,
+ASGI-воркер — одним event loop, в котором все запросы выполняются конкурентно.
+Для списков оценок/курсов/занятий асинхронный путь к тому же загружает связанные
+объекты через select_related/prefetch_related, поэтому разница там включает и
+устранение N+1; чистый эффект конкурентности показывает /api/users/me/.
+
+Пример:
+    python benchmarks/async_reads.py --clients 200 --threads 8 --db-latency 20
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ['/api/users/me/', '/api/grades/my-grades/', '/api/courses/', '/api/lessons/']
+
+
+def setup_django(db_path, latency):
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///unused')
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'gradar.test_settings'
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.ALLOWED_HOSTS = ['*']
+
+    import django
+    django.setup()
+
+    from django.db.backends.signals import connection_created
+
+    def slow_query(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install_delay(sender, connection, **kwargs):
+        # Сигнал приходит при каждом переподключении, а обертки живут дольше соединения
+        if slow_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(slow_query)
+
+    return install_delay, connection_created
+
+
+def seed(lessons):
+    from django.core.management import call_command
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from api.models import User, Group, Course, Lesson, Grade
+
+    call_command('migrate', verbosity=0)
+    teacher = User.objects.create_user(username='teacher', email='t@example.com', password='x', role='teacher')
+    student = User.objects.create_user(username='student', email='s@example.com', password='x', role='student')
+    group = Group.objects.create(name='Bench', year=2024)
+    group.students.add(student)
+    course = Course.objects.create(name='Bench', description='-', teacher=teacher, semester='spring', year=2024)
+    course.groups.add(group)
+    now = timezone.now()
+    for i in range(lessons):
+        lesson = Lesson.objects.create(course=course, topic=f'Lesson {i}', date=now + timezone.timedelta(days=i + 1))
+        Grade.objects.create(lesson=lesson, student=student, value=i % 100)
+    return str(RefreshToken.for_user(student).access_token)
+
+
+def run_wsgi(endpoint, token, clients, threads):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    started = None
+
+    def one_request():
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': endpoint,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(b''),
+            'wsgi.errors': sys.stderr,
+        }
+        statuses = []
+        response = handler(environ, lambda status, headers: statuses.append(status))
+        body = b''.join(response)
+        response.close()
+        assert statuses[0].startswith('200'), (statuses, body[:200])
+        # Задержка с точки зрения клиента, включая ожидание свободного потока
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(lambda _: one_request(), range(clients)))
+        return time.perf_counter() - started, latencies
+
+
+def run_asgi(endpoint, token, clients):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    started = None
+
+    async def one_request():
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': endpoint,
+            'query_string': b'',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'authorization', f'Bearer {token}'.encode()),
+            ],
+            'server': ('localhost', 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await handler(scope, receive, send)
+        assert messages[0]['status'] == 200, messages
+        return time.perf_counter() - started
+
+    async def main():
+        nonlocal started
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(one_request() for _ in range(clients)))
+        return time.perf_counter() - started, latencies
+
+    return asyncio.run(main())
+
+
+def child(args):
+    os.environ['ASYNC_READ_VIEWS'] = 'True' if args.mode == 'asgi' else 'False'
+    with tempfile.TemporaryDirectory() as tmp:
+        install_delay, connection_created = setup_django(os.path.join(tmp, 'bench.sqlite3'), args.db_latency / 1000)
+        token = seed(args.lessons)
+        connection_created.connect(install_delay)
+        from django.db import connection
+        connection.close()
+
+        if args.mode == 'asgi':
+            wall, latencies = run_asgi(args.endpoint, token, args.clients)
+        else:
+            wall, latencies = run_wsgi(args.endpoint, token, args.clients, args.threads)
+
+    latencies = sorted(latencies)
+    print(json.dumps({
+        'mode': args.mode,
+        'wall': wall,
+        'rps': args.clients / wall,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=100, help='одновременных клиентов')
+    parser.add_argument('--threads', type=int, default=8, help='потоков у WSGI-воркера')
+    parser.add_argument('--db-latency', type=float, default=20, help='задержка на SQL-запрос, мс')
+    parser.add_argument('--endpoint', choices=ENDPOINTS, default=ENDPOINTS[0], help='эндпоинт под нагрузкой')
+    parser.add_argument('--lessons', type=int, default=20, help='оценок у студента')
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args)
+        return
+
+    # Каждый режим запускается в отдельном процессе: от ASYNC_READ_VIEWS зависит urlconf
+    print(f"endpoint={args.endpoint} clients={args.clients} threads={args.threads} db_latency={args.db_latency}ms")
+    print(f"{'mode':<6}{'wall, s':>10}{'req/s':>10}{'p50, ms':>10}{'p95, ms':>10}")
+    for mode in ('wsgi', 'asgi'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode] + sys.argv[1:],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<6}{result['wall']:>10.2f}{result['rps']:>10.1f}"
+              f"{result['p50'] * 1000:>10.0f}{result['p95'] * 1000:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Время сборки списков оценок, посещаемости и пользователей: стандартный ListSerializer DRF против
+скомпилированного представления (api/compiled.py).
+
+Объекты загружаются один раз со всеми связями, затем замеряется только
+преобразование моделей в список словарей.
+
+Пример:
+    python benchmarks/compiled.py --grades 2000 --repeat 10
+"""
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from projections import measure, seed, setup_django  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grades', type=int, default=1000, help='оценок в списке')
+    parser.add_argument('--repeat', type=int, default=10, help='повторов каждого замера')
+    args = parser.parse_args()
+
+    setup_django()
+    seed(args.grades)
+    from rest_framework.serializers import ListSerializer
+    from api.models import Attendance, Grade, User
+    from api.serializers import AttendanceSerializer, GradeSerializer, UserSerializer
+
+    # Отметка посещаемости на каждую оценку: списки одинаковой длины
+    Attendance.objects.bulk_create(
+        Attendance(lesson_id=lesson_id, student_id=student_id, is_present=bool(index % 5))
+        for index, (lesson_id, student_id) in enumerate(Grade.objects.values_list('lesson_id', 'student_id'))
+    )
+    grades = list(
+        Grade.objects.select_related('lesson__course__teacher', 'student')
+        .prefetch_related('lesson__course__groups__students')
+    )
+    attendance = list(
+        Attendance.objects.select_related('lesson__course__teacher', 'student')
+        .prefetch_related('lesson__course__groups__students')
+    )
+    users = list(User.objects.all())
+    cases = [
+        ('grades', GradeSerializer, grades),
+        ('attendance', AttendanceSerializer, attendance),
+        ('users', UserSerializer, users),
+    ]
+
+    print(f"grades={args.grades} repeat={args.repeat}")
+    print(f"{'list':<12}{'generic, ms':>14}{'compiled, ms':>14}{'speedup':>10}")
+    for name, serializer_class, objects in cases:
+        generic = lambda: ListSerializer(child=serializer_class()).to_representation(objects)  # noqa: E731
+        fast = lambda: serializer_class(objects, many=True).data  # noqa: E731
+        assert generic() == fast()
+        generic_time = measure(generic, args.repeat)
+        compiled_time = measure(fast, args.repeat)
+        print(f"{name:<12}{generic_time * 1000:>14.1f}{compiled_time * 1000:>14.1f}"
+              f"{generic_time / compiled_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
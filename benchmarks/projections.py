@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Время сборки списка оценок и занятий: ModelSerializer против проекций .values().
+
+Для сериализатора связи загружаются заранее (select_related/prefetch_related),
+то есть сравнивается лучший вариант через модели с проекцией из api/projections.py.
+Замеряется получение данных и сборка списка словарей без рендеринга в JSON.
+
+Пример:
+    python benchmarks/projections.py --grades 2000 --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///unused')
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'gradar.test_settings'
+
+    import django
+    django.setup()
+
+
+def seed(count, students_count=20):
+    from django.core.management import call_command
+    from django.utils import timezone
+    from api.models import User, Group, Course, Lesson, Grade
+
+    call_command('migrate', verbosity=0)
+    teacher = User.objects.create_user(username='teacher', email='t@example.com', password='x', role='teacher')
+    students = [
+        User.objects.create_user(username=f'student{i}', email=f's{i}@example.com', password='x', role='student')
+        for i in range(students_count)
+    ]
+    group = Group.objects.create(name='Bench', year=2024)
+    group.students.add(*students)
+    course = Course.objects.create(name='Bench', description='-', teacher=teacher, semester='spring', year=2024)
+    course.groups.add(group)
+    now = timezone.now()
+    lessons = [
+        Lesson.objects.create(course=course, topic=f'Lesson {i}', date=now + timezone.timedelta(days=i + 1))
+        for i in range(count // students_count + 1)
+    ]
+    Grade.objects.bulk_create(
+        Grade(lesson=lessons[i // students_count], student=students[i % students_count], value=i % 101)
+        for i in range(count)
+    )
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grades', type=int, default=1000, help='оценок в списке')
+    parser.add_argument('--repeat', type=int, default=10, help='повторов каждого замера')
+    args = parser.parse_args()
+
+    setup_django()
+    seed(args.grades)
+    from api import projections
+    from api.models import Lesson, Grade
+    from api.serializers import GradeSerializer, LessonSerializer
+
+    cases = [
+        (
+            'grades',
+            lambda: GradeSerializer(
+                Grade.objects.select_related('lesson__course__teacher', 'student')
+                .prefetch_related('lesson__course__groups__students'),
+                many=True,
+            ).data,
+            lambda: projections.GRADE.evaluate(Grade.objects.all()),
+        ),
+        (
+            'lessons',
+            lambda: LessonSerializer(
+                Lesson.objects.select_related('course__teacher').prefetch_related('course__groups__students'),
+                many=True,
+            ).data,
+            lambda: projections.LESSON.evaluate(Lesson.objects.all()),
+        ),
+    ]
+
+    print(f"grades={args.grades} repeat={args.repeat}")
+    print(f"{'list':<10}{'serializer, ms':>16}{'projection, ms':>16}{'speedup':>10}")
+    for name, serializer, projection in cases:
+        assert serializer() == projection()
+        serializer_time = measure(serializer, args.repeat)
+        projection_time = measure(projection, args.repeat)
+        print(f"{name:<10}{serializer_time * 1000:>16.1f}{projection_time * 1000:>16.1f}"
+              f"{serializer_time / projection_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Скорость рендеринга и разбора ответа со списком оценок (GradeSerializer).
+
+Данные сериализуются один раз, затем замеряется только преобразование в байты
+и обратно: стандартный JSONRenderer/JSONParser DRF (stdlib json), FastJSON на
+orjson и MessagePack (если установлен msgpack). Печатается медианное время на
+ответ, ускорение относительно stdlib и размер тела.
+
+Пример:
+    python benchmarks/renderers.py --grades 2000 --repeat 30
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///unused')
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'gradar.test_settings'
+
+    import django
+    django.setup()
+
+
+def grade_list(count):
+    """Ответ GET /api/grades/ для преподавателя с count оценками"""
+    from django.core.management import call_command
+    from django.utils import timezone
+    from api.models import User, Group, Course, Lesson, Grade
+    from api.serializers import GradeSerializer
+
+    call_command('migrate', verbosity=0)
+    teacher = User.objects.create_user(username='teacher', email='t@example.com', password='x', role='teacher')
+    students = [
+        User.objects.create_user(
+            username=f'student{i}', email=f's{i}@example.com', password='x', role='student',
+            first_name='Студент', last_name=f'Номер {i}',
+        )
+        for i in range(20)
+    ]
+    group = Group.objects.create(name='Bench', year=2024)
+    group.students.add(*students)
+    course = Course.objects.create(
+        name='Математический анализ', description='Пределы, производные и интегралы',
+        teacher=teacher, semester='spring', year=2024,
+    )
+    course.groups.add(group)
+    now = timezone.now()
+    lessons = [
+        Lesson.objects.create(course=course, topic=f'Занятие {i}', date=now + timezone.timedelta(days=i + 1))
+        for i in range(count // len(students) + 1)
+    ]
+    Grade.objects.bulk_create(
+        Grade(lesson=lessons[i // len(students)], student=students[i % len(students)], value=i % 101,
+              comment='Хорошая работа')
+        for i in range(count)
+    )
+    grades = Grade.objects.select_related('lesson__course__teacher', 'student').prefetch_related(
+        'lesson__course__groups__students'
+    )
+    return GradeSerializer(grades, many=True).data
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grades', type=int, default=1000, help='оценок в ответе')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов каждого замера')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from api.parsers import FastJSONParser, MessagePackParser
+    from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack_available, orjson
+
+    data = grade_list(args.grades)
+    formats = [('json (stdlib)', JSONRenderer(), JSONParser())]
+    if orjson is not None:
+        formats.append(('json (orjson)', FastJSONRenderer(), FastJSONParser()))
+    if msgpack_available():
+        formats.append(('msgpack', MessagePackRenderer(), MessagePackParser()))
+
+    print(f"grades={args.grades} repeat={args.repeat}")
+    print(f"{'format':<16}{'render, ms':>12}{'parse, ms':>12}{'speedup':>10}{'size, KB':>10}")
+    baseline = None
+    for name, renderer, body_parser in formats:
+        body = renderer.render(data)
+        render_time = measure(lambda: renderer.render(data), args.repeat)
+        parse_time = measure(lambda: body_parser.parse(io.BytesIO(body)), args.repeat)
+        baseline = baseline or render_time
+        print(f"{name:<16}{render_time * 1000:>12.2f}{parse_time * 1000:>12.2f}"
+              f"{baseline / render_time:>9.1f}x{len(body) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Разбор DATABASE_URL в настройки Django с управлением соединениями.
+
+Параметры соединения задаются в query-строке URL, а значения по умолчанию —
+переменными окружения:
+
+    ?conn_max_age=60            DB_CONN_MAX_AGE        постоянные соединения, сек (0 — закрывать после запроса)
+    ?health_checks=true         DB_CONN_HEALTH_CHECKS  проверять соединение перед повторным использованием
+    ?statement_timeout=5000     DB_STATEMENT_TIMEOUT   серверный таймаут запроса, мс
+    ?connect_timeout=5          DB_CONNECT_TIMEOUT     таймаут установки соединения, сек
+    ?pool=true                  DB_POOL                пул соединений psycopg 3 (Django 5.1+)
+    ?pool_min_size=2            DB_POOL_MIN_SIZE
+    ?pool_max_size=10           DB_POOL_MAX_SIZE
+
+Для локальных запусков поддерживается ``sqlite:///path/to/db.sqlite3``.
+"""
+import os
+from urllib.parse import urlparse, parse_qs
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def _params(url):
+    return {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+
+def _get(params, name, env_name, default):
+    return params.get(name, os.getenv(env_name, default))
+
+
+def _as_bool(value):
+    return str(value).lower() in TRUE_VALUES
+
+
+def pool_supported():
+    if django.VERSION < (5, 1):
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def database_config(database_url):
+    """Возвращает словарь настроек для одного алиаса в DATABASES"""
+    url = urlparse(database_url)
+    if url.scheme == 'sqlite':
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': url.path[1:],
+        }
+
+    params = _params(url)
+
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': url.path[1:],  # Извлекаем имя базы данных
+        'USER': url.username,   # Извлекаем пользователя
+        'PASSWORD': url.password,  # Извлекаем пароль
+        'HOST': url.hostname,   # Извлекаем хост
+        'PORT': url.port,       # Извлекаем порт
+        'CONN_MAX_AGE': int(_get(params, 'conn_max_age', 'DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': _as_bool(_get(params, 'health_checks', 'DB_CONN_HEALTH_CHECKS', 'true')),
+        'OPTIONS': {},
+    }
+
+    connect_timeout = _get(params, 'connect_timeout', 'DB_CONNECT_TIMEOUT', None)
+    if connect_timeout:
+        config['OPTIONS']['connect_timeout'] = int(connect_timeout)
+
+    # Таймаут выставляется на стороне сервера для каждой сессии через libpq options
+    statement_timeout = _get(params, 'statement_timeout', 'DB_STATEMENT_TIMEOUT', None)
+    if statement_timeout:
+        config['OPTIONS']['options'] = f'-c statement_timeout={int(statement_timeout)}'
+
+    if _as_bool(_get(params, 'pool', 'DB_POOL', 'false')):
+        if not pool_supported():
+            raise ImproperlyConfigured(
+                "Пул соединений требует Django 5.1+ и установленного psycopg[pool]"
+            )
+        config['OPTIONS']['pool'] = {
+            'min_size': int(_get(params, 'pool_min_size', 'DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(_get(params, 'pool_max_size', 'DB_POOL_MAX_SIZE', 10)),
+        }
+        # Django не допускает постоянные соединения поверх пула
+        config['CONN_MAX_AGE'] = 0
+
+    return config
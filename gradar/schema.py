@@ -0,0 +1,110 @@
+"""
+OpenAPI-схема Gradar.
+
+Схема строится один раз — командой ``manage.py generate_openapi`` при сборке
+образа либо при первом обращении в процессе — и дальше отдается из памяти
+с ETag по хэшу содержимого, без повторного обхода сериализаторов и ViewSet'ов.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import permissions
+
+# drf_yasg импортируется лениво: воркерам, которые отдают готовый файл схемы,
+# он не нужен вовсе (см. API_ONLY в settings)
+_swagger_ui_view = None
+
+
+def get_api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="Gradar API",
+        default_version='v1',
+        description="API для системы управления учебным процессом Gradar. "
+                  "Позволяет управлять курсами, группами студентов, занятиями, "
+                  "оценками и посещаемостью.",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="support@gradar.edu"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def get_swagger_ui_view():
+    global _swagger_ui_view
+    if _swagger_ui_view is None:
+        from drf_yasg.views import get_schema_view
+
+        schema_view = get_schema_view(
+            get_api_info(),
+            public=True,
+            permission_classes=(permissions.AllowAny,),
+        )
+        _swagger_ui_view = schema_view.with_ui('swagger', cache_timeout=0)
+    return _swagger_ui_view
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def generate_schema():
+    """Строит схему по текущему коду и возвращает ее в виде JSON (bytes)"""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(get_api_info())
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[], pretty=True).encode(schema)
+
+
+def load_schema():
+    """
+    Возвращает (content, etag). Предгенерированный файл используется только
+    вне DEBUG: при разработке схема строится заново в каждом процессе
+    """
+    if 'schema' not in _cache:
+        with _lock:
+            if 'schema' not in _cache:
+                content = None
+                if not settings.DEBUG:
+                    try:
+                        content = settings.OPENAPI_SCHEMA_PATH.read_bytes()
+                    except FileNotFoundError:
+                        pass
+                if content is None:
+                    content = generate_schema()
+                etag = '"%s"' % hashlib.sha256(content).hexdigest()
+                _cache['schema'] = (content, etag)
+    return _cache['schema']
+
+
+def reset_schema_cache():
+    _cache.pop('schema', None)
+
+
+def etag_matches(etag, if_none_match):
+    """Слабое сравнение для If-None-Match (RFC 9110, 13.1.2): W/ не учитывается"""
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in (tag.removeprefix('W/') for tag in etags)
+
+
+def openapi_json(request):
+    content, etag = load_schema()
+    if etag_matches(etag, request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def swagger(request, *args, **kwargs):
+    # Swagger UI и ?format=openapi берут спецификацию из кэша, а не генерируют ее
+    if request.GET.get('format') == 'openapi':
+        return openapi_json(request)
+    return get_swagger_ui_view()(request, *args, **kwargs)
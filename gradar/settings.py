@@ -1,8 +1,9 @@
+import importlib.util
 import os
 from pathlib import Path
-from urllib.parse import urlparse
 from datetime import timedelta
 from dotenv import load_dotenv
+from .database import database_config
 
 # Load environment variables from .env file
 load_dotenv()
@@ -45,18 +46,24 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-url = urlparse(DATABASE_URL)
+# Постоянные соединения, health checks, пул и таймауты настраиваются через URL/env,
+# см. gradar/database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': url.path[1:],  # Извлекаем имя базы данных
-        'USER': url.username,   # Извлекаем пользователя
-        'PASSWORD': url.password,  # Извлекаем пароль
-        'HOST': url.hostname,   # Извлекаем хост
-        'PORT': url.port,       # Извлекаем порт
-    }
+    'default': database_config(DATABASE_URL),
 }
 
+# Реплики для чтения: безопасные запросы ViewSet'ов читают с них (см. api/replicas.py)
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = database_config(replica_url.strip())
+    DATABASE_REPLICAS.append(alias)
+
+# Сколько секунд после записи пользователь читает только с основной базы
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 5))
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
 # Приложения и middleware
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -69,17 +76,45 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
+    'django_filters',
     'api',
     'drf_yasg'
 ]
 
+# JSON через orjson (со стандартным json, если orjson не установлен);
+# application/msgpack подключается, только если установлен msgpack
+API_RENDERER_CLASSES = [
+    'api.renderers.FastJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+]
+API_PARSER_CLASSES = [
+    'api.parsers.FastJSONParser',
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+]
+if importlib.util.find_spec('msgpack') is not None:
+    API_RENDERER_CLASSES.insert(1, 'api.renderers.MessagePackRenderer')
+    API_PARSER_CLASSES.insert(1, 'api.parsers.MessagePackParser')
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
+    'DEFAULT_PARSER_CLASSES': API_PARSER_CLASSES,
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_FILTER_BACKENDS': (
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.CostThrottle',
+    ),
+    # Сколько прокси перед приложением добавляют адрес в X-Forwarded-For. При 0
+    # клиент определяется по REMOTE_ADDR, и подделанный заголовок не помогает
+    # обойти лимит анонимов
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
     'TEST_REQUEST_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -87,6 +122,37 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Кэш Django. По умолчанию — в памяти процесса; с REDIS_URL (нужен пакет redis)
+# кэш общий для всех воркеров, и на нем же общие лимиты запросов и «прилипание»
+# к основной базе после записи
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Лимиты запросов (api/throttling.py): ведро токенов на пользователя по роли.
+# capacity — запас на всплеск, refill — токенов в секунду; стоимость эндпоинтов
+# задается у представлений атрибутом throttle_costs
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True') == 'True'
+THROTTLE_BUCKETS = {
+    'anon': {'capacity': 20, 'refill': 0.5},
+    'student': {'capacity': 120, 'refill': 2.0},
+    'teacher': {'capacity': 300, 'refill': 5.0},
+    'staff': {'capacity': 600, 'refill': 10.0},
+    # Вход и обновление токена: по IP, с запасом на весь кампус за одним NAT
+    'auth': {'capacity': 600, 'refill': 10.0},
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=int(os.getenv('ACCESS_TOKEN_LIFETIME_DAYS', 1))),
@@ -105,9 +171,16 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'api.User'
 
+# Сколько часов хранятся ответы на запросы с Idempotency-Key (см. api/idempotency.py)
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+# Асинхронные эндпоинты чтения (api/async_views.py) для запуска через ASGI
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Должен быть первым в списке
     'django.middleware.security.SecurityMiddleware',
+    'api.shedding.LoadSheddingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -116,6 +189,50 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Сброс второстепенных запросов при перегрузке (api/shedding.py). Пороги — на
+# процесс: выполняющиеся запросы, запросы к базе и ожидающие соединения из пула
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', 'True') == 'True'
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHED_MAX_IN_FLIGHT', 32))
+LOAD_SHED_MAX_DB_QUERIES = int(os.getenv('LOAD_SHED_MAX_DB_QUERIES', 16))
+LOAD_SHED_MAX_POOL_WAITING = int(os.getenv('LOAD_SHED_MAX_POOL_WAITING', 2))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', 5))
+
+# Режим только API: JWT-воркеры не загружают админку, Swagger, сессии и сообщения,
+# что сокращает время холодного старта (см. benchmarks/startup.py)
+API_ONLY = os.getenv('API_ONLY', 'False') == 'True'
+
+API_ONLY_EXCLUDED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_yasg',
+]
+
+API_ONLY_EXCLUDED_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+if API_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_ONLY_EXCLUDED_APPS]
+    MIDDLEWARE = [m for m in MIDDLEWARE if m not in API_ONLY_EXCLUDED_MIDDLEWARE]
+    # Browsable API требует шаблонов и сессий, в этом режиме отдаем только JSON
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        renderer for renderer in API_RENDERER_CLASSES
+        if renderer != 'rest_framework.renderers.BrowsableAPIRenderer'
+    ]
+
+# OpenAPI-схема, предгенерированная командой generate_openapi
+OPENAPI_SCHEMA_PATH = Path(os.getenv('OPENAPI_SCHEMA_PATH', BASE_DIR / 'openapi.json'))
+
+SWAGGER_SETTINGS = {
+    'SPEC_URL': 'openapi-schema',
+}
+
 # Шаблоны
 TEMPLATES = [
     {
@@ -133,9 +250,18 @@ TEMPLATES = [
     },
 ]
 
+if API_ONLY:
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+        'django.contrib.messages.context_processors.messages'
+    )
+
 # Статические файлы
 STATIC_URL = 'static/'
 
+# Файлы, которые сохраняют фоновые задачи (выгрузки ведомостей). При нескольких
+# машинах каталог должен быть общим для воркеров и веб-процессов
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+
 # Настройки по умолчанию для миграций и т. д.
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -7,27 +7,39 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
-    }
+    },
+    # Вторая база-заглушка для тестов маршрутизации на реплики
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
 }
 
+# Реплики включаются только в тестах маршрутизации
+DATABASE_REPLICAS = []
+
 # REST Framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': API_RENDERER_CLASSES,
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_FILTER_BACKENDS': (
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.CostThrottle',
+    ),
+    'NUM_PROXIES': 0,
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
     'TEST_REQUEST_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.MultiPartRenderer',
     ],
-    'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
-        'rest_framework.parsers.FormParser',
-        'rest_framework.parsers.MultiPartParser',
-    ],
+    'DEFAULT_PARSER_CLASSES': API_PARSER_CLASSES,
 }
 
 # JWT settings
@@ -67,6 +79,10 @@ CACHES = {
     }
 }
 
+# Лимиты запросов включаются только в тестах api/throttling.py: id пользователей
+# в SQLite повторяются между тестами, а кэш в памяти общий
+THROTTLE_ENABLED = False
+
 # Secret key for tests
 SECRET_KEY = 'test-secret-key'
 
@@ -96,5 +112,6 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
+    'django_filters',
     'api',
 ] 
\ No newline at end of file